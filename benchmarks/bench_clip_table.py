@@ -0,0 +1,51 @@
+"""Memory per clip and conversion time of `ClipTable` vs a list of `FcpClip`
+
+It doesn’t need FFmpeg, the cuts and the video attributes are synthetic.
+
+Usage:
+  python3 -m benchmarks.bench_clip_table [--cuts 1000000]
+"""
+
+import json
+import argparse
+import tracemalloc
+from time import perf_counter
+
+from fcpscene.cuts_to_clips import ClipTable, cuts_to_fcp_clips
+from .bench_fcpxml import synthetic_video
+
+
+def measure(fn, n_clips) -> dict:
+  tracemalloc.start()
+  start = perf_counter()
+  result = fn()
+  wall = perf_counter() - start
+  retained, peak = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+  del result
+  return {
+    'wall_secs': round(wall, 3),
+    'bytes_per_clip': round(retained / n_clips, 1),
+    'peak_mb': round(peak / 1e6, 1),
+  }
+
+
+def main():
+  parser = argparse.ArgumentParser(description='Cut to clip conversion')
+  parser.add_argument('--cuts', type=int, default=1_000_000)
+  parser.add_argument('--fps', type=int, default=30)
+  args = parser.parse_args()
+
+  v = synthetic_video(args.cuts, args.fps)
+  cuts = [0, *[round(i * 2.0 + 0.5, 6) for i in range(args.cuts)], v.duration + 1]
+  n_clips = len(cuts) - 1
+
+  print(json.dumps({
+    'cuts': args.cuts,
+    'fcp_clips_list': measure(lambda: cuts_to_fcp_clips(cuts, v), n_clips),
+    'clip_table': measure(lambda: ClipTable(cuts, v), n_clips),
+  }, indent=2))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,57 @@
+"""Throughput of the detection engines
+
+Usage:
+  python3 -m benchmarks.bench_engines [--seconds 120] [--width 1920 --height 1080]
+"""
+
+import json
+import argparse
+import tempfile
+from time import perf_counter
+
+from fcpscene import PROXY_WIDTH, DEFAULT_SENSITIVITY, MIN_SCENE_SECS
+from fcpscene.event_bus import EventBus
+from fcpscene.video_attr import VideoAttr
+from fcpscene.detect_scene_changes import extract_scene_changes
+from fcpscene.detect_engines import ENGINES
+from .synthetic import make_video, precision_recall
+
+
+def main():
+  parser = argparse.ArgumentParser(description='Detection engines throughput')
+  parser.add_argument('--seconds', type=float, default=60)
+  parser.add_argument('--scene-seconds', type=float, default=5)
+  parser.add_argument('--width', type=int, default=1280)
+  parser.add_argument('--height', type=int, default=720)
+  parser.add_argument('--fps', type=int, default=30)
+  parser.add_argument('--codec', default='h264')
+  parser.add_argument('--out-dir', default=tempfile.gettempdir() + '/fcpscene-bench')
+  args = parser.parse_args()
+
+  path, expected = make_video(args.out_dir, args.width, args.height, args.fps, args.scene_seconds,
+                              int(args.seconds // args.scene_seconds), args.codec)
+  v = VideoAttr(path)
+
+  results = []
+  for name, engine in ENGINES.items():
+    start = perf_counter()
+    try:
+      cuts = engine(v, EventBus(), DEFAULT_SENSITIVITY, PROXY_WIDTH, MIN_SCENE_SECS)
+    except RuntimeError as e:
+      results.append({'engine': name, 'error': str(e)})
+      continue
+    wall = perf_counter() - start
+    precision, recall = precision_recall(expected, extract_scene_changes(cuts), tolerance=1 / v.fps)
+    results.append({
+      'engine': name,
+      'wall_secs': round(wall, 3),
+      'frames_per_sec': round(v.duration_frames / wall, 1),
+      'precision': round(precision, 3),
+      'recall': round(recall, 3),
+    })
+
+  print(json.dumps({'video': v.summary, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+  main()
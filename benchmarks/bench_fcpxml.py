@@ -0,0 +1,217 @@
+"""FCPXML writing time and peak memory, building a string vs streaming to a file
+
+The string baseline is a copy of the writers before streaming, which
+concatenated the whole document with `xml +=`.
+
+It doesn’t need FFmpeg, the cuts and the video attributes are synthetic.
+
+Usage:
+  python3 -m benchmarks.bench_fcpxml [--cuts 1000 100000 1000000]
+"""
+
+import os
+import json
+import argparse
+import tempfile
+import tracemalloc
+from time import perf_counter
+from types import SimpleNamespace
+
+from fcpscene.video_attr import VideoAttr
+from fcpscene.cuts_to_clips import cuts_to_fcp_clips
+from fcpscene.detect_scene_changes import CutTimes
+from fcpscene.fcpxml_writer import FCPXML_MODES, write_fcpxml
+
+
+def synthetic_video(n_cuts, fps=30):
+  return SimpleNamespace(
+    name='synthetic',
+    width=1920,
+    height=1080,
+    fps=fps,
+    fps_numerator=fps,
+    fps_denominator=1,
+    fcp_color_space='1-1-1 (Rec. 709)',
+    file_uri='file:///tmp/synthetic.mov',
+    duration=n_cuts * 2.0)
+
+
+def string_fcpxml_clips(cuts: CutTimes, v: VideoAttr) -> str:
+  """`to_fcpxml_clips` before streaming"""
+
+  clips = cuts_to_fcp_clips(cuts, v)
+
+  xml = f'''<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE fcpxml>
+<fcpxml version="1.13">
+  <resources>
+    <format id="r1"
+      width="{v.width}"
+      height="{v.height}"
+      colorSpace="{v.fcp_color_space}"
+      frameDuration="{v.fps_denominator}/{v.fps_numerator}s"/>
+    <asset id="r2" start="0s" format="r1">
+      <media-rep kind="original-media" src="{v.file_uri}"/>
+    </asset>
+  </resources>
+  <library>
+    <event name="fcpscene">
+      <project name="{v.name}">
+        <sequence format="r1" tcStart="0s">
+          <spine>'''
+
+  for c in clips: xml += f'''
+            <asset-clip ref="r2" offset="{c.offset}" start="{c.offset}" duration="{c.duration}"/>'''
+
+  xml += f'''
+          </spine>
+        </sequence>
+      </project>
+    </event>
+  </library>
+</fcpxml>
+'''
+  return xml
+
+
+def string_fcpxml_compound_clips(cuts: CutTimes, v: VideoAttr) -> str:
+  """`to_fcpxml_compound_clips` before streaming"""
+
+  clips = cuts_to_fcp_clips(cuts, v)
+
+  xml = f'''<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE fcpxml>
+<fcpxml version="1.13">
+  <resources>
+    <format id="r1"
+      width="{v.width}"
+      height="{v.height}"
+      colorSpace="{v.fcp_color_space}"
+      frameDuration="{v.fps_denominator}/{v.fps_numerator}s"/>
+    <asset id="r2" start="0s" format="r1">
+      <media-rep kind="original-media" src="{v.file_uri}"/>
+    </asset>'''
+
+  for c in clips: xml += f'''
+    <media id="{c.ref_id}" name="{v.name}_{c.seq}">
+      <sequence format="r1" tcStart="0s">
+        <spine>
+          <asset-clip ref="r2" offset="0s" start="{c.offset}" duration="{c.duration}"/>
+        </spine>
+      </sequence>
+    </media>'''
+
+  xml += f'''
+  </resources>
+  <library>
+    <event name="fcpscene">
+      <project name="{v.name}">
+        <sequence format="r1" tcStart="0s">
+          <spine>'''
+
+  for c in clips: xml += f'''
+            <ref-clip ref="{c.ref_id}" offset="{c.offset}" duration="{c.duration}"/>'''
+
+  xml += f'''
+          </spine>
+        </sequence>
+      </project>
+    </event>
+  </library>
+</fcpxml>
+'''
+  return xml
+
+
+def string_fcpxml_markers(cuts: CutTimes, v: VideoAttr) -> str:
+  """`to_fcpxml_markers` before streaming"""
+
+  clips = cuts_to_fcp_clips(cuts, v)
+  frame_duration = f'{v.fps_denominator}/{v.fps_numerator}s'
+
+  xml = f'''<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE fcpxml>
+<fcpxml version="1.13">
+  <resources>
+    <format id="r1"
+      width="{v.width}"
+      height="{v.height}"
+      colorSpace="{v.fcp_color_space}"
+      frameDuration="{frame_duration}"/>
+    <asset id="r2" start="0s" format="r1">
+      <media-rep kind="original-media" src="{v.file_uri}"/>
+    </asset>
+  </resources>
+  <library>
+    <event name="fcpscene">
+      <project name="{v.name}">
+        <sequence format="r1" tcStart="0s">
+          <spine>
+            <asset-clip ref="r2" offset="0s">'''
+
+  for i, c in enumerate(clips[1:], 1): xml += f'''
+              <marker start="{c.offset}" duration="{frame_duration}" value="Marker {i}"/>'''
+
+  xml += f'''
+            </asset-clip>
+          </spine>
+        </sequence>
+      </project>
+    </event>
+  </library>
+</fcpxml>
+'''
+  return xml
+
+
+STRING_FCPXML = {
+  'clips': string_fcpxml_clips,
+  'compound-clips': string_fcpxml_compound_clips,
+  'markers': string_fcpxml_markers,
+}
+
+
+def measure(fn) -> dict:
+  tracemalloc.start()
+  start = perf_counter()
+  fn()
+  wall = perf_counter() - start
+  _, peak = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+  return {'wall_secs': round(wall, 3), 'peak_mb': round(peak / 1e6, 1)}
+
+
+def main():
+  parser = argparse.ArgumentParser(description='FCPXML writer')
+  parser.add_argument('--cuts', type=int, nargs='+', default=[1000, 100_000, 1_000_000])
+  args = parser.parse_args()
+
+  results = []
+  with tempfile.TemporaryDirectory() as tmp:
+    out = os.path.join(tmp, 'out.fcpxml')
+    for n in args.cuts:
+      v = synthetic_video(n)
+      cuts = [i * 2.0 + 0.5 for i in range(n)]
+      cuts = [0, *cuts, v.duration + 1]
+      for mode in FCPXML_MODES:
+        def to_string():
+          with open(out, 'w', encoding='utf-8') as f:
+            f.write(STRING_FCPXML[mode](cuts, v))
+
+        def streaming():
+          with open(out, 'w', encoding='utf-8') as f:
+            write_fcpxml(f, cuts, v, mode)
+
+        results.append({
+          'cuts': n,
+          'mode': mode,
+          'string': measure(to_string),
+          'streaming': measure(streaming),
+          'file_mb': round(os.path.getsize(out) / 1e6, 1),
+        })
+
+  print(json.dumps({'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+  main()
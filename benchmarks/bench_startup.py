@@ -0,0 +1,87 @@
+"""CLI startup: import time of `fcpscene.app_cli`, measured with `python -X importtime`
+
+It doesn’t need FFmpeg. Each run is a fresh interpreter, and the minimum is
+compared to the budget, since the other runs only add system noise. It exits
+with an error status when over budget.
+
+The budget is in milliseconds of this machine. To compare with another version
+instead (e.g., a checkout of a previous release), pass its directory as
+`--baseline`, which is measured the same way and becomes the budget.
+
+Usage:
+  python3 -m benchmarks.bench_startup [--runs 20] [--budget-ms 75] [--baseline DIR] [--top 10]
+"""
+
+import sys
+import json
+import argparse
+import subprocess
+from statistics import median
+from time import perf_counter
+
+
+MODULE = 'fcpscene.app_cli'
+IMPORT_BUDGET_MS = 75
+"""Cumulative import time of the CLI module, excluding the interpreter startup"""
+
+
+def import_times(module: str, cwd: str | None = None) -> dict[str, int]:
+  """Cumulative microseconds per imported module, in a fresh interpreter
+
+  Args:
+      cwd: Optional. Imports the package of this directory, which comes first in `sys.path`
+  """
+  stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                          capture_output=True, text=True, check=True, cwd=cwd).stderr
+  times = {}
+  for line in stderr.splitlines():
+    if line.startswith('import time:') and '|' in line:
+      _, cumulative, name = line.split('|')
+      if cumulative.strip().isdigit():
+        times[name.strip()] = int(cumulative)
+  return times
+
+
+def version_wall_ms() -> float:
+  """`fcpscene --version`, i.e., interpreter startup, imports, and argument parsing"""
+  start = perf_counter()
+  subprocess.run([sys.executable, '-m', MODULE, '--version'], capture_output=True, check=True)
+  return (perf_counter() - start) * 1000
+
+
+def main():
+  parser = argparse.ArgumentParser(description='CLI startup time')
+  parser.add_argument('--runs', type=int, default=20)
+  parser.add_argument('--budget-ms', type=float, default=IMPORT_BUDGET_MS)
+  parser.add_argument('--baseline', help='directory of another version, whose import time is the budget')
+  parser.add_argument('--top', type=int, default=10, help='slowest modules to list')
+  args = parser.parse_args()
+
+  runs = [import_times(MODULE) for _ in range(args.runs)]
+  totals = [r[MODULE] / 1000 for r in runs]
+  fastest = min(runs, key=lambda r: r[MODULE])
+  slowest_modules = sorted(((t, m) for m, t in fastest.items() if m != MODULE), reverse=True)[:args.top]
+  walls = [version_wall_ms() for _ in range(args.runs)]
+  if args.baseline:
+    args.budget_ms = min(import_times(MODULE, args.baseline)[MODULE] for _ in range(args.runs)) / 1000
+
+  result = {
+    'module': MODULE,
+    'runs': args.runs,
+    'import_ms_min': round(min(totals), 1),
+    'import_ms_median': round(median(totals), 1),
+    'version_wall_ms_min': round(min(walls), 1),
+    'version_wall_ms_median': round(median(walls), 1),
+    'n_modules': len(fastest),
+    'slowest_modules_ms': {m: round(t / 1000, 1) for t, m in slowest_modules},
+    'budget_ms': round(args.budget_ms, 1),
+    'budget_from': args.baseline or 'IMPORT_BUDGET_MS',
+    'within_budget': min(totals) <= args.budget_ms,
+  }
+  print(json.dumps(result, indent=2))
+  if not result['within_budget']:
+    sys.exit(1)
+
+
+if __name__ == '__main__':
+  main()
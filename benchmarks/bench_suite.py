@@ -0,0 +1,203 @@
+"""Speed and accuracy of detection, the writers, and the clip export, on synthetic videos
+
+The videos have known cut times (see `synthetic.py`). Each case runs in its
+own Python process, so its peak RSS (including FFmpeg’s) is isolated from
+the other cases. The JSON output includes the versions, for tracking it
+across releases.
+
+Usage:
+  python3 -m benchmarks.bench_suite [--preset quick|full] [--output results.json]
+  python3 -m benchmarks.bench_suite --videos 1920x1080@24:h264:3600 --proxy-widths 160 320 --sensitivities 85 95
+"""
+
+import os
+import sys
+import json
+import shutil
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+from pathlib import Path
+from time import perf_counter
+
+from fcpscene import __version__, PROXY_WIDTH, DEFAULT_SENSITIVITY, MIN_SCENE_SECS
+from fcpscene.ffmpeg import ffmpeg
+from .synthetic import CODECS, make_video, precision_recall
+
+
+PRESETS = {
+  'quick': {
+    'videos': ['640x360@30:h264:60', '640x360@30:prores:60'],
+    'proxy_widths': [160, PROXY_WIDTH],
+    'sensitivities': [75, DEFAULT_SENSITIVITY, 95],
+  },
+  'full': {
+    'videos': [
+      '640x360@30:h264:60',
+      '1280x720@60:h264:600',
+      '1280x720@30:h264-intra:600',
+      '1920x1080@24:h264:3600',
+      '1920x1080@30:prores:600',
+      '3840x2160@30:h264:120',
+    ],
+    'proxy_widths': [160, PROXY_WIDTH, 640],
+    'sensitivities': [75, DEFAULT_SENSITIVITY, 95],
+  },
+}
+
+SCENE_SECS = 5
+EXPORT_MAX_SECS = 600
+"""Longer videos skip the clip export, which would dominate the run"""
+
+
+def parse_video_spec(spec: str) -> dict:
+  """
+  Example:
+    >>> parse_video_spec('1920x1080@24:h264:3600')
+    {'width': 1920, 'height': 1080, 'fps': 24, 'codec': 'h264', 'seconds': 3600.0}
+  """
+  size_fps, codec, seconds = spec.split(':')
+  size, fps = size_fps.split('@')
+  width, height = size.split('x')
+  if codec not in CODECS:
+    raise ValueError(f'Unknown codec "{codec}". Choices: {", ".join(CODECS)}')
+  return {'width': int(width), 'height': int(height), 'fps': int(fps), 'codec': codec, 'seconds': float(seconds)}
+
+
+def peak_rss_mb() -> float:
+  """Of this process and its largest finished child (e.g., FFmpeg)"""
+  unit = 1 if sys.platform == 'darwin' else 1024  # macOS reports bytes, Linux KiB
+  return round(max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                   resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) * unit / 1e6, 1)
+
+
+def run_case(case: dict) -> dict:
+  """Runs in a fresh process (see `--run-case`)"""
+  from fcpscene.event_bus import EventBus
+  from fcpscene.video_attr import VideoAttr
+  from fcpscene.detect_scene_changes import detect_scene_changes, extract_scene_changes
+
+  v = VideoAttr(case['video'])
+  bus = EventBus()
+  sensitivity = case.get('sensitivity', DEFAULT_SENSITIVITY)
+  proxy_width = case.get('proxy_width', PROXY_WIDTH)
+
+  start = perf_counter()
+  cuts = detect_scene_changes(v, bus, sensitivity, proxy_width, MIN_SCENE_SECS)
+  detect_secs = perf_counter() - start
+  result = {}
+
+  if case['kind'] == 'detect':
+    precision, recall = precision_recall(case['expected'], extract_scene_changes(cuts), tolerance=1 / v.fps)
+    result = {
+      'wall_secs': round(detect_secs, 3),
+      'frames_per_sec': round(v.duration_frames / detect_secs, 1),
+      'precision': round(precision, 3),
+      'recall': round(recall, 3),
+    }
+
+  elif case['kind'] == 'writers':
+    from fcpscene.to_csv_clips import to_csv_clips
+    from fcpscene.fcpxml_writer import FCPXML_MODES, write_fcpxml
+    with tempfile.TemporaryDirectory() as tmp:
+      for mode in FCPXML_MODES:
+        start = perf_counter()
+        with open(os.path.join(tmp, f'{mode}.fcpxml'), 'w', encoding='utf-8') as f:
+          write_fcpxml(f, cuts, v, mode)
+        result[f'fcpxml_{mode}_secs'] = round(perf_counter() - start, 4)
+      start = perf_counter()
+      with open(os.path.join(tmp, 'clips.csv'), 'w', encoding='utf-8') as f:
+        f.write(to_csv_clips(cuts))
+      result['csv_secs'] = round(perf_counter() - start, 4)
+
+  elif case['kind'] == 'export':
+    from fcpscene.to_file_clips import to_file_clips
+    output_dir = v.path.parent / v.path.stem
+    shutil.rmtree(output_dir, ignore_errors=True)
+    start = perf_counter()
+    to_file_clips(cuts, v, bus, jobs=case.get('jobs', 1))
+    wall = perf_counter() - start
+    shutil.rmtree(output_dir, ignore_errors=True)
+    result = {
+      'wall_secs': round(wall, 3),
+      'speed': round(v.duration / wall, 2),  # media seconds per second
+      'n_clips': len(cuts) - 1,
+    }
+
+  return {**result, 'peak_rss_mb': peak_rss_mb()}
+
+
+def run_isolated(case: dict) -> dict:
+  out = subprocess.run([sys.executable, '-m', 'benchmarks.bench_suite', '--run-case', json.dumps(case)],
+                       capture_output=True, text=True, cwd=Path(__file__).resolve().parent.parent)
+  if out.returncode != 0:
+    return {'error': out.stderr.strip().splitlines()[-1] if out.stderr.strip() else f'exit {out.returncode}'}
+  return json.loads(out.stdout)
+
+
+def ffmpeg_version() -> str:
+  try:
+    return subprocess.check_output([ffmpeg, '-version'], text=True).splitlines()[0]
+  except (OSError, subprocess.CalledProcessError):
+    return ''
+
+
+def main():
+  parser = argparse.ArgumentParser(description='Benchmark suite')
+  parser.add_argument('--preset', choices=list(PRESETS), default='quick')
+  parser.add_argument('--videos', nargs='+', help='WIDTHxHEIGHT@FPS:CODEC:SECONDS, overrides the preset')
+  parser.add_argument('--proxy-widths', type=int, nargs='+')
+  parser.add_argument('--sensitivities', type=float, nargs='+')
+  parser.add_argument('--jobs', type=int, default=1, help='of the clip export')
+  parser.add_argument('--export-max-seconds', type=float, default=EXPORT_MAX_SECS)
+  parser.add_argument('--out-dir', default=tempfile.gettempdir() + '/fcpscene-bench')
+  parser.add_argument('--output', help='(default: stdout) JSON file')
+  parser.add_argument('--run-case', help=argparse.SUPPRESS)
+  args = parser.parse_args()
+
+  if args.run_case:
+    print(json.dumps(run_case(json.loads(args.run_case))))
+    return
+
+  preset = PRESETS[args.preset]
+  results = []
+  for spec in args.videos or preset['videos']:
+    video = parse_video_spec(spec)
+    n_scenes = max(1, int(video['seconds'] // SCENE_SECS))
+    sys.stderr.write(f'Generating {spec}…\n')
+    path, expected = make_video(args.out_dir, video['width'], video['height'], video['fps'], SCENE_SECS, n_scenes, video['codec'])
+    base = {'video': str(path), 'expected': expected}
+
+    for proxy_width in args.proxy_widths or preset['proxy_widths']:
+      for sensitivity in args.sensitivities or preset['sensitivities']:
+        sys.stderr.write(f'  detect proxy_width={proxy_width} sensitivity={sensitivity:g}\n')
+        case = {**base, 'kind': 'detect', 'proxy_width': proxy_width, 'sensitivity': sensitivity}
+        results.append({'spec': spec, 'kind': 'detect', 'proxy_width': proxy_width, 'sensitivity': sensitivity, **run_isolated(case)})
+
+    sys.stderr.write('  writers\n')
+    results.append({'spec': spec, 'kind': 'writers', **run_isolated({**base, 'kind': 'writers'})})
+
+    if video['seconds'] <= args.export_max_seconds:
+      sys.stderr.write('  export\n')
+      results.append({'spec': spec, 'kind': 'export', 'jobs': args.jobs, **run_isolated({**base, 'kind': 'export', 'jobs': args.jobs})})
+
+  report = json.dumps({
+    'fcpscene': __version__,
+    'ffmpeg': ffmpeg_version(),
+    'python': platform.python_version(),
+    'platform': platform.platform(),
+    'cpu_count': os.cpu_count(),
+    'preset': None if args.videos else args.preset,
+    'results': results,
+  }, indent=2)
+  if args.output:
+    with open(args.output, 'w', encoding='utf-8') as f:
+      f.write(report + '\n')
+  else:
+    print(report)
+
+
+if __name__ == '__main__':
+  main()
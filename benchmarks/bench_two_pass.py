@@ -0,0 +1,60 @@
+"""One-pass vs two-pass detection speed and accuracy on videos with few cuts
+
+Usage:
+  python3 -m benchmarks.bench_two_pass [--seconds 600] [--scene-seconds 60]
+"""
+
+import json
+import argparse
+import tempfile
+from time import perf_counter
+
+from fcpscene import PROXY_WIDTH, DEFAULT_SENSITIVITY, MIN_SCENE_SECS
+from fcpscene.event_bus import EventBus
+from fcpscene.video_attr import VideoAttr
+from fcpscene.detect_scene_changes import detect_scene_changes, extract_scene_changes, STRATEGIES
+from .synthetic import make_video, precision_recall
+
+
+def main():
+  parser = argparse.ArgumentParser(description='One-pass vs two-pass detection')
+  parser.add_argument('--seconds', type=float, default=600)
+  parser.add_argument('--scene-seconds', type=float, default=60)
+  parser.add_argument('--width', type=int, default=1920)
+  parser.add_argument('--height', type=int, default=1080)
+  parser.add_argument('--fps', type=int, default=30)
+  parser.add_argument('--codec', default='prores')
+  parser.add_argument('--out-dir', default=tempfile.gettempdir() + '/fcpscene-bench')
+  args = parser.parse_args()
+
+  path, expected = make_video(args.out_dir, args.width, args.height, args.fps, args.scene_seconds,
+                              int(args.seconds // args.scene_seconds), args.codec)
+  v = VideoAttr(path)
+
+  results = {}
+  for strategy in STRATEGIES:
+    start = perf_counter()
+    cuts = detect_scene_changes(v, EventBus(), DEFAULT_SENSITIVITY, PROXY_WIDTH, MIN_SCENE_SECS, strategy=strategy)
+    wall = perf_counter() - start
+    found = extract_scene_changes(cuts)
+    precision, recall = precision_recall(expected, found, tolerance=1 / v.fps)
+    results[strategy] = {
+      'wall_secs': round(wall, 3),
+      'frames_per_sec': round(v.duration_frames / wall, 1),
+      'precision': round(precision, 3),
+      'recall': round(recall, 3),
+      'cuts': found,
+    }
+
+  one_pass, two_pass = (results[s]['cuts'] for s in STRATEGIES)
+  print(json.dumps({
+    'video': v.summary,
+    'results': results,
+    'same_cuts_as_one_pass': len(one_pass) == len(two_pass) and all(
+      abs(a - b) < 0.5 / v.fps for a, b in zip(one_pass, two_pass)),
+    'speedup': round(results['one-pass']['wall_secs'] / results['two-pass']['wall_secs'], 2),
+  }, indent=2))
+
+
+if __name__ == '__main__':
+  main()
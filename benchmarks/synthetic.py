@@ -0,0 +1,77 @@
+"""Synthetic videos with known cut times, made with FFmpeg’s lavfi sources"""
+
+import subprocess
+from pathlib import Path
+
+from fcpscene.ffmpeg import ffmpeg
+
+
+SOURCES = [
+  'testsrc2',
+  'smptehdbars',
+  'mandelbrot',
+  'rgbtestsrc',
+  'cellauto',
+  'testsrc',
+  'life',
+  'yuvtestsrc',
+]
+"""Visually distinct, so every switch is a scene change"""
+
+CODECS = {
+  'h264': ['-c:v', 'libx264', '-preset', 'veryfast', '-crf', '23', '-pix_fmt', 'yuv420p'],  # long-GOP
+  'h264-intra': ['-c:v', 'libx264', '-preset', 'veryfast', '-crf', '23', '-pix_fmt', 'yuv420p', '-g', '1'],
+  'prores': ['-c:v', 'prores_ks', '-profile:v', '0', '-pix_fmt', 'yuv422p10le'],
+}
+EXTENSIONS = {'h264': '.mp4', 'h264-intra': '.mp4', 'prores': '.mov'}
+
+
+def make_video(out_dir, width=640, height=360, fps=30, scene_secs=5.0, n_scenes=6, codec='h264') -> tuple[Path, list[float]]:
+  """Concatenates `n_scenes` sources of `scene_secs` each
+
+  Returns:
+      The video path and its cut times (excluding start and end)
+  """
+  out_dir = Path(out_dir)
+  out_dir.mkdir(parents=True, exist_ok=True)
+  path = out_dir / f'{width}x{height}_{fps}fps_{n_scenes}x{scene_secs:g}s_{codec}{EXTENSIONS[codec]}'
+  cuts = [round(i * scene_secs, 6) for i in range(1, n_scenes)]
+  if path.exists():
+    return path, cuts
+
+  if n_scenes > len(SOURCES):  # loops a base video, so hour-long videos don’t need thousands of inputs
+    base, _ = make_video(out_dir, width, height, fps, scene_secs, len(SOURCES), codec)
+    n_loops = -(-n_scenes // len(SOURCES)) - 1
+    inputs = ['-stream_loop', str(n_loops), '-i', base]
+    output_args = ['-t', str(n_scenes * scene_secs)]
+  else:
+    inputs = []
+    for i in range(n_scenes):
+      source = SOURCES[i % len(SOURCES)]
+      inputs += ['-t', str(scene_secs), '-f', 'lavfi', '-i', f'{source}=size={width}x{height}:rate={fps}']
+    labels = ''.join(f'[{i}:v]' for i in range(n_scenes))
+    output_args = ['-filter_complex', f'{labels}concat=n={n_scenes}:v=1:a=0,format=yuv420p[v]', '-map', '[v]']
+
+  cmd = [
+    ffmpeg, '-y', '-hide_banner', '-loglevel', 'error',
+    *inputs,
+    *output_args,
+    *CODECS[codec],
+    path
+  ]
+  subprocess.run(cmd, check=True)
+  return path, cuts
+
+
+def precision_recall(expected: list[float], found: list[float], tolerance: float) -> tuple[float, float]:
+  """A found cut is a true positive when it’s within `tolerance` seconds of an unmatched expected cut"""
+  unmatched = list(expected)
+  true_positives = 0
+  for t in found:
+    match = next((e for e in unmatched if abs(e - t) <= tolerance), None)
+    if match is not None:
+      unmatched.remove(match)
+      true_positives += 1
+  precision = true_positives / len(found) if found else 1.0
+  recall = true_positives / len(expected) if expected else 1.0
+  return precision, recall
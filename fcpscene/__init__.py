@@ -7,3 +7,9 @@ __description__ = 'Generates a Final Cut Pro XML project with scene cuts from a
 PROXY_WIDTH = 320
 DEFAULT_SENSITIVITY = 88
 MIN_SCENE_SECS = 0.6
+
+EXPORT_STRATEGIES = ('auto', 'reencode', 'multi-output', 'smart')
+"""Of the files mode. Here, so the CLI lists them without importing the exporter"""
+
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi', '.m4v', '.3gp', '.3g2', '.mts', '.m2ts', '.mxf')
+"""Final Cut Pro compatible"""
@@ -2,24 +2,25 @@
 
 import sys
 import argparse
-from shutil import which
 from pathlib import Path
 
-from fcpscene import __version__, __repo_url__, __description__, PROXY_WIDTH, DEFAULT_SENSITIVITY, MIN_SCENE_SECS
-from .ffmpeg import ffmpeg, ffprobe
-from .video_attr import VideoAttr
+from fcpscene import __version__, __repo_url__, __description__, PROXY_WIDTH, DEFAULT_SENSITIVITY, MIN_SCENE_SECS, VIDEO_EXTENSIONS, EXPORT_STRATEGIES
+from .utils import format_seconds
 from .event_bus import EventBus
-from .to_csv_clips import to_csv_clips
-from .to_file_clips import to_file_clips
-from .to_fcpxml_clips import to_fcpxml_clips
-from .to_fcpxml_markers import to_fcpxml_markers
-from .to_fcpxml_compound_clips import to_fcpxml_compound_clips
-from .detect_scene_changes import detect_scene_changes, count_scenes, extract_scene_changes
+from .video_attr import VideoAttr
+from .detect_scene_changes import detect_scene_changes, count_scenes, extract_scene_changes, STRATEGIES
+from .detect_engines import ENGINES, DEFAULT_ENGINE, get_engine
+from .profiler import span, profiling
+
+# The rest is imported where it’s used, so each mode only loads what it needs
+# (see benchmarks/bench_startup.py)
 
 
 def main():
-  check_dependency(ffmpeg)
-  check_dependency(ffprobe)
+  if sys.argv[1:2] == ['serve']:  # for a video named "serve", use "./serve"
+    from .app_server import main as serve
+    serve(sys.argv[2:])
+    return
 
   parser = argparse.ArgumentParser(
     description=__description__,
@@ -27,10 +28,10 @@ def main():
     formatter_class=argparse.RawTextHelpFormatter
   )
   parser.add_argument(
-    'video',
-    type=argparse.FileType('r'),
-    nargs='?',
-    help='Path to the input video file'
+    'videos',
+    nargs='*',
+    metavar='video',
+    help='Path to the input video file. For batch processing, pass many\nfiles, directories, or glob patterns (e.g., "footage/*.mov").\nFor streaming, pass "-" (stdin) or a named pipe; each cut is\nprinted as an NDJSON line as soon as it’s found'
   )
   parser.add_argument(
     '-v', '--version',
@@ -84,67 +85,328 @@ def main():
     default=PROXY_WIDTH,
     help=' (default: %(default)s) width of scaled video used for speeding up analysis'
   )
+  parser.add_argument(
+    '--workers',
+    type=int,
+    default=1,
+    help='(default: %(default)s) number of videos processed concurrently in batch mode'
+  )
+  parser.add_argument(
+    '--summary',
+    help='(default: stdout) path of the batch mode JSON summary'
+  )
+  parser.add_argument(
+    '-j', '--jobs',
+    type=int,
+    default=1,
+    help='(default: %(default)s) number of FFmpeg processes analyzing time ranges of the video in parallel.\nIn files mode, also the number of clips exported in parallel, which is\nthe only use of it with the numpy engine, the two-pass strategy, or cached scores'
+  )
+  parser.add_argument(
+    '-e', '--engine',
+    default=DEFAULT_ENGINE,
+    choices=list(ENGINES),
+    help=(
+      '(default: %(default)s)\n'
+      'Options:\n'
+      '    ffmpeg: FFmpeg’s scene score\n'
+      '    numpy: Frame differences computed with NumPy (pip install "fcpscene[numpy]")\n'
+    )
+  )
+  parser.add_argument(
+    '--strategy',
+    default=STRATEGIES[0],
+    choices=STRATEGIES,
+    help=(
+      '(default: %(default)s)\n'
+      'Options:\n'
+      '    one-pass: Analyzes every frame\n'
+      '    two-pass: Finds candidates on a decimated stream, and then\n'
+      '      analyzes every frame only around them. Faster for long videos with few cuts\n'
+    )
+  )
+  parser.add_argument(
+    '--score-cache',
+    action='store_true',
+    help='Cache the scene score of every frame, so later runs with other\nsensitivity or min-scene-seconds values don’t decode the video.\nOnce cached, the scores are used even without this option, instead of\ndetecting with --jobs, the --strategy, or from a --resume checkpoint'
+  )
+  parser.add_argument(
+    '--export-strategy',
+    default='auto',
+    choices=EXPORT_STRATEGIES,
+    help=(
+      '(default: %(default)s) how files mode splits long-GOP videos (e.g., H.264)\n'
+      '    reencode: Re-encodes each clip with its own FFmpeg\n'
+      '    multi-output: Decodes batches of consecutive clips once, and\n'
+      '      encodes each clip from it. Faster for many short clips\n'
+      '    smart: Re-encodes only from each cut to the next keyframe, and\n'
+      '      stream-copies the rest. Much faster, and lossless for most frames\n'
+      '    auto: multi-output for many short clips, reencode otherwise\n'
+    )
+  )
+  parser.add_argument(
+    '--resume',
+    action='store_true',
+    help='Continue an interrupted detection from its last checkpoint, if there’s\none of a run with the same settings. Detects with one job and the one-pass strategy'
+  )
+  parser.add_argument(
+    '--no-checkpoints',
+    dest='checkpoints',
+    action='store_false',
+    help='Don’t save checkpoints. By default, detecting with one job and the one-pass\nstrategy saves them every few seconds, for continuing with --resume'
+  )
+  parser.add_argument(
+    '--stats',
+    action='store_true',
+    help='Print the CPU cores, peak memory, and read throughput of the FFmpeg\nprocesses of the detection and export (Linux). Batch summaries always have them'
+  )
+  parser.add_argument(
+    '--profile',
+    metavar='TRACE_JSON',
+    help='Save a timing trace of the run (probe, detection, parsing, writers,\nand export). Open it in https://ui.perfetto.dev or chrome://tracing'
+  )
   args = parser.parse_args()
 
+  with profiling(args.profile):  # also saved on errors, i.e., on `sys.exit`
+    run(parser, args)
+
+
+def run(parser, args):
+  from .ffmpeg import ffmpeg_path, ffprobe_path
+  check_dependency(ffmpeg_path())
+  check_dependency(ffprobe_path())
+
   if args.gui:
     from .app_gui import GUI
-    GUI.run(args.video.name if args.video else None)
+    GUI.run(args.videos[0] if args.videos else None)
     return
 
-  if args.video is None:
+  if not args.videos:
     parser.error('The "video" is required')
 
   if args.output and not args.output.endswith(('.csv', '.fcpxml')) and args.mode != 'files':
     parser.error('Invalid output format. Only .fcpxml and .csv are supported')
 
-  v = VideoAttr(args.video.name)
+  streaming = len(args.videos) == 1 and is_stream(args.videos[0])
+  check_detection_options(parser, args, streaming)
+  try:
+    get_engine(args.engine)
+  except RuntimeError as e:
+    exit_error(f'{e}')
+  if streaming:
+    run_stream(args.videos[0], args)
+    return
+
+  videos = expand_videos(args.videos)
+  if not videos:
+    exit_error(f'No videos match {", ".join(args.videos)}')
+  if len(videos) != 1 or Path(args.videos[0]).is_dir():
+    if args.output:
+      parser.error('The "--output" option is not supported in batch mode')
+    run_batch(videos, args)
+    return
+
+  if not videos[0].is_file():
+    parser.error(f"can't open '{videos[0]}'")
+
+  v = VideoAttr(videos[0])
   if v.error:
     exit_error(v.error)
 
   bus = EventBus()
   if not args.quiet:
     print(v.summary)
-    bus.subscribe_progress(print_detect_progress)
+    subscribe_progress_printer(bus)
+  if args.stats:
+    bus.subscribe_process_stats(lambda stats: sys.stderr.write(f'\n{stats.summary}\n'))
 
   try:
-    cuts = detect_scene_changes(v, bus, args.sensitivity, args.proxy_width, args.min_scene_seconds)
-    process_cuts(cuts, v, args.mode, args.output, args.quiet, bus)
+    cuts = detect(v, bus, args)
   except Exception as e:
     exit_error(f'Unexpected error while running ffmpeg: {e}')
 
+  try:
+    result = process_cuts(cuts, v, args.mode, args.output, args.quiet, bus, args.jobs, args.export_strategy)
+    print(result if args.mode in ('count', 'list') else f'\n{result}')
+  except Exception as e:
+    exit_error(f'{e}')
+
 
-def process_cuts(cuts, v, mode, out_file, quiet, bus):
-  if mode == 'count':
-    print(len(extract_scene_changes(cuts)))
+def is_stream(source: str) -> bool:
+  return source == '-' or Path(source).is_fifo()
+
+
+def run_stream(source: str, args):
+  """Prints each cut as an NDJSON line, e.g., {"time": 3.2, "score": 0.52}"""
+  import json
+  from .detect_scene_changes_stream import detect_scene_changes_stream
+
+  def on_cut(cut_time, score):
+    print(json.dumps({'time': cut_time, 'score': score}), flush=True)
+
+  try:
+    detect_scene_changes_stream(source, EventBus(), args.sensitivity, args.proxy_width, args.min_scene_seconds, on_cut)
+  except Exception as e:
+    exit_error(f'Unexpected error while running ffmpeg: {e}')
+
+
+def expand_videos(patterns: list[str]) -> list[Path]:
+  """Files, directories (their videos, not recursive), and glob patterns"""
+  from glob import glob
+  videos = []
+  for pattern in patterns:
+    path = Path(pattern)
+    if path.is_dir():
+      videos += sorted(p for p in path.iterdir() if p.suffix.lower() in VIDEO_EXTENSIONS and p.is_file())
+    elif not path.exists() and any(c in pattern for c in '*?['):
+      videos += sorted(Path(p) for p in glob(pattern) if Path(p).is_file())
+    else:
+      videos.append(path)
+  return list(dict.fromkeys(videos))  # unique, in order
+
+
+def run_batch(videos: list[Path], args):
+  """Processes each video with its own output, like a single run would
+
+  A failing video doesn’t abort the batch. It ends with a JSON summary, and exits
+  with an error status if any video failed.
+  """
+  import json
+  from time import perf_counter
+  from concurrent.futures import ThreadPoolExecutor, as_completed
+
+  started = perf_counter()
+
+  def process(video):
+    result = {'video': str(video)}
+    process_stats = {}
+    t0 = perf_counter()
+    try:
+      v = VideoAttr(video)
+      if v.error:
+        raise RuntimeError(v.error)
+      bus = EventBus()
+      bus.subscribe_process_stats(lambda stats: process_stats.__setitem__(stats.stage, stats.to_json()))
+      cuts = detect(v, bus, args)
+      result['duration'] = v.duration
+      result['scenes'] = count_scenes(cuts)
+      result['output'] = process_cuts(cuts, v, args.mode, None, True, bus, args.jobs, args.export_strategy)
+    except Exception as e:
+      result['error'] = f'{e}'
+    result['wall_secs'] = round(perf_counter() - t0, 3)
+    if process_stats:
+      result['ffmpeg'] = process_stats
+    return result
+
+  results = []
+  with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+    futures = {pool.submit(process, video): video for video in videos}
+    for future in as_completed(futures):
+      result = future.result()
+      results.append(result)
+      if not args.quiet:
+        status = f'ERROR {result["error"]}' if 'error' in result else f'{result["scenes"]} Scenes'
+        sys.stderr.write(f'[{len(results)}/{len(videos)}] {result["video"]}  {status}  {format_seconds(result["wall_secs"])}\n')
+
+  results.sort(key=lambda r: videos.index(Path(r['video'])))
+  n_errors = sum('error' in r for r in results)
+  summary = json.dumps({
+    'files': results,
+    'n_files': len(results),
+    'n_errors': n_errors,
+    'wall_secs': round(perf_counter() - started, 3),
+  }, indent=2)
+
+  if args.summary:
+    Path(args.summary).write_text(summary + '\n', encoding='utf-8')
+  else:
+    print(summary)
+  if n_errors:
+    sys.exit(1)
+
+
+def check_detection_options(parser, args, streaming: bool):
+  """Rejects the options that the chosen detection would ignore
+
+  In files mode, `--jobs` is also the number of clips exported in parallel,
+  so there it’s accepted with every detection.
+  """
+  parallel = args.jobs > 1 and args.mode != 'files'
+  two_pass = args.strategy != STRATEGIES[0]
+  if streaming:
+    chosen = 'Streaming'
+    ignored = {'--engine': args.engine != DEFAULT_ENGINE, '--strategy': two_pass, '--jobs': args.jobs > 1,
+               '--resume': args.resume, '--score-cache': args.score_cache}
+  elif args.engine != DEFAULT_ENGINE:
+    chosen = f'--engine {args.engine}'
+    ignored = {'--strategy': two_pass, '--jobs': parallel, '--resume': args.resume, '--score-cache': args.score_cache}
+  elif two_pass:
+    chosen = f'--strategy {args.strategy}'
+    ignored = {'--jobs': parallel, '--resume': args.resume, '--score-cache': args.score_cache}
+  elif args.score_cache:
+    chosen = '--score-cache'
+    ignored = {'--jobs': parallel, '--resume': args.resume}
+  elif args.resume:
+    chosen = '--resume'
+    ignored = {'--jobs': parallel}
+  else:
     return
 
+  conflicts = [option for option, given in ignored.items() if given]
+  if conflicts:
+    parser.error(f'{chosen} can\'t be combined with {", ".join(conflicts)}')
+
+
+def detect(v, bus, args):
+  from .scene_scores import detect_scene_changes_cached, load_scene_scores
+
+  with span('detect', engine=args.engine, strategy=args.strategy, jobs=args.jobs):
+    if args.engine != DEFAULT_ENGINE:
+      return get_engine(args.engine)(v, bus, args.sensitivity, args.proxy_width, args.min_scene_seconds)
+    scene_scores = load_scene_scores(v, args.proxy_width)
+    if args.score_cache or scene_scores is not None:
+      return detect_scene_changes_cached(v, bus, args.sensitivity, args.proxy_width, args.min_scene_seconds,
+                                         scene_scores=scene_scores)
+    if args.resume or (args.checkpoints and args.strategy == 'one-pass' and args.jobs == 1):
+      from .checkpoint import detect_scene_changes_resumable
+      return detect_scene_changes_resumable(v, bus, args.sensitivity, args.proxy_width, args.min_scene_seconds, args.resume)
+    if args.jobs > 1:
+      from .detect_scene_changes_parallel import detect_scene_changes_parallel
+      return detect_scene_changes_parallel(v, bus, args.sensitivity, args.proxy_width, args.min_scene_seconds, args.jobs)
+    return detect_scene_changes(v, bus, args.sensitivity, args.proxy_width, args.min_scene_seconds, strategy=args.strategy)
+
+
+def process_cuts(cuts, v, mode, out_file, quiet, bus, jobs=1, export_strategy='auto') -> str:
+  """Saves or formats the cuts according to the `mode`
+
+  Returns:
+      What to print, i.e., the count, the list, or the URI of the output
+  """
+  if mode == 'count':
+    return str(len(extract_scene_changes(cuts)))
+
   if mode == 'list':
-    print(*extract_scene_changes(cuts))
-    return
+    return ' '.join(map(str, extract_scene_changes(cuts)))
 
   if mode == 'files':
+    from .to_file_clips import to_file_clips
     if not quiet:
       print('\nExporting clip files…')
-      bus.subscribe_export_progress(print_export_progress)
-    out_dir = to_file_clips(cuts, v, bus)
-    print(f'\nfile://{out_dir.resolve()}')
-    return
-
-  if out_file and out_file.endswith('.csv'):
-    txt = to_csv_clips(cuts)
-  elif mode == 'markers':
-    txt = to_fcpxml_markers(cuts, v)
-  elif mode == 'compound-clips':
-    txt = to_fcpxml_compound_clips(cuts, v)
-  else:
-    txt = to_fcpxml_clips(cuts, v)
+      subscribe_export_progress_printer(bus)
+    out_dir = to_file_clips(cuts, v, bus, jobs, strategy=export_strategy)
+    return f'file://{out_dir.resolve()}'
 
   try:
     out_file = Path(out_file or v.path.with_suffix('.fcpxml'))
-    out_file.write_text(txt, encoding='utf-8')
-    print(f'\nfile://{out_file.resolve()}')
+    with span('write', file=out_file.name), open(out_file, 'w', encoding='utf-8') as f:
+      if out_file.suffix == '.csv':
+        from .to_csv_clips import to_csv_clips
+        f.write(to_csv_clips(cuts, v))
+      else:
+        from .fcpxml_writer import write_fcpxml
+        write_fcpxml(f, cuts, v, mode)
+    return f'file://{out_file.resolve()}'
   except Exception as e:
-    exit_error(f'Failed to write to {out_file}: {e}')
+    raise RuntimeError(f'Failed to write to {out_file}: {e}')
 
 
 def validate_percent(value):
@@ -154,14 +416,46 @@ def validate_percent(value):
   return f
 
 
-def print_detect_progress(progress, cuts):
+def subscribe_progress_printer(bus):
+  stats = None
+
+  def on_stats(s):
+    nonlocal stats
+    stats = s
+
+  bus.subscribe_progress_stats(on_stats)
+  bus.subscribe_progress(lambda progress, cuts: print_detect_progress(progress, cuts, stats))
+
+def subscribe_export_progress_printer(bus):
+  clip = (0, 1)
+
+  def on_progress(current, total):
+    nonlocal clip
+    clip = (current, total)
+    print_export_progress(current, total)
+
+  bus.subscribe_export_progress(on_progress)
+  bus.subscribe_export_stats(lambda stats: print_export_progress(*clip, stats))
+
+
+def print_detect_progress(progress, cuts, stats=None):
   bar = progress_bar(progress)
-  print(f'\r{bar} {int(progress * 100)}% ({count_scenes(cuts, progress)} Scenes)  ', end='', flush=True)
+  print(f'\r{bar} {int(progress * 100)}% ({count_scenes(cuts, progress)} Scenes){format_stats(stats)}  ', end='', flush=True)
 
-def print_export_progress(current: int, total: int):
-  progress = current / total
+def print_export_progress(current: int, total: int, stats=None):
+  progress = stats.progress if stats else current / total
   bar = progress_bar(progress)
-  print(f'\r{bar} {int(progress * 100)}%  ', end='', flush=True)
+  print(f'\r{bar} {int(progress * 100)}% ({current}/{total}){format_stats(stats)}  ', end='', flush=True)
+
+def format_stats(stats) -> str:
+  """
+  Example:
+    '  812fps  13.5x  ETA 2m3s'
+  """
+  if not stats or stats.progress >= 1:
+    return ''
+  eta = f'  ETA {format_seconds(stats.eta, 0)}' if stats.eta is not None else ''
+  return f'  {stats.fps:.0f}fps  {stats.speed:.1f}x{eta}'
 
 def progress_bar(progress):
   width = 42  # +1
@@ -174,6 +468,7 @@ def progress_bar(progress):
 
 
 def check_dependency(program: str):
+  from shutil import which
   if not which(program):
     exit_error(f'Missing dependency {program}')
 
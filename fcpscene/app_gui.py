@@ -13,17 +13,16 @@ from pathlib import Path
 from tkinter import filedialog, messagebox, ttk
 from dataclasses import dataclass
 
-from fcpscene import __version__, __repo_url__, __title__, PROXY_WIDTH, DEFAULT_SENSITIVITY, MIN_SCENE_SECS
-from .utils import debounce
-from .ffmpeg import ffmpeg, ffprobe
+from fcpscene import __version__, __repo_url__, __title__, PROXY_WIDTH, DEFAULT_SENSITIVITY, MIN_SCENE_SECS, VIDEO_EXTENSIONS
+from .utils import debounce, format_seconds
+from .ffmpeg import ffmpeg_path, ffprobe_path
 from .event_bus import EventBus
 from .video_attr import VideoAttr
 from .to_csv_clips import to_csv_clips
 from .to_file_clips import to_file_clips
-from .to_fcpxml_clips import to_fcpxml_clips
-from .to_fcpxml_markers import to_fcpxml_markers
-from .to_fcpxml_compound_clips import to_fcpxml_compound_clips
-from .detect_scene_changes import detect_scene_changes, CutTimes, count_scenes
+from .fcpxml_writer import write_fcpxml
+from .scene_scores import detect_scene_changes_cached, load_scene_scores
+from .detect_scene_changes import CutTimes, count_scenes
 
 
 class ExportMode(str, Enum):
@@ -173,6 +172,8 @@ class GUI:
     self.v = VideoAttr('')
     self.bus = EventBus()
     self.cuts = []
+    self.scene_scores = None
+    self.stats = None
     self.running = False
 
     self.setup_menus()
@@ -252,6 +253,7 @@ class GUI:
     int_val = int(float(val))
     self.sensitivity_val.set(int_val)
     self.stop_scene_detect()
+    self.apply_scene_scores()
     self.root.after(0, lambda: self.last_used.save_sensitivity(int_val))
 
 
@@ -272,6 +274,7 @@ class GUI:
       if value < 0:
         self.min_scene_secs.set(str(0))
       self.stop_scene_detect()
+      self.apply_scene_scores()
       self.root.after(0, lambda: self.last_used.save_min_scene_seconds(self.min_scene_secs.get()))
     except ValueError as e:
       self.min_scene_secs.set(self.last_used.min_scene_seconds)
@@ -286,6 +289,7 @@ class GUI:
       self.video_entry.delete(0, tk.END)
       self.video_entry.insert(0, file_path)
       self.v = VideoAttr(file_path)
+      self.scene_scores = None
 
       if self.v.error:
         messagebox.showerror('Error', self.v.error)
@@ -301,7 +305,7 @@ class GUI:
         title='Select Video File',
         initialdir=self.dir,
         filetypes=[
-          ('Final Cut Pro-Compatible Files', '*.mp4 *.mov *.avi *.m4v *.3gp *.3g2 *.mts *.m2ts *.mxf'),
+          ('Final Cut Pro-Compatible Files', ' '.join(f'*{ext}' for ext in VIDEO_EXTENSIONS)),
           ('All files', '*.*')
         ])
       load_video(file_path)
@@ -366,8 +370,8 @@ class GUI:
     if not self.cuts:
       messagebox.showinfo('No cuts found', 'No scene changes were detected')
     else:
-      xml = self.process_fcpxml()
-      self.root.after(0, lambda: save_and_send(xml))
+      write_xml = self.fcpxml_writer()
+      self.root.after(0, lambda: save_and_send(write_xml))
 
 
   def render_export_as_fcp_btn(self):
@@ -380,8 +384,8 @@ class GUI:
     if not self.cuts:
       messagebox.showinfo('No cuts found', 'No scene changes were detected')
     else:
-      xml = self.process_fcpxml()
-      self.root.after(0, lambda: save_fcpxml(xml, self.v.path.with_suffix('.fcpxml').name))
+      write_xml = self.fcpxml_writer()
+      self.root.after(0, lambda: save_fcpxml(write_xml, self.v.path.with_suffix('.fcpxml').name))
 
 
   def render_export_as_csv_btn(self):
@@ -394,7 +398,7 @@ class GUI:
     if not self.cuts:
       messagebox.showinfo('No cuts found', 'No scene changes were detected')
     else:
-      csv = to_csv_clips(self.cuts)
+      csv = to_csv_clips(self.cuts, self.v)
       self.root.after(0, lambda: save_csv(csv, self.v.path.with_suffix('.csv').name))
 
 
@@ -443,10 +447,10 @@ class GUI:
     threading.Thread(target=run, daemon=True).start()
 
 
-  def process_fcpxml(self):
-    if self.mode.get() == ExportMode.MARKERS.value: return to_fcpxml_markers(self.cuts, self.v)
-    if self.mode.get() == ExportMode.COMPOUND_CLIPS.value: return to_fcpxml_compound_clips(self.cuts, self.v)
-    return to_fcpxml_clips(self.cuts, self.v)
+  def fcpxml_writer(self):
+    """Streams the FCPXML of the current cuts and mode to an open file"""
+    cuts, v, mode = self.cuts, self.v, self.mode.get()
+    return lambda f: write_fcpxml(f, cuts, v, mode)
 
   def render_hint_warning(self):
     self.hint_warning = self.Label(style.hint_warning, text='Your Library must have an event called "fcpscene"')
@@ -478,7 +482,17 @@ class GUI:
 
   def set_progress_label(self, progress, n_scenes):
     self.progress.set(progress * 100)
-    self.progress_label.set(f'{int(progress * 100)}% ({n_scenes} Scenes)')
+    self.progress_label.set(f'{int(progress * 100)}% ({n_scenes} Scenes){self.stats_text(progress)}')
+
+  def stats_text(self, progress):
+    stats = self.stats
+    if not stats or progress >= 1:
+      return ''
+    eta = f'  ETA {format_seconds(stats.eta, 0)}' if stats.eta is not None else ''
+    return f'    {stats.speed:.1f}x{eta}'
+
+  def on_progress_stats(self, stats):
+    self.stats = stats
 
   def on_progress(self, progress: float, cuts: CutTimes):
     self.cuts = cuts
@@ -505,9 +519,20 @@ class GUI:
         width=1
       )
 
+  def apply_scene_scores(self):
+    """Re-thresholds the cached scene scores, which is instant compared to decoding again"""
+    if self.running or self.v.error:
+      return
+    if self.scene_scores is None:
+      self.scene_scores = load_scene_scores(self.v, PROXY_WIDTH)
+    if self.scene_scores is not None:
+      self.cuts = self.scene_scores.to_cuts(self.v.duration, float(self.sensitivity_val.get()), float(self.min_scene_secs.get()))
+      self.on_progress(1, self.cuts)
+
   def stop_scene_detect(self):
     self.bus.emit_stop()
     self.bus.unsubscribe_progress()
+    self.bus.unsubscribe_progress_stats()
 
   def run_scene_detect(self):
     video = self.video_entry.get()
@@ -517,9 +542,11 @@ class GUI:
 
     sensitivity = float(self.sensitivity_val.get())
 
+    self.stats = None
     self.set_progress_label(0, 0)
     self.bus.subscribe_progress(
       lambda *args: self.root.after(0, lambda: self.on_progress(*args)))
+    self.bus.subscribe_progress_stats(self.on_progress_stats)
 
     def run():
       try:
@@ -528,8 +555,9 @@ class GUI:
         self.on_progress(0, [])
         self.run_stop_button.config(text='🛑 Stop')
         self.cuts = []
-        self.cuts = detect_scene_changes(v, self.bus, sensitivity, PROXY_WIDTH, float(self.min_scene_secs.get()))
+        self.cuts = detect_scene_changes_cached(v, self.bus, sensitivity, PROXY_WIDTH, float(self.min_scene_secs.get()))
         self.bus.unsubscribe_progress()
+        self.bus.unsubscribe_progress_stats()
       except Exception as e:
         messagebox.showerror('Error', f'{e}')
       finally:
@@ -539,13 +567,13 @@ class GUI:
     threading.Thread(target=run, daemon=True).start()
 
 
-def save_fcpxml(xml, suggested_filename):
+def save_fcpxml(write_xml, suggested_filename):
   file = filedialog.asksaveasfilename(
     defaultextension='.fcpxml',
     initialfile=suggested_filename,
     filetypes=[('Final Cut Pro XML', '*.fcpxml')])
   if file:
-    write(xml, file)
+    write(write_xml, file)
 
 
 def save_csv(csv, suggested_filename):
@@ -554,12 +582,12 @@ def save_csv(csv, suggested_filename):
     initialfile=suggested_filename,
     filetypes=[('CSV', '*.csv')])
   if file:
-    write(csv, file)
+    write(lambda f: f.write(csv), file)
 
 
-def save_and_send(xml):
+def save_and_send(write_xml):
   with tempfile.NamedTemporaryFile(suffix='.fcpxml', dir='/tmp', delete=False) as tmp:
-    write(xml, tmp.name)
+    write(write_xml, tmp.name)
     try:
       subprocess.run([
         'open',
@@ -569,10 +597,14 @@ def save_and_send(xml):
       messagebox.showerror('Open FCP Error', f'Failed to send project to Final Cut:\n{e}')
 
 
-def write(txt, filename):
+def write(write_to, filename):
+  """
+  Args:
+      write_to (callable): Writes the content to the open file it receives
+  """
   try:
     with open(filename, 'w', encoding='utf-8') as f:
-      f.write(txt)
+      write_to(f)
   except PermissionError as e:
     messagebox.showerror('Write Error', f'Permission denied:\n{e}')
   except Exception as e:
@@ -580,7 +612,7 @@ def write(txt, filename):
 
 
 def check_dependencies():
-  if not which(ffmpeg):
+  if not which(ffmpeg_path()):
     messagebox.showerror('Error', 'Dependency "ffmpeg" not found')
-  elif not which(ffprobe):
+  elif not which(ffprobe_path()):
     messagebox.showerror('Error', 'Dependency "ffprobe" not found')
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+
+"""Local HTTP job server, for submitting videos from other programs or machines
+
+Usage:
+    fcpscene serve [--port 8765] [--workers 2]
+
+API (JSON):
+    POST   /jobs              {"video": "/path/to/video.mp4", "mode": "clips", "sensitivity": 88, ...}
+    GET    /jobs              All the jobs
+    GET    /jobs/<id>         Status, and the progress and ETA of its stage (detect or export)
+    GET    /jobs/<id>/result  The FCPXML, CSV (?format=csv), count, or list.
+                              Another FCPXML mode can be requested with ?mode=markers
+    DELETE /jobs/<id>         Cancels it
+
+A job with the same video (path, size, and mtime) and options as a previous
+one returns that job, so finished ones respond immediately.
+"""
+
+import sys
+import json
+import queue
+import argparse
+import threading
+from io import StringIO
+from itertools import count
+from collections import OrderedDict
+from types import SimpleNamespace
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from fcpscene import __version__, PROXY_WIDTH, DEFAULT_SENSITIVITY, MIN_SCENE_SECS
+from .utils import file_cache_key
+from .event_bus import EventBus
+from .video_attr import VideoAttr
+from .fcpxml_writer import FCPXML_MODES, write_fcpxml
+from .to_csv_clips import to_csv_clips
+from .detect_scene_changes import count_scenes, extract_scene_changes
+from .detect_engines import DEFAULT_ENGINE
+from .app_cli import detect, process_cuts, check_dependency
+from .ffmpeg import ffmpeg_path, ffprobe_path
+
+
+DEFAULT_PORT = 8765
+MODES = (*FCPXML_MODES, 'files', 'count', 'list')
+MAX_QUEUED_JOBS = 100
+MAX_CACHED_JOBS = 256
+"""Finished jobs kept for identical requests. The oldest are forgotten first"""
+
+
+class Job:
+  def __init__(self, job_id: str, key: str, video: str, options: dict):
+    self.id = job_id
+    self.key = key
+    self.video = video
+    self.options = options
+    self.status = 'queued'  # running, done, error, cancelled
+    self.stage = None  # detect, and then export in files mode
+    self.progress = 0  # of the stage
+    self.n_scenes = 0
+    self.eta = None
+    self.error = None
+    self.output = None  # files mode
+    self.v = None
+    self.cuts = None
+    self.bus = EventBus()
+
+  def to_json(self) -> dict:
+    return {
+      'id': self.id,
+      'video': self.video,
+      'status': self.status,
+      'stage': self.stage,
+      'progress': round(self.progress, 4),
+      'scenes': self.n_scenes,
+      'eta': self.eta,
+      'error': self.error,
+      'output': self.output,
+      **self.options,
+    }
+
+
+class JobServer:
+  """Queue, worker pool, and result cache, independent of HTTP"""
+
+  def __init__(self, workers: int = 2, max_queued: int = MAX_QUEUED_JOBS, max_cached: int = MAX_CACHED_JOBS):
+    self.lock = threading.Lock()
+    self.jobs = OrderedDict()  # by id, oldest first
+    self.by_key = {}
+    self.max_cached = max_cached
+    self.queue = queue.Queue(maxsize=max_queued)
+    self.ids = count(1)
+    self.threads = [threading.Thread(target=self.work, daemon=True) for _ in range(max(1, workers))]
+    for t in self.threads:
+      t.start()
+
+  def submit(self, video: str, options: dict) -> tuple[Job, bool]:
+    """
+    Returns:
+        The job, and whether it’s new (False for identical requests)
+
+    Raises:
+        OSError: If the video can’t be opened
+        queue.Full: If there are `max_queued` jobs waiting
+    """
+    key = file_cache_key(video, sorted(options.items()))
+    with self.lock:
+      job = self.by_key.get(key)
+      if job and job.status not in ('error', 'cancelled'):
+        self.jobs.move_to_end(job.id)
+        return job, False
+
+      job = Job(str(next(self.ids)), key, video, options)
+      self.queue.put_nowait(job)
+      self.jobs[job.id] = job
+      self.by_key[key] = job
+      self.evict()
+      return job, True
+
+  def cancel(self, job: Job):
+    with self.lock:
+      if job.status == 'queued':
+        job.status = 'cancelled'
+      elif job.status == 'running':
+        job.status = 'cancelled'
+        job.bus.emit_stop()
+        job.bus.emit_export_stop()
+
+  def evict(self):
+    finished = [j for j in self.jobs.values() if j.status not in ('queued', 'running')]
+    for job in finished[:max(0, len(finished) - self.max_cached)]:
+      del self.jobs[job.id]
+      if self.by_key.get(job.key) is job:
+        del self.by_key[job.key]
+
+  def work(self):
+    while True:
+      job = self.queue.get()
+      with self.lock:
+        if job.status == 'cancelled':
+          continue
+        job.status = 'running'
+      try:
+        self.run(job)
+      except Exception as e:
+        job.error = f'{e}'
+        job.status = 'error'
+      with self.lock:
+        self.evict()
+
+  def run(self, job: Job):
+    v = VideoAttr(job.video)
+    if v.error:
+      raise RuntimeError(v.error)
+    job.v = v
+    job.stage = 'detect'
+
+    def on_progress(progress, cuts):
+      job.progress = progress
+      job.n_scenes = count_scenes(cuts, progress)
+
+    def on_stats(stats):
+      job.eta = round(stats.eta, 1) if stats.eta is not None else None
+
+    def on_export_progress(current, total):  # the only updates for stream-copied (segment) exports
+      job.progress = max(job.progress, current / total)
+
+    def on_export_stats(stats):
+      job.progress = max(job.progress, stats.progress)
+      on_stats(stats)
+
+    job.bus.subscribe_progress(on_progress)
+    job.bus.subscribe_progress_stats(on_stats)
+    o = job.options
+    args = SimpleNamespace(  # the CLI defaults
+      sensitivity=o['sensitivity'],
+      proxy_width=o['proxy_width'],
+      min_scene_seconds=o['min_scene_seconds'],
+      engine=DEFAULT_ENGINE,
+      strategy='one-pass',
+      score_cache=False,
+      resume=False,
+      checkpoints=False,  # the jobs can’t be resumed
+      jobs=1)
+    cuts = detect(v, job.bus, args)
+    if job.status == 'cancelled':
+      return
+
+    if o['mode'] == 'files':
+      job.stage = 'export'
+      job.progress = 0
+      job.eta = None
+      job.bus.subscribe_export_progress(on_export_progress)
+      job.bus.subscribe_export_stats(on_export_stats)
+      job.output = process_cuts(cuts, v, 'files', None, True, job.bus)
+    job.cuts = cuts
+    job.progress = 1
+    job.n_scenes = count_scenes(cuts)
+    job.eta = 0
+    with self.lock:
+      if job.status != 'cancelled':
+        job.status = 'done'
+
+  def result(self, job: Job, mode: str, fmt: str) -> tuple[str, str]:
+    """
+    Returns:
+        The content type and body of the result
+    """
+    if mode == 'count':
+      return 'text/plain', f'{len(extract_scene_changes(job.cuts))}\n'
+    if mode == 'list':
+      return 'text/plain', ' '.join(map(str, extract_scene_changes(job.cuts))) + '\n'
+    if mode == 'files':
+      return 'application/json', json.dumps({'output': job.output})
+    if fmt == 'csv':
+      return 'text/csv', to_csv_clips(job.cuts, job.v)
+    f = StringIO()
+    write_fcpxml(f, job.cuts, job.v, mode)
+    return 'application/xml', f.getvalue()
+
+
+def parse_options(body: dict) -> tuple[str, dict]:
+  """
+  Raises:
+      ValueError: On missing or invalid fields
+  """
+  video = body.get('video')
+  if not isinstance(video, str) or not video:
+    raise ValueError('"video" is required')
+  options = {
+    'mode': body.get('mode', 'clips'),
+    'sensitivity': float(body.get('sensitivity', DEFAULT_SENSITIVITY)),
+    'min_scene_seconds': float(body.get('min_scene_seconds', MIN_SCENE_SECS)),
+    'proxy_width': int(body.get('proxy_width', PROXY_WIDTH)),
+  }
+  if options['mode'] not in MODES:
+    raise ValueError(f'Invalid "mode". Choices: {", ".join(MODES)}')
+  if not 0 <= options['sensitivity'] <= 100:
+    raise ValueError('"sensitivity" must be between 0 and 100')
+  return video, options
+
+
+class Handler(BaseHTTPRequestHandler):
+  server_version = f'fcpscene/{__version__}'
+  jobs: JobServer = None
+
+  def do_GET(self):
+    url = urlsplit(self.path)
+    parts = url.path.strip('/').split('/')
+    if parts == ['jobs']:
+      with self.jobs.lock:
+        all_jobs = [job.to_json() for job in self.jobs.jobs.values()]
+      return self.send_json(200, {'jobs': all_jobs})
+
+    job = self.find_job(parts)
+    if not job:
+      return self.send_json(404, {'error': 'Not found'})
+    if len(parts) == 2:
+      return self.send_json(200, job.to_json())
+    if len(parts) == 3 and parts[2] == 'result':
+      if job.status != 'done':
+        return self.send_json(409, {'error': f'The job is {job.status}'})
+      query = parse_qs(url.query)
+      mode = query.get('mode', [job.options['mode']])[0]
+      fmt = query.get('format', ['fcpxml'])[0]
+      if mode not in MODES or fmt not in ('fcpxml', 'csv') or (mode == 'files') != (job.options['mode'] == 'files'):
+        return self.send_json(400, {'error': 'Invalid "mode" or "format"'})
+      return self.send_body(200, *self.jobs.result(job, mode, fmt))
+    return self.send_json(404, {'error': 'Not found'})
+
+  def do_POST(self):
+    if urlsplit(self.path).path.strip('/') != 'jobs':
+      return self.send_json(404, {'error': 'Not found'})
+    try:
+      body = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+      video, options = parse_options(body)
+      job, created = self.jobs.submit(video, options)
+    except (ValueError, TypeError, AttributeError) as e:
+      return self.send_json(400, {'error': f'{e}'})
+    except OSError as e:
+      return self.send_json(400, {'error': f"Can't open video: {e}"})
+    except queue.Full:
+      return self.send_json(503, {'error': 'Too many queued jobs'})
+    self.send_json(202 if created else 200, job.to_json())
+
+  def do_DELETE(self):
+    job = self.find_job(urlsplit(self.path).path.strip('/').split('/'))
+    if not job:
+      return self.send_json(404, {'error': 'Not found'})
+    self.jobs.cancel(job)
+    self.send_json(200, job.to_json())
+
+  def find_job(self, parts: list[str]) -> Job | None:
+    if len(parts) >= 2 and parts[0] == 'jobs':
+      with self.jobs.lock:
+        return self.jobs.jobs.get(parts[1])
+    return None
+
+  def send_json(self, status: int, payload: dict):
+    self.send_body(status, 'application/json', json.dumps(payload))
+
+  def send_body(self, status: int, content_type: str, body: str):
+    data = body.encode('utf-8')
+    self.send_response(status)
+    self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+    self.send_header('Content-Length', str(len(data)))
+    self.end_headers()
+    self.wfile.write(data)
+
+  def log_message(self, format, *args):
+    sys.stderr.write(f'{self.address_string()} {format % args}\n')
+
+
+def make_server(host: str, port: int, workers: int = 2) -> ThreadingHTTPServer:
+  handler = type('BoundHandler', (Handler,), {'jobs': JobServer(workers)})
+  return ThreadingHTTPServer((host, port), handler)
+
+
+def main(argv: list[str] | None = None):
+  parser = argparse.ArgumentParser(prog='fcpscene serve', description='Local HTTP job server')
+  parser.add_argument('--host', default='127.0.0.1', help='(default: %(default)s) use 0.0.0.0 for other machines')
+  parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='(default: %(default)s)')
+  parser.add_argument('--workers', type=int, default=2, help='(default: %(default)s) videos processed concurrently')
+  args = parser.parse_args(argv)
+
+  check_dependency(ffmpeg_path())
+  check_dependency(ffprobe_path())
+  server = make_server(args.host, args.port, args.workers)
+  print(f'Serving on http://{args.host}:{server.server_port}', flush=True)
+  try:
+    server.serve_forever()
+  except KeyboardInterrupt:
+    pass
+  finally:
+    server.server_close()
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,185 @@
+import json
+import math
+from time import monotonic
+from threading import RLock
+from dataclasses import dataclass, field
+
+from .utils import CACHE_DIR, file_cache_key
+from .event_bus import EventBus
+from .detect_scene_changes import CutTimes, detect_scene_changes, filter_min_scene, snap_to_frame
+
+
+CHECKPOINTS_DIR = CACHE_DIR / 'checkpoints'
+CHECKPOINT_PERIOD_SECS = 5
+CHECKPOINT_LAG_SECS = 1
+"""
+The progress events can be ahead of the parsed cuts (they come from different
+pipes), so a checkpoint only vouches for the analysis until this many seconds
+before the reported progress.
+"""
+
+
+@dataclass
+class Checkpoint:
+  """
+  Attributes:
+      pts: Seconds analyzed so far
+      cuts: The ones found until `pts`, starting with 0
+  """
+  pts: float = 0
+  cuts: CutTimes = field(default_factory=lambda: [0])
+
+
+def checkpoint_path(v, sensitivity, proxy_width, min_scene_secs):
+  return CHECKPOINTS_DIR / f'{file_cache_key(v.path, sensitivity, proxy_width, min_scene_secs)}.json'
+
+
+def load_checkpoint(path) -> Checkpoint | None:
+  try:
+    with open(path, encoding='utf-8') as f:
+      data = json.load(f)
+    return Checkpoint(pts=float(data['pts']), cuts=[float(c) for c in data['cuts']])
+  except (OSError, ValueError, KeyError, TypeError):
+    return None
+
+
+def save_checkpoint(path, checkpoint: Checkpoint):
+  try:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    tmp.write_text(json.dumps({'pts': checkpoint.pts, 'cuts': checkpoint.cuts}), encoding='utf-8')
+    tmp.replace(path)
+  except OSError:
+    pass  # Checkpoints are a convenience
+
+
+def remove_checkpoint(path):
+  path.unlink(missing_ok=True)
+
+
+class Checkpointer:
+  """Merges the cuts of a resumed run with the checkpointed ones, and saves checkpoints periodically
+
+  The resumed run has no min-scene-seconds filter, so its candidates are merged
+  with `filter_min_scene`, which continues from the last checkpointed cut. Since
+  re-filtering already filtered cuts keeps them all, the merge is exactly what
+  an uninterrupted run would have found.
+
+  Args:
+      fps: Optional. The checkpoints are rounded down to a frame time, so the
+        resumed run seeks on the frame grid, like an uninterrupted one
+  """
+
+  def __init__(self, path, prior: Checkpoint, duration: float, min_scene_secs: float,
+               period: float = CHECKPOINT_PERIOD_SECS, fps: float | None = None):
+    self.path = path
+    self.prior = prior
+    self.duration = duration
+    self.min_scene_secs = min_scene_secs
+    self.period = period
+    self.fps = fps
+    self.latest = prior
+    self.progress_pts = prior.pts  # not lagged, for `save_final`
+    self._saved_at = monotonic()
+    self._lock = RLock()
+
+  def merge(self, candidates: CutTimes) -> CutTimes:
+    """
+    Args:
+        candidates: Found after `prior.pts`
+    """
+    return filter_min_scene(self.prior.cuts[1:] + candidates, self.min_scene_secs, end_time=self.duration)
+
+  def update(self, progress: float, cuts: CutTimes) -> CutTimes:
+    """
+    Args:
+        progress: 0 to 1, of the whole video
+        cuts: Of the resumed run, i.e., `prior.pts` and the candidates after it
+
+    Returns:
+        The merged cuts
+    """
+    merged = self.merge(cuts[1:])
+    pts = self.to_frame(progress * self.duration - CHECKPOINT_LAG_SECS)
+    with self._lock:
+      self.progress_pts = max(self.progress_pts, self.to_frame(progress * self.duration))
+      if pts > self.latest.pts:
+        self.latest = Checkpoint(pts, [c for c in merged if c <= pts])
+        if monotonic() - self._saved_at >= self.period:
+          self.save()
+    return merged
+
+  def save(self):
+    with self._lock:
+      save_checkpoint(self.path, self.latest)
+      self._saved_at = monotonic()
+
+  def save_final(self, cuts: CutTimes, drained: bool):
+    """Saves the checkpoint of a stopped run from its final cuts, instead of the last periodic one
+
+    Args:
+        cuts: The merged cuts when the run ended
+        drained: Whether all the FFmpeg output was parsed (e.g., after a UI stop),
+          so the cuts are complete until the last progress, with no need to lag it
+    """
+    with self._lock:
+      pts = self.progress_pts if drained else self.latest.pts
+      self.latest = Checkpoint(pts, [c for c in cuts if c <= pts])
+      self.save()
+
+  def to_frame(self, t: float) -> float:
+    """Rounded down to a frame time, when the fps is known"""
+    return round(math.floor(t * self.fps + 1e-6) / self.fps if self.fps else t, 6)
+
+
+def detect_scene_changes_resumable(v, bus: EventBus, sensitivity, proxy_width, min_scene_secs, resume=False) -> CutTimes:
+  """Like `detect_scene_changes`, but saves periodic checkpoints, so an interrupted run can continue
+
+  Args:
+      resume (bool): Continue from the checkpoint of a previous run with the same
+        video and settings, if there’s one. Otherwise, it starts from the beginning.
+  """
+  path = checkpoint_path(v, sensitivity, proxy_width, min_scene_secs)
+  prior = (load_checkpoint(path) if resume else None) or Checkpoint()
+  checkpointer = Checkpointer(path, prior, v.duration, min_scene_secs, fps=v.fps)
+  stopped_from_ui = False
+
+  def on_progress(progress, candidates):
+    if progress < 1:  # the final cuts are merged below
+      bus.emit_progress(progress, checkpointer.update(progress, candidates))
+
+  def on_stop_from_ui():
+    nonlocal stopped_from_ui
+    stopped_from_ui = True
+    run_bus.emit_stop()
+
+  run_bus = EventBus()
+  run_bus.subscribe_progress(on_progress)
+  run_bus.subscribe_progress_stats(bus.emit_progress_stats)
+  run_bus.subscribe_process_sample(bus.emit_process_sample)
+  run_bus.subscribe_process_stats(bus.emit_process_stats)
+  bus.subscribe_stop(on_stop_from_ui)
+  bus.emit_progress(prior.pts / v.duration, prior.cuts)
+  try:
+    candidates = detect_scene_changes(v, run_bus, sensitivity, proxy_width, 0, start_time=prior.pts)
+  finally:
+    bus.unsubscribe_stop()
+
+  interrupted = candidates[-1] != v.duration  # Ctrl+C returns before appending the end
+  if not interrupted:
+    candidates.pop()
+  if prior.pts:  # e.g., a checkpoint saved before they were frame aligned
+    candidates = [snap_to_frame(c, v.fps) for c in candidates]
+  cuts = checkpointer.merge(candidates[1:])
+
+  if interrupted or stopped_from_ui:
+    checkpointer.save_final(cuts, drained=stopped_from_ui and not interrupted)
+  else:
+    remove_checkpoint(path)
+
+  if interrupted:
+    return cuts
+  if (v.duration - cuts[-1]) >= min_scene_secs:
+    cuts.append(v.duration)
+  bus.emit_progress(1, cuts)
+  return cuts
@@ -0,0 +1,82 @@
+import subprocess
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from dataclasses import dataclass
+
+from .utils import file_identity
+from .ffmpeg import ffprobe_path
+from .video_attr import VideoAttr
+
+
+@dataclass
+class KeyframeIndex:
+  """Presentation times of the keyframes of the first video stream
+
+  Attributes:
+      times: Sorted keyframe times in seconds, relative to the first frame
+  """
+  times: list[float]
+
+  def at_or_before(self, t: float) -> float:
+    """Where FFmpeg starts decoding when seeking to `t`"""
+    i = bisect_right(self.times, t + 1e-6)
+    return self.times[i - 1] if i else 0
+
+  def after(self, t: float) -> float | None:
+    """First keyframe strictly after `t`"""
+    i = bisect_left(self.times, t + 1e-6)
+    return self.times[i] if i < len(self.times) else None
+
+
+def keyframe_index(v: VideoAttr) -> KeyframeIndex:
+  """Builds (once per file version) the keyframe index with a single packet scan"""
+  return _keyframe_index(*file_identity(v.path))
+
+
+@lru_cache(maxsize=32)
+def _keyframe_index(path: str, _size: int, _mtime_ns: int) -> KeyframeIndex:
+  """The size and mtime are part of the cache key, so edited files are re-scanned"""
+  cmd = [
+    ffprobe_path(),
+    '-v', 'error',
+    '-select_streams', 'v:0',
+    '-show_entries', 'packet=pts_time,flags',
+    '-of', 'csv=p=0',
+    path
+  ]
+  out = subprocess.check_output(cmd, stderr=subprocess.DEVNULL).decode('utf-8', 'ignore')
+
+  times = []
+  first_pts = None
+  for line in out.splitlines():
+    pts_time, _, flags = line.partition(',')
+    try:
+      t = float(pts_time)
+    except ValueError:  # N/A
+      continue
+    first_pts = t if first_pts is None else min(first_pts, t)
+    if 'K' in flags:
+      times.append(t)
+
+  # FFmpeg subtracts the container start time, and so do we for matching the detection times
+  first_pts = first_pts or 0
+  times = sorted(round(t - first_pts, 6) for t in times)
+  return KeyframeIndex(times=times)
+
+
+def plan_chunks(v: VideoAttr, target_secs: float) -> list[tuple[float, float]]:
+  """Splits the video into (start, end) chunks of about `target_secs` starting on keyframes
+
+  Seeking with `-ss` to a keyframe means FFmpeg doesn’t decode frames only to discard
+  them, and on long-GOP videos (H.264, HEVC) that can be several seconds per chunk.
+  """
+  index = keyframe_index(v)
+  bounds = [0]
+  t = target_secs
+  while t < v.duration:
+    kf = index.at_or_before(t)
+    if kf > bounds[-1]:
+      bounds.append(kf)
+    t = max(t, kf) + target_secs
+  bounds.append(v.duration)
+  return list(zip(bounds, bounds[1:]))
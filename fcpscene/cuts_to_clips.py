@@ -1,5 +1,8 @@
+from array import array
+from typing import Iterator
 from dataclasses import dataclass
 
+from .profiler import span
 from .video_attr import VideoAttr
 from .detect_scene_changes import CutTimes, count_scenes
 
@@ -35,7 +38,12 @@ class FileClip:
 
 
 def cuts_to_fcp_clips(cuts: CutTimes, v: VideoAttr) -> list[FcpClip]:
-  """
+  return list(ClipTable(cuts, v))
+
+
+class ClipTable:
+  """Final Cut Pro clips as integer arrays, formatted as `FcpClip` only when iterated
+
   Background:
     The clip’s [left and right] edges — `offset` and `offset+duration` — are in
     **timeline time**. In contrast, `start` is **video time**. For our purposes,
@@ -45,23 +53,69 @@ def cuts_to_fcp_clips(cuts: CutTimes, v: VideoAttr) -> list[FcpClip]:
     rounding rule is: `floor` when decimals are close to zero, `ceil` otherwise.
 
     FCP uses incremental reference IDs. `r1` and `r2` are reserved in our templates.
+
+  Attributes:
+      frames: Frame index of each cut, i.e., the clip edges
+      offsets: Clip offsets in ticks of `1/timescale` seconds
+      durations: Clip durations in ticks
+      timescale: The `fps_numerator`, so a frame is `fps_denominator` ticks
   """
   first_available_ref_id = 3  # constant
-  seq_digits = len(str(count_scenes(cuts)))
 
-  cut_frames = [int(s * v.fps + 0.9999) for s in cuts]  # ceil with threshold
+  def __init__(self, cuts: CutTimes, v: VideoAttr):
+    with span('clip table', cuts=len(cuts)):
+      self.timescale = v.fps_numerator
+      self.frames = array('q', cut_frames(cuts, v.fps_numerator, v.fps_denominator))
+      frame_ticks = v.fps_denominator
+      self.offsets = array('q', [f * frame_ticks for f in self.frames[:-1]])
+      self.durations = array('q', [(b - a) * frame_ticks for a, b in zip(self.frames, self.frames[1:])])
+      self.seq_digits = len(str(count_scenes(cuts)))
+
+  def __len__(self):
+    return len(self.offsets)
+
+  def __getitem__(self, i) -> FcpClip:
+    return FcpClip(
+      seq=f'{i + 1:0{self.seq_digits}}',
+      ref_id=f'r{i + self.first_available_ref_id}',
+      offset=self.offset(i),
+      duration=self.duration(i),
+    )
+
+  def offset(self, i) -> str:
+    return to_fcp_time(self.offsets[i], self.timescale)
+
+  def duration(self, i) -> str:
+    return to_fcp_time(self.durations[i], self.timescale)
+
+  def __iter__(self) -> Iterator[FcpClip]:
+    return map(self.__getitem__, range(len(self)))
 
-  clips = []
-  for i, frame in enumerate(cut_frames[:-1]):
-    offset_ticks = frame * v.fps_denominator
-    duration_ticks = (cut_frames[i + 1] - frame) * v.fps_denominator
-    clips.append(FcpClip(
-      seq=f'{i + 1:0{seq_digits}}',
-      ref_id=f'r{i + first_available_ref_id}',
-      offset=to_fcp_time(offset_ticks, v.fps_numerator),
-      duration=to_fcp_time(duration_ticks, v.fps_numerator),
-    ))
-  return clips
+
+def cut_frames(cuts: CutTimes, fps_numerator: int, fps_denominator: int) -> list[int]:
+  """Frame index of each cut, with the `ceil` with threshold rounding rule
+
+  Cut times have microsecond precision, so it’s computed exactly in integers
+  instead of as `int(s * v.fps + 0.9999)`, whose float error depends on the frame.
+
+  Example:
+    >>> cut_frames([0, 1.001, 1.017684, 2.002], 30000, 1001)
+    [0, 30, 31, 60]
+  """
+  den = fps_denominator * 10 ** 10  # μs to seconds, and 0.9999 to integer
+  threshold = 9999 * fps_denominator * 10 ** 6 - 1  # exactly 0.0001 past a frame rounds down
+  num = fps_numerator * 10 ** 4
+  return [(round(s * 1_000_000) * num + threshold) // den for s in cuts]
+
+
+def frame_times(frames: list[int], fps_numerator: int, fps_denominator: int) -> CutTimes:
+  """Inverse of `cut_frames`, in seconds with microsecond precision
+
+  Example:
+    >>> frame_times([0, 30, 31], 30000, 1001)
+    [0.0, 1.001, 1.034367]
+  """
+  return [round(f * fps_denominator / fps_numerator, 6) for f in frames]
 
 
 def to_fcp_time(num, den):
@@ -70,14 +124,27 @@ def to_fcp_time(num, den):
   return f'{int(num / den)}s'
 
 
-
-def cuts_to_file_clips(cuts: CutTimes) -> list[FileClip]:
-  seq_digits = len(str(count_scenes(cuts)))
-  clips = []
-  for i, (start, end) in enumerate(zip(cuts, cuts[1:])):
-    clips.append(FileClip(
-      seq=f'{i + 1:0{seq_digits}}',
-      start=start,
-      end=end
-    ))
-  return clips
+def cuts_to_file_clips(cuts: CutTimes, v: VideoAttr | None = None) -> list[FileClip]:
+  """
+  Args:
+      v: Optional. Rounds the times to the frames of `cut_frames`, so the
+        files have the same clip edges as the FCPXML
+
+  Example:
+    >>> from types import SimpleNamespace
+    >>> v = SimpleNamespace(fps_numerator=30000, fps_denominator=1001)
+    >>> cuts_to_file_clips([0, 1.0005, 2.002], v)[0]
+    FileClip(seq='1', start=0.0, end=1.001)
+  """
+  with span('file clips', cuts=len(cuts)):
+    if v:
+      cuts = frame_times(cut_frames(cuts, v.fps_numerator, v.fps_denominator), v.fps_numerator, v.fps_denominator)
+    seq_digits = len(str(count_scenes(cuts)))
+    clips = []
+    for i, (start, end) in enumerate(zip(cuts, cuts[1:])):
+      clips.append(FileClip(
+        seq=f'{i + 1:0{seq_digits}}',
+        start=start,
+        end=end
+      ))
+    return clips
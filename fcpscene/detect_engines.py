@@ -0,0 +1,39 @@
+from collections.abc import Callable
+
+from .event_bus import EventBus
+from .video_attr import VideoAttr
+from .detect_scene_changes import CutTimes, detect_scene_changes
+from .detect_scene_changes_numpy import detect_scene_changes_numpy
+
+
+DetectEngine = Callable[[VideoAttr, EventBus, float, int, float], CutTimes]
+"""(v, bus, sensitivity, proxy_width, min_scene_secs) -> CutTimes"""
+
+ENGINES: dict[str, DetectEngine] = {
+  'ffmpeg': detect_scene_changes,
+  'numpy': detect_scene_changes_numpy,
+}
+DEFAULT_ENGINE = 'ffmpeg'
+
+OPTIONAL_DEPENDENCIES = {
+  'numpy': 'numpy',
+}
+"""Modules the engines import when they run, installed with the extra of the same name"""
+
+
+def get_engine(name: str = DEFAULT_ENGINE) -> DetectEngine:
+  """
+  Raises:
+      ValueError: If the engine doesn’t exist
+      RuntimeError: If its optional dependency isn’t installed, with how to install it
+  """
+  try:
+    engine = ENGINES[name]
+  except KeyError:
+    raise ValueError(f'Unknown detection engine "{name}". Options: {", ".join(ENGINES)}')
+
+  from importlib.util import find_spec
+  module = OPTIONAL_DEPENDENCIES.get(name)
+  if module and find_spec(module) is None:
+    raise RuntimeError(f'The {name} engine requires {module}. Install it with: pip install "fcpscene[{name}]"')
+  return engine
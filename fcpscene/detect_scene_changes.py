@@ -1,14 +1,23 @@
-import re
 from signal import SIGINT
+from collections.abc import Iterator
 from subprocess import Popen, PIPE
 
-from .ffmpeg import ffmpeg
+from .ffmpeg import ffmpeg_path
+from .profiler import span
 from .event_bus import EventBus
+from .process_stats import ProcessMonitor
+from .ffmpeg_output import METADATA_TO_STDOUT, StderrTail, ProgressPipe, read_scene_scores
 
 
 CutTimes = list[float]
 """[Start + [SceneChanges] + End] in seconds"""
 
+SEAM_PREROLL_FRAMES = 3
+"""
+The `scene` score of a frame is computed from the two frames before it, so
+when starting mid-video we seek a few frames earlier and discard those cuts.
+"""
+
 
 def count_scenes(cuts: CutTimes, progress: float = 1) -> int:
   if progress < 1:
@@ -21,83 +30,179 @@ def extract_scene_changes(cuts: CutTimes, progress: float = 1) -> list[float]:
   return cuts[1:-1]
 
 
-def detect_scene_changes(v, bus, sensitivity, proxy_width, min_scene_secs, start_time=0) -> CutTimes | None:
+STRATEGIES = ('one-pass', 'two-pass')
+
+
+def detect_scene_changes(v, bus, sensitivity, proxy_width, min_scene_secs, start_time=0, strategy='one-pass') -> CutTimes | None:
   """Finds the timestamps of scene changes using FFmpeg
 
+  It collects the cuts of `iter_scene_changes`, and adds the start and end.
+
   Video filter chain:
     - `scale`: For speed. Downscales video to `proxy_width` in aspect ratio
     - `select`: if scene-change-probability > threshold
-    - `metadata`: Writes the selected frame timestamp to stderr
+    - `metadata`: Writes the selected frame timestamp to stdout (see `METADATA_TO_STDOUT`)
 
   Args:
       v (VideoAttr):
-      bus (EventBus): For listening to a UI stop signal and reporting progress
+      bus (EventBus): For listening to a UI stop signal, and reporting progress, `ProgressStats`,
+        and the FFmpeg resource usage (`ProcessSample` and `ProcessStats`)
       sensitivity (float): 0 to 100; inversely mapped to the scene-change threshold
       proxy_width (int): Width in pixels for downscaling video
       min_scene_secs (float): Ignore scene changes shorter than this duration
-      start_time (float):
+      start_time (float): Seconds where the analysis begins
+      strategy (str): `one-pass`, or `two-pass` for a coarse pass followed by a
+        full-rate pass around the candidates (see `detect_scene_changes_two_pass`)
   """
+  if strategy == 'two-pass' and not start_time:
+    from .detect_scene_changes_two_pass import detect_scene_changes_two_pass
+    return detect_scene_changes_two_pass(v, bus, sensitivity, proxy_width, min_scene_secs)
+
+  seek_time = preroll_seek_time(v, start_time)
+  cuts = [start_time]
+
+  def on_stats(stats):
+    bus.emit_progress_stats(stats)
+    if stats.progress < 1:
+      bus.emit_progress(min((seek_time + stats.out_time) / v.duration, 0.999), cuts)
+
+  with ProcessMonitor(bus, 'detect') as monitor:
+    try:
+      for cut_time, _ in iter_scene_changes(v, sensitivity, proxy_width, min_scene_secs, start_time, bus, on_stats, monitor):
+        cuts.append(cut_time)
+        bus.emit_progress(cut_time / v.duration, cuts)
+    except KeyboardInterrupt:  # Ctrl+C terminates analysis, and we create a file with the progress so far
+      return cuts
+
+  if (v.duration - cuts[-1]) >= min_scene_secs:
+    cuts.append(v.duration)
+  bus.emit_progress(1, cuts)
+  return cuts
+
+
+def iter_scene_changes(v, sensitivity, proxy_width, min_scene_secs, start_time=0,
+                       bus=None, on_stats=None, monitor=None) -> Iterator[tuple[float, float]]:
+  """Yields the (time, score) of each scene change, as soon as FFmpeg reports it
 
-  cut_time_regex = re.compile(r'Parsed_metadata.*pts_time:(\d+\.?\d*)')
+  Only the last cut time is kept, so the memory is constant regardless of the
+  number of cuts. Closing the generator (e.g., breaking out of a `for` loop)
+  terminates FFmpeg.
 
+  Args:
+      bus (EventBus): Optional. A UI stop signal ends the iteration
+      on_stats (callable): Optional. Called with the `ProgressStats` of the
+        analyzed range (i.e., relative to `preroll_seek_time`), on a thread
+      monitor (ProcessMonitor): Optional. Samples the FFmpeg process
+
+  Raises:
+      RuntimeError: If FFmpeg fails, unless it was stopped
+
+  Example:
+      for cut_time, score in iter_scene_changes(VideoAttr('my-video.mp4'), 88, 320, 0.6):
+        if cut_time > 60:
+          break
+  """
+  cmd, seek_time = scene_detect_cmd(v, sensitivity, proxy_width, start_time)
+  progress = ProgressPipe(v.duration - seek_time, on_stats or (lambda stats: None))
+  stopped_from_ui = False
+  last_cut = start_time
+
+  with span('detect subprocess', start_time=start_time, proxy_width=proxy_width):
+    with progress, Popen(progress.wrap(cmd), stdout=PIPE, stderr=PIPE, pass_fds=progress.pass_fds) as process:
+      def on_stop_from_ui():
+        if process.poll() is None:
+          nonlocal stopped_from_ui
+          stopped_from_ui = True
+          process.send_signal(SIGINT)
+
+      if bus:
+        bus.subscribe_stop(on_stop_from_ui)
+      if monitor:
+        monitor.add(process)
+      progress.start()
+      stderr_tail = StderrTail(process.stderr)
+      try:
+        for cut_time, score in read_scene_scores(process.stdout, seek_time):  # while stdout is open
+          # Partially corrupted videos can trigger cuts outside the duration
+          if cut_time > start_time and (cut_time - last_cut) >= min_scene_secs and cut_time < v.duration:
+            last_cut = cut_time
+            yield cut_time, score
+
+        if monitor:
+          monitor.last_sample(process)
+        process.wait()
+        if not stopped_from_ui and process.returncode != 0:
+          stderr_tail.join()
+          raise RuntimeError(str(stderr_tail))
+
+      finally:  # also on `close()`, and on exceptions such as KeyboardInterrupt
+        if process.poll() is None:
+          process.terminate()
+          process.wait()
+        stderr_tail.join()
+        progress.join()
+        if monitor:
+          monitor.remove(process)
+        if bus:
+          bus.unsubscribe_stop()
+
+
+def preroll_seek_time(v, start_time: float) -> float:
+  """`SEAM_PREROLL_FRAMES` before `start_time`, or 0 when starting at the beginning"""
+  return round(max(0, start_time - SEAM_PREROLL_FRAMES / v.fps) if start_time else 0, 6)
+
+
+def snap_to_frame(t: float, fps: float) -> float:
+  """The nearest frame time, e.g., for a `pts_time` relative to a seek between frames
+
+  Example:
+    >>> snap_to_frame(10.000003, 60)
+    10.0
+    >>> snap_to_frame(1.001003, 30000 / 1001)
+    1.001
+  """
+  return round(round(t * fps) / fps, 6)
+
+
+def scene_detect_cmd(v, sensitivity, proxy_width, start_time=0, end_time=None, seek_time=None) -> tuple[list, float]:
+  """FFmpeg command for printing the scene changes between `start_time` and `end_time`
+
+  Args:
+      seek_time (float): Defaults to `SEAM_PREROLL_FRAMES` before `start_time`
+
+  Returns:
+      The command and its seek time, which is what the printed `pts_time` values are relative to.
+  """
+  seek_time = preroll_seek_time(v, start_time) if seek_time is None else round(seek_time, 6)
   cmd = [
-    ffmpeg,
+    ffmpeg_path(),
     '-hide_banner',
+    '-nostats',
     '-an',  # Don’t process audio
-    '-ss', str(start_time),
+    '-ss', str(seek_time),
+  ]
+  if end_time is not None:
+    cmd += ['-t', str(round(end_time - seek_time + 1 / v.fps, 6))]  # +1 frame, the caller trims it
+  cmd += [
     '-i', v.path,
     '-vf', ','.join([
       f'scale={proxy_width}:-1',
       f"select='gt(scene, {1 - sensitivity / 100})'",
-      'metadata=print'
+      METADATA_TO_STDOUT
     ]),
     '-f', 'null', '-',  # Don’t generate an output video
   ]
+  return cmd, seek_time
 
-  cuts = [start_time]
-  stderr_buffer = []
-  stopped_from_ui = False
-
-  try:
-    with Popen(cmd, stdout=PIPE, stderr=PIPE, text=True) as process:
-      def on_stop_from_ui():
-        if process and process.poll() is None:
-          nonlocal stopped_from_ui
-          stopped_from_ui = True
-          process.send_signal(SIGINT)
-
-      bus.subscribe_stop(on_stop_from_ui)
-
-      for line in process.stderr:  # while stderr is open
-        stderr_buffer.append(line)
-        match = cut_time_regex.search(line)
-        if match:
-          try:
-            cut_time = float(match.group(1))
-            # Partially corrupted videos can trigger cuts outside the duration
-            if (cut_time - cuts[-1]) >= min_scene_secs and cut_time < v.duration:
-              cuts.append(cut_time)
-              bus.emit_progress(cut_time / v.duration, cuts)
-          except ValueError:
-            pass
-
-      process.wait()
-      if (v.duration - cuts[-1]) >= min_scene_secs:
-        cuts.append(v.duration)
-      bus.emit_progress(1, cuts)
-
-      if not stopped_from_ui and process.returncode != 0:
-        raise RuntimeError(''.join(stderr_buffer))
 
-      return cuts
-
-  except KeyboardInterrupt:  # Ctrl+C terminates analysis, and we create a file with the progress so far
-    if process:
-      process.terminate()
-    return cuts
-
-  except Exception:
-    raise
+def filter_min_scene(candidates, min_scene_secs, start_time=0, end_time=float('inf')) -> CutTimes:
+  """Drops scene changes closer than `min_scene_secs` to the previously kept one
 
-  finally:
-    bus.unsubscribe_stop()
+  It’s the same rule `detect_scene_changes` applies while parsing, so merging the
+  unfiltered candidates of several time ranges yields the same cuts as a single pass.
+  """
+  cuts = [start_time]
+  for cut_time in sorted(candidates):
+    if cut_time > cuts[-1] and cut_time - cuts[-1] >= min_scene_secs and cut_time < end_time:
+      cuts.append(cut_time)
+  return cuts
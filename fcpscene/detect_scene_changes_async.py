@@ -0,0 +1,92 @@
+import asyncio
+from contextlib import nullcontext
+from collections.abc import AsyncIterator
+
+from .event_bus import EventBus
+from .ffmpeg_output_async import AsyncProgressPipe, AsyncStderrTail, read_scene_scores_async, stop_process
+from .detect_scene_changes import CutTimes, scene_detect_cmd, preroll_seek_time
+
+
+async def detect_scene_changes_async(v, bus: EventBus, sensitivity, proxy_width, min_scene_secs, start_time=0,
+                                     limit: asyncio.Semaphore | None = None) -> CutTimes:
+  """Like `detect_scene_changes` (one-pass), but as a coroutine, for running many in one event loop
+
+  The cuts are the same as the ones of `detect_scene_changes`. Instead of
+  `subscribe_stop`, cancelling the task stops FFmpeg (see `stop_process`).
+
+  Args:
+      bus (EventBus): For reporting progress and `ProgressStats`
+      limit: Optional. Held while FFmpeg runs, e.g., `asyncio.Semaphore(4)`
+        shared by all the detections, so at most 4 run concurrently
+
+  Example:
+      limit = asyncio.Semaphore(4)
+      all_cuts = await asyncio.gather(*(
+        detect_scene_changes_async(v, EventBus(), 88, 320, 0.6, limit=limit) for v in videos))
+  """
+  seek_time = preroll_seek_time(v, start_time)
+  cuts = [start_time]
+
+  def on_stats(stats):
+    bus.emit_progress_stats(stats)
+    if stats.progress < 1:
+      bus.emit_progress(min((seek_time + stats.out_time) / v.duration, 0.999), cuts)
+
+  async with limit or nullcontext():
+    async for cut_time, _ in iter_scene_changes_async(v, sensitivity, proxy_width, min_scene_secs, start_time, on_stats):
+      cuts.append(cut_time)
+      bus.emit_progress(cut_time / v.duration, cuts)
+
+  if (v.duration - cuts[-1]) >= min_scene_secs:
+    cuts.append(v.duration)
+  bus.emit_progress(1, cuts)
+  return cuts
+
+
+async def iter_scene_changes_async(v, sensitivity, proxy_width, min_scene_secs, start_time=0,
+                                   on_stats=None) -> AsyncIterator[tuple[float, float]]:
+  """Like `iter_scene_changes`, but an async generator
+
+  Stdout, stderr, and the progress pipe are read by the event loop, so it
+  doesn’t start threads. FFmpeg is stopped when the generator is closed, or
+  its task cancelled. For closing it when breaking out of the loop, wrap it
+  in `contextlib.aclosing`.
+
+  Args:
+      on_stats (callable): Optional. Called with the `ProgressStats` of the analyzed range
+
+  Raises:
+      RuntimeError: If FFmpeg fails
+
+  Example:
+      async with aclosing(iter_scene_changes_async(v, 88, 320, 0.6)) as scenes:
+        async for cut_time, score in scenes:
+          ...
+  """
+  cmd, seek_time = scene_detect_cmd(v, sensitivity, proxy_width, start_time)
+  progress = AsyncProgressPipe(v.duration - seek_time, on_stats or (lambda stats: None))
+  last_cut = start_time
+
+  with progress:
+    process = await asyncio.create_subprocess_exec(*map(str, progress.wrap(cmd)),
+                                                   stdout=asyncio.subprocess.PIPE,
+                                                   stderr=asyncio.subprocess.PIPE,
+                                                   pass_fds=progress.pass_fds)
+    progress.start()
+  stderr_tail = AsyncStderrTail(process.stderr)
+  try:
+    async for cut_time, score in read_scene_scores_async(process.stdout, seek_time):
+      # Partially corrupted videos can trigger cuts outside the duration
+      if cut_time > start_time and (cut_time - last_cut) >= min_scene_secs and cut_time < v.duration:
+        last_cut = cut_time
+        yield cut_time, score
+
+    await process.wait()
+    await stderr_tail.wait()
+    if process.returncode != 0:
+      raise RuntimeError(str(stderr_tail))
+
+  finally:  # also on `aclose()` and cancellation
+    await asyncio.gather(stop_process(process), process.stdout.read())  # draining, so it doesn’t block on a full pipe
+    await stderr_tail.wait()
+    await progress.wait()
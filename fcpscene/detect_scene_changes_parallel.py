@@ -0,0 +1,194 @@
+import os
+from time import monotonic
+from signal import SIGINT
+from threading import RLock
+from subprocess import Popen, PIPE
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+
+from .event_bus import EventBus
+from .process_stats import ProcessMonitor
+from .chunk_planner import plan_chunks
+from .ffmpeg_output import StderrTail, ProgressPipe, ProgressStats, read_scene_scores
+from .detect_scene_changes import CutTimes, SEAM_PREROLL_FRAMES, scene_detect_cmd, filter_min_scene, snap_to_frame
+
+
+MIN_RANGE_SECS = 10
+"""Shorter ranges are not worth the FFmpeg startup and seeking"""
+
+
+def detect_scene_changes_parallel(v, bus: EventBus, sensitivity, proxy_width, min_scene_secs, jobs=None) -> CutTimes:
+  """Like `detect_scene_changes`, but runs one FFmpeg per time range in a worker pool
+
+  Each range is analyzed without the `min_scene_secs` filter, and we apply it once
+  on the merged candidates, so the rule holds across range boundaries. For the
+  seams, see `SEAM_PREROLL_FRAMES` and `plan_time_ranges`.
+
+  Args:
+      jobs (int): Number of concurrent FFmpeg processes (default: CPU count)
+  """
+  jobs = max(1, jobs or os.cpu_count() or 1)
+  ranges, seeks = plan_time_ranges(v, jobs)
+
+  candidates = [[] for _ in ranges]
+  done = [False] * len(ranges)
+  processed_secs = [0.0] * len(ranges)
+  range_fps = [0.0] * len(ranges)
+  started_at = monotonic()
+  processes = set()
+  futures = []
+  lock = RLock()
+  stopped_from_ui = False
+
+  def on_stop_from_ui():
+    """Also on a range failure, so the other ranges stop right away"""
+    nonlocal stopped_from_ui
+    with lock:
+      stopped_from_ui = True
+      for future in futures:
+        future.cancel()  # the ones not started
+      for p in processes:
+        if p.poll() is None:
+          p.send_signal(SIGINT)
+
+  def contiguous_cuts():
+    """Merged cuts of the ranges analyzed so far without gaps"""
+    found = []
+    end = 0
+    for i, (start, range_end) in enumerate(ranges):
+      found += candidates[i]
+      end = range_end if done[i] else (candidates[i][-1] if candidates[i] else start)
+      if not done[i]:
+        break
+    return filter_min_scene(found, min_scene_secs, end_time=v.duration), end
+
+  def emit_progress():
+    cuts, _ = contiguous_cuts()
+    bus.emit_progress(min(sum(processed_secs) / v.duration, 0.999), cuts)
+
+  def on_stats(i, stats):
+    """Aggregates the stats of the running FFmpeg processes"""
+    with lock:
+      processed_secs[i] = min(stats.out_time, ranges[i][1] - ranges[i][0])
+      range_fps[i] = 0 if stats.progress == 1 else stats.fps
+      processed = sum(processed_secs)
+      speed = processed / (monotonic() - started_at)
+      bus.emit_progress_stats(ProgressStats(
+        progress=processed / v.duration,
+        out_time=processed,
+        fps=sum(range_fps),
+        speed=speed,
+        eta=(v.duration - processed) / speed if speed else None,
+      ))
+      emit_progress()
+
+  def scan(i):
+    start, end = ranges[i]
+    if stopped_from_ui:
+      return
+    cmd, seek_time = scene_detect_cmd(v, sensitivity, proxy_width, start, end, seeks[i])
+    progress = ProgressPipe(end - seek_time, lambda stats: on_stats(i, stats))
+    with progress, Popen(progress.wrap(cmd), stdout=PIPE, stderr=PIPE, pass_fds=progress.pass_fds) as process:
+      with lock:
+        processes.add(process)
+        if stopped_from_ui:  # stopped while spawning it
+          process.send_signal(SIGINT)
+      monitor.add(process)
+      try:
+        progress.start()
+        stderr_tail = StderrTail(process.stderr)
+        for cut_time, _ in read_scene_scores(process.stdout, seek_time):
+          cut_time = snap_to_frame(cut_time, v.fps)  # the keyframe seeks aren’t on the microsecond grid
+          if start <= cut_time < end:
+            with lock:
+              candidates[i].append(cut_time)
+              emit_progress()
+        monitor.last_sample(process)
+        process.wait()
+        stderr_tail.join()
+        progress.join()
+      finally:
+        monitor.remove(process)
+        with lock:
+          processes.discard(process)
+
+    if not stopped_from_ui and process.returncode != 0:
+      raise RuntimeError(str(stderr_tail))
+    with lock:
+      done[i] = not stopped_from_ui
+      if done[i]:
+        processed_secs[i] = end - start
+      emit_progress()
+
+  monitor = ProcessMonitor(bus, 'detect')
+  monitor.start()
+  bus.subscribe_stop(on_stop_from_ui)
+  pool = ThreadPoolExecutor(max_workers=jobs)
+  try:
+    with lock:
+      futures += [pool.submit(scan, i) for i in range(len(ranges))]
+    finished, _ = wait(futures, return_when=FIRST_EXCEPTION)  # cancelled ones count as finished
+    for future in finished:
+      if not future.cancelled() and future.exception():
+        raise future.exception()
+    pool.shutdown()
+
+    cuts, end = contiguous_cuts()
+    if (v.duration - cuts[-1]) >= min_scene_secs:
+      cuts.append(v.duration)
+    bus.emit_progress(1, cuts)
+    return cuts
+
+  except KeyboardInterrupt:  # Same as the serial one, we keep the cuts found so far
+    on_stop_from_ui()
+    pool.shutdown()
+    return contiguous_cuts()[0]
+
+  except Exception:
+    on_stop_from_ui()  # cancels the other ranges, instead of waiting for them
+    raise
+
+  finally:
+    pool.shutdown(cancel_futures=True)
+    bus.unsubscribe_stop()
+    monitor.stop()
+
+
+def plan_time_ranges(v, jobs) -> tuple[list[tuple[float, float]], list[float | None]]:
+  """Ranges where each FFmpeg reports cuts, and where it seeks to
+
+  The range bounds are half a frame off the frame times, so each
+  frame belongs to exactly one range regardless of rounding.
+
+  Long-GOP videos are split on keyframes, and each FFmpeg seeks right onto its
+  keyframe, so its first `SEAM_PREROLL_FRAMES` are reported by the previous range,
+  which decodes a bit past its end. Otherwise, FFmpeg seeks a few frames earlier.
+
+  Returns:
+      The (start, end) ranges and their seek times (None for the default preroll seek)
+  """
+  n = min(jobs, max(1, int(v.duration // MIN_RANGE_SECS)))
+  frame = 1 / v.fps
+
+  if n > 1 and not v.intraframe_coded:
+    try:
+      chunks = plan_chunks(v, v.duration / n)
+      bounds = [0] + [round(start + (SEAM_PREROLL_FRAMES - 0.5) * frame, 6) for start, _ in chunks[1:]] + [v.duration]
+      return list(zip(bounds, bounds[1:])), [start for start, _ in chunks]
+    except Exception:  # e.g. unreadable packets, we fall back to the default seek
+      pass
+
+  ranges = split_time_ranges(v.duration, n)
+  bounds = [0] + [round(start - 0.5 * frame, 6) for start, _ in ranges[1:]] + [v.duration]
+  return list(zip(bounds, bounds[1:])), [None for _ in ranges]
+
+
+def split_time_ranges(duration: float, n: int) -> list[tuple[float, float]]:
+  """Splits [0, duration] into `n` contiguous (start, end) ranges of equal length
+
+  Example:
+    >>> split_time_ranges(30, 3)
+    [(0, 10.0), (10.0, 20.0), (20.0, 30)]
+  """
+  n = max(1, n)
+  bounds = [0] + [round(duration * i / n, 6) for i in range(1, n)] + [duration]
+  return list(zip(bounds, bounds[1:]))
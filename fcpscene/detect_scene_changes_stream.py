@@ -0,0 +1,71 @@
+from signal import SIGINT
+from subprocess import Popen, PIPE
+
+from .ffmpeg import ffmpeg_path
+from .event_bus import EventBus
+from .ffmpeg_output import METADATA_TO_STDOUT, StderrTail, ProgressPipe, read_scene_scores
+from .detect_scene_changes import CutTimes
+
+
+def detect_scene_changes_stream(source, bus: EventBus, sensitivity, proxy_width, min_scene_secs, on_cut) -> CutTimes:
+  """Scene detection of a video of unknown duration, such as a live capture
+
+  Unlike `detect_scene_changes`, it doesn’t need a `VideoAttr`, because the
+  input can’t be probed beforehand. Therefore, the progress is only reported
+  with `ProgressStats`, and the cuts don’t end with the duration.
+
+  Args:
+      source (str): `-` for stdin, a named pipe, or any FFmpeg input
+      on_cut (callable): Called with the time and score of each cut, as soon as it’s found
+
+  Returns:
+      The cuts, starting with 0
+  """
+  cmd = [
+    ffmpeg_path(),
+    '-hide_banner',
+    '-nostats',
+    '-an',
+    '-i', 'pipe:0' if source == '-' else str(source),
+    '-vf', ','.join([
+      f'scale={proxy_width}:-1',
+      f"select='gt(scene, {1 - sensitivity / 100})'",
+      METADATA_TO_STDOUT
+    ]),
+    '-f', 'null', '-',
+  ]
+  cuts = [0]
+  stopped_from_ui = False
+  progress = ProgressPipe(0, bus.emit_progress_stats)
+
+  try:
+    with progress, Popen(progress.wrap(cmd), stdout=PIPE, stderr=PIPE, pass_fds=progress.pass_fds) as process:  # inherits stdin
+      def on_stop_from_ui():
+        if process.poll() is None:
+          nonlocal stopped_from_ui
+          stopped_from_ui = True
+          process.send_signal(SIGINT)
+
+      bus.subscribe_stop(on_stop_from_ui)
+      progress.start()
+      stderr_tail = StderrTail(process.stderr)
+
+      for cut_time, score in read_scene_scores(process.stdout):
+        if cut_time > cuts[-1] and (cut_time - cuts[-1]) >= min_scene_secs:
+          cuts.append(cut_time)
+          on_cut(cut_time, score)
+
+      process.wait()
+      stderr_tail.join()
+      progress.join()
+      if not stopped_from_ui and process.returncode != 0:
+        raise RuntimeError(str(stderr_tail))
+      return cuts
+
+  except KeyboardInterrupt:
+    if process:
+      process.terminate()
+    return cuts
+
+  finally:
+    bus.unsubscribe_stop()
@@ -0,0 +1,135 @@
+from signal import SIGINT
+from subprocess import Popen, PIPE
+
+from .ffmpeg import ffmpeg_path
+from .event_bus import EventBus
+from .process_stats import ProcessMonitor
+from .ffmpeg_output import METADATA_TO_STDOUT, StderrTail, ProgressPipe, read_scene_scores
+from .detect_scene_changes import CutTimes, scene_detect_cmd, filter_min_scene
+
+
+COARSE_FPS = 4
+COARSE_WIDTH = 96
+COARSE_THRESHOLD_FACTOR = 0.5
+"""The coarse pass is more sensitive, since missing a candidate means missing a cut"""
+WINDOW_MARGIN_SECS = 0.5
+
+
+def detect_scene_changes_two_pass(v, bus: EventBus, sensitivity, proxy_width, min_scene_secs,
+                                  coarse_fps=COARSE_FPS, coarse_width=COARSE_WIDTH) -> CutTimes:
+  """Coarse-to-fine scene detection, for long videos with few cuts
+
+  1. Analyzes a decimated stream (`coarse_fps` frames per second, `coarse_width`
+     wide), where a cut shows up as a change between two consecutive samples.
+  2. Re-analyzes at full frame rate and `proxy_width` only a short window around
+     each candidate, so the cut times are as accurate as a single pass.
+
+  The decoding still happens for every frame, but scaling and scoring, which
+  dominate on fast decoders (e.g., hardware or intraframe), only happen for
+  the samples and the windows.
+
+  When stopped from the UI, the candidates of the windows not analyzed yet
+  are kept as cuts, which are up to one coarse sample late.
+  """
+  stopped_from_ui = False
+  process = None
+  cuts = [0]
+
+  def on_stop_from_ui():
+    nonlocal stopped_from_ui
+    stopped_from_ui = True
+    if process and process.poll() is None:
+      process.send_signal(SIGINT)
+
+  def run(cmd, seek_time, total_secs, on_stats=None):
+    nonlocal process
+    progress = ProgressPipe(total_secs, on_stats or (lambda _: None))
+    with progress, Popen(progress.wrap(cmd), stdout=PIPE, stderr=PIPE, pass_fds=progress.pass_fds) as process:
+      monitor.add(process)
+      progress.start()
+      stderr_tail = StderrTail(process.stderr)
+      found = [t for t, _ in read_scene_scores(process.stdout, seek_time)]
+      monitor.last_sample(process)
+      process.wait()
+      monitor.remove(process)
+      stderr_tail.join()
+      progress.join()
+    if not stopped_from_ui and process.returncode != 0:
+      raise RuntimeError(str(stderr_tail))
+    return found
+
+  def on_coarse_stats(stats):
+    bus.emit_progress_stats(stats)
+    bus.emit_progress(min(stats.progress, 0.999) / 2, cuts)
+
+  bus.subscribe_stop(on_stop_from_ui)
+  monitor = ProcessMonitor(bus, 'detect')
+  monitor.start()
+  try:
+    coarse_cmd = [
+      ffmpeg_path(),
+      '-hide_banner',
+      '-nostats',
+      '-an',
+      '-i', v.path,
+      '-vf', ','.join([
+        f'fps={coarse_fps}',
+        f'scale={coarse_width}:-1',
+        f"select='gt(scene, {(1 - sensitivity / 100) * COARSE_THRESHOLD_FACTOR})'",
+        METADATA_TO_STDOUT
+      ]),
+      '-f', 'null', '-',
+    ]
+    coarse = run(coarse_cmd, 0, v.duration, on_coarse_stats)
+    windows = candidate_windows(coarse, 1 / coarse_fps, v.duration)
+
+    candidates = []
+    n_refined = 0
+    for start, end in windows:
+      if stopped_from_ui:
+        break
+      cmd, seek_time = scene_detect_cmd(v, sensitivity, proxy_width, start, end)
+      found = [t for t in run(cmd, seek_time, end - seek_time) if start <= t < end]
+      if stopped_from_ui:  # only part of the window was analyzed
+        break
+      candidates += found
+      n_refined += 1
+      cuts = filter_min_scene(candidates, min_scene_secs, end_time=v.duration)
+      bus.emit_progress(min(0.5 + 0.5 * n_refined / len(windows), 0.999), cuts)
+
+    if n_refined < len(windows):  # stopped, so the rest keep their coarse times
+      candidates += [t for t in coarse if t >= windows[n_refined][0]]
+    cuts = filter_min_scene(candidates, min_scene_secs, end_time=v.duration)
+    if (v.duration - cuts[-1]) >= min_scene_secs:
+      cuts.append(v.duration)
+    bus.emit_progress(1, cuts)
+    return cuts
+
+  except KeyboardInterrupt:
+    if process:
+      process.terminate()
+    return cuts
+
+  finally:
+    monitor.stop()
+    bus.unsubscribe_stop()
+
+
+def candidate_windows(candidates: list[float], sample_secs: float, duration: float) -> list[tuple[float, float]]:
+  """Merged (start, end) windows where the full-rate pass looks for the exact cut
+
+  A coarse sample at `t` with a high score means the cut is between the previous sample and `t`.
+
+  Example:
+    >>> candidate_windows([5.25, 5.5, 20], 0.25, 30)
+    [(4.5, 6.0), (19.25, 20.5)]
+  """
+  windows = []
+  for t in sorted(candidates):
+    start = max(0, t - sample_secs - WINDOW_MARGIN_SECS)
+    end = min(duration, t + WINDOW_MARGIN_SECS)
+    if windows and start <= windows[-1][1]:
+      windows[-1] = (windows[-1][0], end)
+    else:
+      windows.append((start, end))
+  return windows
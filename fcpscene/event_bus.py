@@ -24,6 +24,17 @@ class EventBus:
     self._unsubscribe_all('DETECT.progress')
 
 
+  def emit_progress_stats(self, *args):
+    """See `ProgressStats`"""
+    self._emit('DETECT.stats', *args)
+
+  def subscribe_progress_stats(self, callback):
+    self._subscribe('DETECT.stats', callback)
+
+  def unsubscribe_progress_stats(self):
+    self._unsubscribe_all('DETECT.stats')
+
+
   def emit_stop(self):
     self._emit('DETECT.stop')
 
@@ -44,6 +55,17 @@ class EventBus:
     self._unsubscribe_all('EXPORT.progress')
 
 
+  def emit_export_stats(self, *args):
+    """See `ProgressStats`"""
+    self._emit('EXPORT.stats', *args)
+
+  def subscribe_export_stats(self, callback):
+    self._subscribe('EXPORT.stats', callback)
+
+  def unsubscribe_export_stats(self):
+    self._unsubscribe_all('EXPORT.stats')
+
+
   def emit_export_stop(self):
     self._emit('EXPORT.stop')
 
@@ -52,3 +74,25 @@ class EventBus:
 
   def unsubscribe_export_stop(self):
     self._unsubscribe_all('EXPORT.stop')
+
+
+  def emit_process_sample(self, *args):
+    """See `ProcessSample`"""
+    self._emit('PROCESS.sample', *args)
+
+  def subscribe_process_sample(self, callback):
+    self._subscribe('PROCESS.sample', callback)
+
+  def unsubscribe_process_sample(self):
+    self._unsubscribe_all('PROCESS.sample')
+
+
+  def emit_process_stats(self, *args):
+    """See `ProcessStats`"""
+    self._emit('PROCESS.stats', *args)
+
+  def subscribe_process_stats(self, callback):
+    self._subscribe('PROCESS.stats', callback)
+
+  def unsubscribe_process_stats(self):
+    self._unsubscribe_all('PROCESS.stats')
@@ -0,0 +1,128 @@
+import json
+import hashlib
+from pathlib import Path
+
+from .utils import file_identity
+from .cuts_to_clips import FileClip
+
+
+MANIFEST_NAME = '.fcpscene-manifest.json'
+CHECKSUM_BYTES = 64 * 1024
+
+
+class ExportManifest:
+  """Record of the clip files an export produced, so a rerun only exports missing or stale clips
+
+  An entry matches a clip when its time range and export settings are the
+  same, and its file still has the recorded size and quick checksum. The
+  settings include the identity of the source (see `source_settings`).
+
+  Usage:
+      manifest = ExportManifest.load(output_dir)
+      pending = manifest.reuse(clips, names, settings)  # the rest are up to date
+      ...
+      manifest.record(clip, name, settings)  # after each successful export
+  """
+
+  def __init__(self, output_dir: Path, entries: dict | None = None):
+    self.output_dir = output_dir
+    self.entries = entries or {}  # by file name
+
+  @classmethod
+  def load(cls, output_dir: Path) -> 'ExportManifest':
+    try:
+      entries = json.loads((output_dir / MANIFEST_NAME).read_text(encoding='utf-8'))['clips']
+    except (OSError, ValueError, KeyError, TypeError):
+      entries = {}
+    return cls(output_dir, entries)
+
+  def save(self):
+    path = self.output_dir / MANIFEST_NAME
+    try:
+      tmp = path.with_suffix('.tmp')
+      tmp.write_text(json.dumps({'clips': self.entries}, indent=1), encoding='utf-8')
+      tmp.replace(path)
+    except OSError:
+      pass
+
+  def record(self, clip: FileClip, name: str, settings: list):
+    path = self.output_dir / name
+    self.entries[name] = {
+      'seq': clip.seq,
+      'start': clip.start,
+      'end': clip.end,
+      'settings': settings,
+      'size': path.stat().st_size,
+      'checksum': quick_checksum(path),
+    }
+
+  def is_current(self, name: str, clip: FileClip, settings: list) -> bool:
+    entry = self.entries.get(name)
+    return bool(entry) and self._matches(entry, clip, settings) and self._file_matches(name, entry)
+
+  def reuse(self, clips: list[FileClip], names: list[str], settings: list) -> list[int]:
+    """Keeps the up-to-date files, renaming the ones whose sequence number changed
+
+    For example, adding a cut shifts the sequence numbers of the clips after
+    it, but their files are still valid.
+
+    Returns:
+        The indices of the clips that need to be exported
+    """
+    by_range = {}
+    for name, entry in self.entries.items():
+      if entry.get('settings') == settings:
+        by_range[(entry.get('start'), entry.get('end'))] = name
+
+    pending = []
+    renames = []  # (from, to)
+    for i, (clip, name) in enumerate(zip(clips, names)):
+      if self.is_current(name, clip, settings):
+        continue
+      source = by_range.get((clip.start, clip.end))
+      if source and source != name and self._file_matches(source, self.entries[source]):
+        renames.append((source, name))
+      else:
+        pending.append(i)
+
+    # In two phases, since a target name can be the source of another rename
+    staged = []
+    for n, (source, name) in enumerate(renames):
+      tmp = f'.reuse-{n}-{name}'
+      (self.output_dir / source).replace(self.output_dir / tmp)
+      staged.append((tmp, name, self.entries.pop(source)))
+    for tmp, name, entry in staged:
+      (self.output_dir / tmp).replace(self.output_dir / name)
+      self.entries[name] = entry | {'seq': clips[names.index(name)].seq}
+
+    for i in pending:
+      self.entries.pop(names[i], None)
+    return pending
+
+  def _matches(self, entry: dict, clip: FileClip, settings: list) -> bool:
+    return entry.get('start') == clip.start and entry.get('end') == clip.end and entry.get('settings') == settings
+
+  def _file_matches(self, name: str, entry: dict) -> bool:
+    path = self.output_dir / name
+    try:
+      return path.stat().st_size == entry.get('size') and quick_checksum(path) == entry.get('checksum')
+    except OSError:
+      return False
+
+
+def source_settings(source: Path, settings: list) -> list:
+  """The export settings plus the path, size, and mtime of the source, so replacing
+  or re-rendering it invalidates every entry, even with the same cut times"""
+  return settings + ['source', *file_identity(source)]
+
+
+def quick_checksum(path: Path) -> str:
+  """SHA-1 of the first and last `CHECKSUM_BYTES`, which catches truncated or replaced files"""
+  h = hashlib.sha1()
+  with open(path, 'rb') as f:
+    h.update(f.read(CHECKSUM_BYTES))
+    f.seek(0, 2)
+    size = f.tell()
+    f.seek(max(CHECKSUM_BYTES, size - CHECKSUM_BYTES))
+    h.update(f.read(CHECKSUM_BYTES))
+  return h.hexdigest()
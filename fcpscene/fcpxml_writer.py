@@ -0,0 +1,114 @@
+from time import perf_counter_ns
+from typing import Iterator, TextIO
+
+from .profiler import span
+from .video_attr import VideoAttr
+from .cuts_to_clips import ClipTable
+from .detect_scene_changes import CutTimes
+
+
+FCPXML_MODES = ('clips', 'compound-clips', 'markers')
+
+BATCH_SIZE = 1000
+"""Elements per yielded chunk, so writing millions of them doesn’t make millions of writes"""
+
+
+def write_fcpxml(file: TextIO, cuts: CutTimes, v: VideoAttr, mode='clips'):
+  """Writes the FCPXML to an open text file, without building the whole document in memory"""
+  with span('fcpxml', mode=mode, cuts=len(cuts)) as s:
+    chunks = iter_fcpxml(cuts, v, mode)
+    if not s:
+      file.writelines(chunks)
+      return
+
+    while True:  # profiling, formatting and writing separately
+      t0 = perf_counter_ns()
+      chunk = next(chunks, None)
+      t1 = perf_counter_ns()
+      s.add('format_ms', t1 - t0)
+      if chunk is None:
+        break
+      file.write(chunk)
+      s.add('write_ms', perf_counter_ns() - t1)
+
+
+def iter_fcpxml(cuts: CutTimes, v: VideoAttr, mode='clips') -> Iterator[str]:
+  """Yields the FCPXML document in chunks
+
+  All modes share the template: a header with the format and the asset,
+  optional extra resources, and a project whose spine has the mode’s elements.
+
+  Args:
+      mode (str): One of `FCPXML_MODES`
+  """
+  if mode not in FCPXML_MODES:
+    raise ValueError(f'Unknown FCPXML mode "{mode}". Choices: {", ".join(FCPXML_MODES)}')
+
+  clips = ClipTable(cuts, v)
+  frame_duration = f'{v.fps_denominator}/{v.fps_numerator}s'
+  yield f'''<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE fcpxml>
+<fcpxml version="1.13">
+  <resources>
+    <format id="r1"
+      width="{v.width}"
+      height="{v.height}"
+      colorSpace="{v.fcp_color_space}"
+      frameDuration="{frame_duration}"/>
+    <asset id="r2" start="0s" format="r1">
+      <media-rep kind="original-media" src="{v.file_uri}"/>
+    </asset>'''
+
+  if mode == 'compound-clips':
+    yield from batched(f'''
+    <media id="{c.ref_id}" name="{v.name}_{c.seq}">
+      <sequence format="r1" tcStart="0s">
+        <spine>
+          <asset-clip ref="r2" offset="0s" start="{c.offset}" duration="{c.duration}"/>
+        </spine>
+      </sequence>
+    </media>''' for c in clips)
+
+  yield f'''
+  </resources>
+  <library>
+    <event name="fcpscene">
+      <project name="{v.name}">
+        <sequence format="r1" tcStart="0s">
+          <spine>'''
+
+  if mode == 'compound-clips':
+    yield from batched(f'''
+            <ref-clip ref="{c.ref_id}" offset="{c.offset}" duration="{c.duration}"/>''' for c in clips)
+
+  elif mode == 'markers':
+    yield '''
+            <asset-clip ref="r2" offset="0s">'''
+    yield from batched(f'''
+              <marker start="{clips.offset(i)}" duration="{frame_duration}" value="Marker {i}"/>''' for i in range(1, len(clips)))  # the first clip starts at 0
+    yield '''
+            </asset-clip>'''
+
+  else:
+    yield from batched(f'''
+            <asset-clip ref="r2" offset="{c.offset}" start="{c.offset}" duration="{c.duration}"/>''' for c in clips)
+
+  yield '''
+          </spine>
+        </sequence>
+      </project>
+    </event>
+  </library>
+</fcpxml>
+'''
+
+
+def batched(elements: Iterator[str], size=BATCH_SIZE) -> Iterator[str]:
+  batch = []
+  for element in elements:
+    batch.append(element)
+    if len(batch) == size:
+      yield ''.join(batch)
+      batch = []
+  if batch:
+    yield ''.join(batch)
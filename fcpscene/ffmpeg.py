@@ -1,4 +1,33 @@
-import shutil
+FALLBACK_PATHS = {
+  'ffmpeg': '/opt/homebrew/bin/ffmpeg',
+  'ffprobe': '/opt/homebrew/bin/ffprobe',
+}
 
-ffmpeg = shutil.which('ffmpeg') or '/opt/homebrew/bin/ffmpeg'
-ffprobe = shutil.which('ffprobe') or '/opt/homebrew/bin/ffprobe'
+_paths = {}
+
+
+def ffmpeg_path() -> str:
+  return find_executable('ffmpeg')
+
+
+def ffprobe_path() -> str:
+  return find_executable('ffprobe')
+
+
+def find_executable(name: str) -> str:
+  """Looks up `ffmpeg` or `ffprobe` on first use, instead of on import
+
+  The commands call it when they’re built, so importing a module that runs
+  FFmpeg doesn’t search the PATH.
+  """
+  if name not in _paths:
+    import shutil
+    _paths[name] = shutil.which(name) or FALLBACK_PATHS[name]
+  return _paths[name]
+
+
+def __getattr__(name: str) -> str:
+  """`ffmpeg` and `ffprobe` attributes, for code that imports them by name"""
+  if name not in FALLBACK_PATHS:
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+  return find_executable(name)
@@ -0,0 +1,222 @@
+import os
+from time import monotonic, perf_counter_ns
+from threading import Thread
+from collections import deque
+from dataclasses import dataclass
+
+from .profiler import span
+
+
+CHUNK_SIZE = 64 * 1024
+
+SCENE_SCORE_KEY = 'lavfi.scene_score'
+
+METADATA_TO_STDOUT = f'metadata=print:key={SCENE_SCORE_KEY}:file=-:direct=1'
+"""
+Filter that writes the timestamp and scene score of each frame reaching it to
+stdout, instead of mixing them with the FFmpeg logs in stderr.
+
+  frame:7    pts:7       pts_time:0.116667
+  lavfi.scene_score=0.523000
+"""
+
+
+class MetadataParser:
+  """Incremental parser of the `metadata=print` output, fed with binary chunks"""
+
+  def __init__(self):
+    self._partial_line = b''
+    self._pts_time = None
+
+  def feed(self, chunk: bytes) -> list[tuple[float, str, str]]:
+    """
+    Returns:
+        (pts_time, key, value) of the complete lines in the chunk
+    """
+    lines = (self._partial_line + chunk).split(b'\n')
+    self._partial_line = lines.pop()
+    entries = []
+    for line in lines:
+      if line.startswith(b'frame:'):
+        self._pts_time = parse_pts_time(line)
+      elif self._pts_time is not None:
+        key, sep, value = line.partition(b'=')
+        if sep:
+          entries.append((self._pts_time, key.decode('utf-8', 'replace'), value.strip().decode('utf-8', 'replace')))
+    return entries
+
+
+def parse_pts_time(line: bytes) -> float | None:
+  """
+  Example:
+    >>> parse_pts_time(b'frame:7    pts:7       pts_time:0.116667')
+    0.116667
+  """
+  _, _, value = line.partition(b'pts_time:')
+  try:
+    return float(value.split()[0])
+  except (ValueError, IndexError):
+    return None
+
+
+def read_scene_scores(stream, seek_time: float = 0):
+  """Yields the (time, score) of each frame in a `METADATA_TO_STDOUT` stream
+
+  Args:
+      stream: Binary, e.g., the stdout of a `Popen`
+      seek_time: Added to the `pts_time`, which is relative to the input seek
+  """
+  parser = MetadataParser()
+  with span('parse loop') as s:
+    while chunk := stream.read1(CHUNK_SIZE):
+      t0 = perf_counter_ns() if s else 0
+      entries = parser.feed(chunk)
+      if s:
+        s.add('parse_ms', perf_counter_ns() - t0)
+      for pts_time, key, value in entries:
+        if key == SCENE_SCORE_KEY:
+          try:
+            yield round(seek_time + pts_time, 6), float(value)
+          except ValueError:
+            pass
+
+
+class StderrTail:
+  """Drains a stderr pipe on a thread, keeping only its last lines for error messages
+
+  Draining is needed so FFmpeg doesn’t block on a full pipe, and the ring
+  buffer keeps the memory bounded regardless of how long the process runs.
+  """
+
+  def __init__(self, stream, max_lines: int = 50):
+    self._lines = deque(maxlen=max_lines)
+    self._thread = Thread(target=self._lines.extend, args=(stream,), daemon=True)
+    self._thread.start()
+
+  def join(self):
+    self._thread.join()
+
+  def __str__(self):
+    return b''.join(self._lines).decode('utf-8', 'replace')
+
+
+@dataclass
+class ProgressStats:
+  """Payload of the `DETECT.stats` and `EXPORT.stats` events
+
+  Attributes:
+      progress: 0 to 1
+      out_time: Seconds of video processed
+      fps: Frames processed per second
+      speed: Media seconds processed per wall-clock second (e.g., 4.0 is 4x real time)
+      eta: Estimated seconds remaining, or None when unknown
+  """
+  progress: float
+  out_time: float
+  fps: float
+  speed: float
+  eta: float | None
+
+
+class ProgressPipe:
+  """FFmpeg `-progress` reader
+
+  FFmpeg writes a block of key=value lines every `-stats_period` seconds to
+  a dedicated pipe, so stdout and stderr are left untouched. The blocks are
+  parsed on a thread, and `on_stats` gets a `ProgressStats` for each one.
+
+  Usage:
+      progress = ProgressPipe(total_secs, on_stats)
+      with progress, Popen(progress.wrap(cmd), pass_fds=progress.pass_fds) as process:
+        progress.start()
+        ...
+        progress.join()
+
+  The pipe is opened by `wrap`, and the `with` closes it if FFmpeg can’t be
+  spawned (e.g., a missing binary), since `start` doesn’t get called then.
+  """
+
+  def __init__(self, total_secs: float, on_stats, period: float = 0.5):
+    self.total_secs = total_secs
+    self.on_stats = on_stats
+    self.period = period
+    self.args = []
+    self.pass_fds = ()
+    self._read_fd = self._write_fd = None
+    self._block = {}
+    self._thread = None
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc):
+    self.close()
+
+  def wrap(self, cmd: list) -> list:
+    """Opens the pipe, and inserts the progress options after the program"""
+    self._read_fd, self._write_fd = os.pipe()
+    self.args = ['-progress', f'pipe:{self._write_fd}', '-stats_period', str(self.period)]
+    self.pass_fds = (self._write_fd,)
+    return [cmd[0], *self.args, *cmd[1:]]
+
+  def start(self):
+    """Call it after spawning FFmpeg, so only the child holds the write end"""
+    self._thread = Thread(target=self._read, args=(self._hand_off(),), daemon=True)
+    self._thread.start()
+
+  def join(self):
+    if self._thread:
+      self._thread.join()
+
+  def close(self):
+    """Closes the pipe, unless `start` handed it off to FFmpeg and the reader"""
+    for fd in (self._read_fd, self._write_fd):
+      if fd is not None:
+        os.close(fd)
+    self._read_fd = self._write_fd = None
+
+  def _hand_off(self) -> int:
+    """
+    Returns:
+        The read end, which the reader owns from now on
+    """
+    os.close(self._write_fd)
+    read_fd = self._read_fd
+    self._read_fd = self._write_fd = None
+    self._started_at = monotonic()
+    return read_fd
+
+  def _read(self, read_fd: int):
+    with os.fdopen(read_fd, 'rb') as f:
+      for line in f:
+        self._feed(line)
+
+  def _feed(self, line: bytes):
+    key, sep, value = line.decode('utf-8', 'replace').strip().partition('=')
+    if not sep:
+      return
+    self._block[key] = value
+    if key == 'progress':
+      self.on_stats(self.stats(self._block))
+      self._block = {}
+
+  def stats(self, block: dict[str, str]) -> ProgressStats:
+    out_time = max(0, parse_float(block.get('out_time_us') or block.get('out_time_ms')) / 1e6)  # both are μs
+    elapsed = monotonic() - self._started_at
+    speed = out_time / elapsed if elapsed > 0 else 0
+    done = block.get('progress') == 'end'
+    return ProgressStats(
+      progress=1 if done else min(out_time / self.total_secs, 1) if self.total_secs else 0,
+      out_time=out_time,
+      fps=parse_float(block.get('fps')),
+      speed=speed,
+      eta=0 if done else (self.total_secs - out_time) / speed if speed and self.total_secs else None,
+    )
+
+
+def parse_float(value: str | None) -> float:
+  """0 for FFmpeg’s N/A"""
+  try:
+    return float(value)
+  except (TypeError, ValueError):
+    return 0
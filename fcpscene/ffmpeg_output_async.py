@@ -0,0 +1,88 @@
+import os
+import asyncio
+from signal import SIGINT
+from collections import deque
+
+from .ffmpeg_output import CHUNK_SIZE, SCENE_SCORE_KEY, MetadataParser, ProgressPipe
+
+
+STOP_TIMEOUT_SECS = 5
+"""After SIGINT, how long FFmpeg has for finishing its output before it’s killed"""
+
+
+async def read_scene_scores_async(stream: asyncio.StreamReader, seek_time: float = 0):
+  """Like `read_scene_scores`, but from an asyncio subprocess pipe"""
+  parser = MetadataParser()
+  while chunk := await stream.read(CHUNK_SIZE):
+    for pts_time, key, value in parser.feed(chunk):
+      if key == SCENE_SCORE_KEY:
+        try:
+          yield round(seek_time + pts_time, 6), float(value)
+        except ValueError:
+          pass
+
+
+class AsyncStderrTail:
+  """Like `StderrTail`, but drained by the event loop, instead of a thread"""
+
+  def __init__(self, stream: asyncio.StreamReader, max_lines: int = 50):
+    self._lines = deque(maxlen=max_lines)
+    self._task = asyncio.create_task(self._drain(stream))
+
+  async def _drain(self, stream):
+    partial_line = b''
+    while chunk := await stream.read(CHUNK_SIZE):  # not `readline`, which fails on lines over its limit
+      lines = (partial_line + chunk).split(b'\n')
+      partial_line = lines.pop()
+      self._lines.extend(line + b'\n' for line in lines)
+    if partial_line:
+      self._lines.append(partial_line)
+
+  async def wait(self):
+    await self._task
+
+  def __str__(self):
+    return b''.join(self._lines).decode('utf-8', 'replace')
+
+
+class AsyncProgressPipe(ProgressPipe):
+  """Like `ProgressPipe`, but read by the event loop, instead of a thread
+
+  Usage:
+      progress = AsyncProgressPipe(total_secs, on_stats)
+      with progress:
+        process = await asyncio.create_subprocess_exec(*progress.wrap(cmd), pass_fds=progress.pass_fds)
+        progress.start()
+      ...
+      await progress.wait()
+  """
+
+  def start(self):
+    self._task = asyncio.create_task(self._read_async(self._hand_off()))
+
+  async def wait(self):
+    await self._task
+
+  async def _read_async(self, read_fd: int):
+    reader = asyncio.StreamReader()
+    transport, _ = await asyncio.get_running_loop().connect_read_pipe(
+      lambda: asyncio.StreamReaderProtocol(reader), os.fdopen(read_fd, 'rb'))
+    try:
+      while line := await reader.readline():
+        self._feed(line)
+    finally:
+      transport.close()
+
+
+async def stop_process(process: asyncio.subprocess.Process, timeout: float = STOP_TIMEOUT_SECS):
+  """SIGINT, so FFmpeg finishes its output cleanly, and SIGKILL if it doesn’t exit in time"""
+  if process.returncode is not None:
+    return
+  try:
+    process.send_signal(SIGINT)
+    await asyncio.wait_for(process.wait(), timeout)
+  except ProcessLookupError:
+    pass
+  except TimeoutError:
+    process.kill()
+    await process.wait()
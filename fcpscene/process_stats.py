@@ -0,0 +1,237 @@
+import os
+from time import monotonic
+from threading import Thread, Event, Lock
+from dataclasses import dataclass
+
+from .event_bus import EventBus
+
+
+SAMPLE_SECS = 0.5
+"""Same as the `-stats_period` of `ProgressPipe`"""
+
+PROC_SUPPORTED = os.path.exists('/proc/self/stat')
+"""Linux. Elsewhere (e.g., macOS) the monitor does nothing"""
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if PROC_SUPPORTED else 100
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if PROC_SUPPORTED else 4096
+
+
+@dataclass
+class ProcessSample:
+  """Payload of the `PROCESS.sample` event, emitted per FFmpeg every `SAMPLE_SECS`
+
+  Attributes:
+      stage: `detect` or `export`
+      pid:
+      cpu_secs: User and system time so far, of all its threads
+      rss_mb: Resident memory
+      read_mb: Read so far, including from the page cache
+  """
+  stage: str
+  pid: int
+  cpu_secs: float
+  rss_mb: float
+  read_mb: float
+
+
+@dataclass
+class ProcessStats:
+  """Payload of the `PROCESS.stats` event, the resource usage of the FFmpeg processes of a run
+
+  Attributes:
+      stage: `detect` or `export`
+      n_processes:
+      wall_secs: Of the run
+      cpu_secs: User and system time of all the processes
+      peak_rss_mb: Highest sum of the RSS of the processes running at the same time
+      read_mb: Read by all the processes, including from the page cache
+  """
+  stage: str
+  n_processes: int
+  wall_secs: float
+  cpu_secs: float
+  peak_rss_mb: float
+  read_mb: float
+
+  @property
+  def avg_cores(self) -> float:
+    return self.cpu_secs / self.wall_secs if self.wall_secs else 0
+
+  @property
+  def read_mb_per_sec(self) -> float:
+    return self.read_mb / self.wall_secs if self.wall_secs else 0
+
+  @property
+  def summary(self) -> str:
+    """
+    Example:
+      >>> ProcessStats('detect', 1, 10, 31, 212.43, 452).summary
+      'detect: 3.1 cores avg, 212 MB peak RSS, 45.2 MB/s read (1 FFmpeg)'
+    """
+    return (f'{self.stage}: {self.avg_cores:.1f} cores avg, {self.peak_rss_mb:.0f} MB peak RSS, '
+            f'{self.read_mb_per_sec:.1f} MB/s read ({self.n_processes} FFmpeg)')
+
+  def to_json(self) -> dict:
+    return {
+      'n_processes': self.n_processes,
+      'cpu_secs': round(self.cpu_secs, 3),
+      'avg_cores': round(self.avg_cores, 2),
+      'peak_rss_mb': round(self.peak_rss_mb, 1),
+      'read_mb': round(self.read_mb, 1),
+      'read_mb_per_sec': round(self.read_mb_per_sec, 1),
+    }
+
+
+class ProcessMonitor:
+  """Samples the CPU time, RSS, and bytes read of FFmpeg processes from /proc
+
+  Every `interval`, it emits a `ProcessSample` per running process, and when
+  it stops, a `ProcessStats` of all of them (also as `self.stats`).
+
+  A process that exits between samples would lose its last interval, so before
+  reaping it (`process.wait()`), call `last_sample`, which waits for it to exit
+  and reads it while it’s a zombie.
+
+  Usage:
+      with ProcessMonitor(bus, 'detect') as monitor:
+        with Popen(cmd) as process:
+          monitor.add(process)
+          ...
+          monitor.last_sample(process)
+          process.wait()
+  """
+
+  def __init__(self, bus: EventBus, stage: str, interval: float = SAMPLE_SECS):
+    self.bus = bus
+    self.stage = stage
+    self.interval = interval
+    self.stats = None
+    self._lock = Lock()
+    self._running = set()  # pids
+    self._totals = {}  # of every process, pid → [cpu_secs, read_bytes]
+    self._peak_rss = 0
+    self._stopped = Event()
+    self._thread = Thread(target=self._run, daemon=True)
+
+  def __enter__(self):
+    self.start()
+    return self
+
+  def __exit__(self, *exc):
+    self.stop()
+
+  def start(self):
+    self._started_at = monotonic()
+    if PROC_SUPPORTED:
+      self._thread.start()
+
+  def stop(self) -> ProcessStats | None:
+    """Emits the `ProcessStats`, or nothing without /proc"""
+    if self.stats or not PROC_SUPPORTED:
+      return self.stats
+    self._stopped.set()
+    self._thread.join()
+    with self._lock:
+      self.stats = ProcessStats(
+        stage=self.stage,
+        n_processes=len(self._totals),
+        wall_secs=monotonic() - self._started_at,
+        cpu_secs=sum(cpu for cpu, _ in self._totals.values()),
+        peak_rss_mb=self._peak_rss / 1e6,
+        read_mb=sum(read for _, read in self._totals.values()) / 1e6)
+    self.bus.emit_process_stats(self.stats)
+    return self.stats
+
+  def add(self, process):
+    if PROC_SUPPORTED:
+      with self._lock:
+        self._running.add(process.pid)
+        self._totals.setdefault(process.pid, [0, 0])
+
+  def remove(self, process):
+    with self._lock:
+      self._running.discard(process.pid)
+
+  def last_sample(self, process):
+    """Waits for the process to exit, and samples it before it’s reaped"""
+    if PROC_SUPPORTED and process.returncode is None:
+      try:
+        os.waitid(os.P_PID, process.pid, os.WEXITED | os.WNOWAIT)
+        self._sample([process.pid])
+      except ChildProcessError:  # already reaped, e.g., by a `process.poll()` on another thread
+        pass
+    self.remove(process)
+
+  def _run(self):
+    while not self._stopped.wait(self.interval):
+      with self._lock:
+        pids = list(self._running)
+      rss = self._sample(pids)
+      with self._lock:
+        self._peak_rss = max(self._peak_rss, rss)
+
+  def _sample(self, pids: list[int]) -> int:
+    """
+    Returns:
+        The sum of their RSS, in bytes
+    """
+    total_rss = 0
+    for pid in pids:
+      usage = read_proc(pid)
+      if not usage:
+        continue
+      cpu_secs, rss, read_bytes = usage
+      total_rss += rss
+      with self._lock:
+        totals = self._totals.setdefault(pid, [0, 0])
+        totals[0] = max(totals[0], cpu_secs)
+        totals[1] = max(totals[1], read_bytes)
+      self.bus.emit_process_sample(ProcessSample(self.stage, pid, cpu_secs, rss / 1e6, read_bytes / 1e6))
+    return total_rss
+
+
+def read_proc(pid: int) -> tuple[float, int, int] | None:
+  """
+  Returns:
+      CPU seconds, RSS bytes, and bytes read, or None if the process is gone
+  """
+  try:
+    with open(f'/proc/{pid}/stat', 'rb') as f:
+      cpu_secs, rss = parse_proc_stat(f.read())
+  except (OSError, ValueError, IndexError):
+    return None
+  try:
+    with open(f'/proc/{pid}/io', 'rb') as f:
+      read_bytes = parse_proc_io(f.read())
+  except (OSError, ValueError):  # e.g., restricted in some containers
+    read_bytes = 0
+  return cpu_secs, rss, read_bytes
+
+
+def parse_proc_stat(data: bytes) -> tuple[float, int]:
+  """
+  Returns:
+      The user plus system CPU seconds, and the RSS in bytes
+
+  Example:
+    >>> stat = b'42 (ffmpeg (1)) S 1 42 42 0 -1 4194304 900 0 0 0 250 50 0 0 20 0 9 0 100 500000 2000 ...'
+    >>> parse_proc_stat(stat) == (300 / CLOCK_TICKS, 2000 * PAGE_SIZE)
+    True
+  """
+  fields = data.rpartition(b')')[2].split()  # the name can have spaces and parentheses
+  utime, stime, rss_pages = int(fields[11]), int(fields[12]), int(fields[21])
+  return (utime + stime) / CLOCK_TICKS, rss_pages * PAGE_SIZE
+
+
+def parse_proc_io(data: bytes) -> int:
+  """`rchar`, which unlike `read_bytes` counts the reads served from the page cache
+
+  Example:
+    >>> parse_proc_io(b'rchar: 5242880\\nwchar: 0\\nsyscr: 80\\nsyscw: 0\\nread_bytes: 4096\\n')
+    5242880
+  """
+  for line in data.splitlines():
+    key, _, value = line.partition(b':')
+    if key == b'rchar':
+      return int(value)
+  return 0
@@ -0,0 +1,198 @@
+import struct
+from array import array
+from signal import SIGINT
+from subprocess import Popen, PIPE
+
+from .ffmpeg import ffmpeg_path
+from .utils import CACHE_DIR, file_cache_key
+from .event_bus import EventBus
+from .process_stats import ProcessMonitor
+from .ffmpeg_output import METADATA_TO_STDOUT, StderrTail, ProgressPipe, read_scene_scores
+from .detect_scene_changes import CutTimes, detect_scene_changes, filter_min_scene
+
+
+SCORES_DIR = CACHE_DIR / 'scores'
+SCORES_MAGIC = b'FCPSCOR2'  # version 2 stores the scores as doubles
+SCORES_HEADER = struct.Struct('<8sQ')  # magic, number of frames
+SCORES_CACHE_MAX_BYTES = 256 * 1024 * 1024
+"""The least recently used sidecars are deleted beyond this size"""
+
+
+class SceneScores:
+  """The `scene` score of every frame, so cuts can be derived for any sensitivity
+
+  Attributes:
+      pts: Frame times in seconds
+      scores: 0 to 1, as FFmpeg’s `select` filter computes them. Doubles, like the
+        ones compared against the threshold while detecting, so the cuts are the same
+  """
+
+  def __init__(self, pts=None, scores=None):
+    self.pts = pts or array('d')
+    self.scores = scores or array('d')
+
+  def __len__(self):
+    return len(self.pts)
+
+  def append(self, pts: float, score: float):
+    self.pts.append(pts)
+    self.scores.append(score)
+
+  def to_cuts(self, duration: float, sensitivity: float, min_scene_secs: float) -> CutTimes:
+    """Same cuts as `detect_scene_changes` would find with these settings"""
+    threshold = 1 - sensitivity / 100
+    candidates = [t for t, s in zip(self.pts, self.scores) if s > threshold]
+    cuts = filter_min_scene(candidates, min_scene_secs, end_time=duration)
+    if (duration - cuts[-1]) >= min_scene_secs:
+      cuts.append(duration)
+    return cuts
+
+
+def scores_cache_path(v, proxy_width):
+  return SCORES_DIR / f'{file_cache_key(v.path, proxy_width)}.bin'
+
+
+def load_scene_scores(v, proxy_width) -> SceneScores | None:
+  path = scores_cache_path(v, proxy_width)
+  try:
+    with open(path, 'rb') as f:
+      magic, n = SCORES_HEADER.unpack(f.read(SCORES_HEADER.size))
+      if magic != SCORES_MAGIC:
+        return None
+      pts = array('d')
+      scores = array('d')
+      pts.fromfile(f, n)
+      scores.fromfile(f, n)
+    path.touch()  # recently used, for `prune_scores_cache`
+    return SceneScores(pts, scores)
+  except (OSError, EOFError, struct.error):
+    return None
+
+
+def save_scene_scores(v, proxy_width, scene_scores: SceneScores):
+  """Writes a 16 bytes per frame sidecar, e.g., 7 MB for 2 hours at 60fps"""
+  path = scores_cache_path(v, proxy_width)
+  try:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'wb') as f:
+      f.write(SCORES_HEADER.pack(SCORES_MAGIC, len(scene_scores)))
+      scene_scores.pts.tofile(f)
+      scene_scores.scores.tofile(f)
+    tmp.replace(path)
+    prune_scores_cache()
+  except OSError:
+    pass  # The cache is an optimization
+
+
+def prune_scores_cache(max_bytes=SCORES_CACHE_MAX_BYTES):
+  """Deletes the least recently used sidecars (by mtime) until the rest fit in `max_bytes`
+
+  The GUI records the scores of every video it opens, so without this the cache would grow forever.
+  """
+  sidecars = []
+  for path in SCORES_DIR.glob('*.bin'):
+    try:
+      stat = path.stat()
+    except OSError:  # deleted concurrently
+      continue
+    sidecars.append((stat.st_mtime_ns, stat.st_size, path))
+
+  total = 0
+  for _, size, path in sorted(sidecars, reverse=True):
+    total += size
+    if total > max_bytes:
+      path.unlink(missing_ok=True)
+
+
+def detect_scene_changes_cached(v, bus: EventBus, sensitivity, proxy_width, min_scene_secs, record=True,
+                                scene_scores: SceneScores | None = None) -> CutTimes:
+  """Like `detect_scene_changes`, but derives the cuts from cached scene scores
+
+  On a cache miss, and when `record` is true, it runs a pass that scores every
+  frame (instead of only printing the ones above the threshold) and caches the
+  scores. Therefore, subsequent sensitivity or min-scene-seconds changes don’t
+  need to decode the video again.
+
+  Args:
+      scene_scores: Optional. Already loaded with `load_scene_scores`, so the cache isn’t read twice
+  """
+  if scene_scores is None:
+    scene_scores = load_scene_scores(v, proxy_width)
+  if scene_scores is not None:
+    cuts = scene_scores.to_cuts(v.duration, sensitivity, min_scene_secs)
+    bus.emit_progress(1, cuts)
+    return cuts
+
+  if not record:
+    return detect_scene_changes(v, bus, sensitivity, proxy_width, min_scene_secs)
+
+  cmd = [
+    ffmpeg_path(),
+    '-hide_banner',
+    '-nostats',
+    '-an',
+    '-i', v.path,
+    '-vf', ','.join([
+      f'scale={proxy_width}:-1',
+      "select='gte(scene, 0)'",  # every frame, but referencing `scene` makes `select` compute it
+      METADATA_TO_STDOUT
+    ]),
+    '-f', 'null', '-',
+  ]
+
+  threshold = 1 - sensitivity / 100
+  scene_scores = SceneScores()
+  cuts = [0]
+  stopped_from_ui = False
+
+  def on_stats(stats):
+    bus.emit_progress_stats(stats)
+    if stats.progress < 1:
+      bus.emit_progress(min(stats.progress, 0.999), cuts)
+
+  progress = ProgressPipe(v.duration, on_stats)
+
+  monitor = ProcessMonitor(bus, 'detect')
+  monitor.start()
+  try:
+    with progress, Popen(progress.wrap(cmd), stdout=PIPE, stderr=PIPE, pass_fds=progress.pass_fds) as process:
+      def on_stop_from_ui():
+        if process and process.poll() is None:
+          nonlocal stopped_from_ui
+          stopped_from_ui = True
+          process.send_signal(SIGINT)
+
+      bus.subscribe_stop(on_stop_from_ui)
+      monitor.add(process)
+      progress.start()
+      stderr_tail = StderrTail(process.stderr)
+
+      for pts_time, score in read_scene_scores(process.stdout):
+        scene_scores.append(pts_time, score)
+        if score > threshold and pts_time - cuts[-1] >= min_scene_secs and cuts[-1] < pts_time < v.duration:
+          cuts.append(pts_time)
+          bus.emit_progress(pts_time / v.duration, cuts)
+
+      monitor.last_sample(process)
+      process.wait()
+      stderr_tail.join()
+      progress.join()
+      if (v.duration - cuts[-1]) >= min_scene_secs:
+        cuts.append(v.duration)
+      bus.emit_progress(1, cuts)
+
+      if not stopped_from_ui:
+        if process.returncode != 0:
+          raise RuntimeError(str(stderr_tail))
+        save_scene_scores(v, proxy_width, scene_scores)
+      return cuts
+
+  except KeyboardInterrupt:
+    if process:
+      process.terminate()
+    return cuts
+
+  finally:
+    monitor.stop()
+    bus.unsubscribe_stop()
@@ -1,11 +1,16 @@
 from .utils import clean_decimals
+from .profiler import span
 from .cuts_to_clips import cuts_to_file_clips
+from .video_attr import VideoAttr
 from .detect_scene_changes import CutTimes
 
 
-def to_csv_clips(cuts: CutTimes) -> str:
+def to_csv_clips(cuts: CutTimes, v: VideoAttr | None = None) -> str:
   """CSV with one clip per row
 
+  Args:
+      v: Optional. Rounds the times to frames, like the FCPXML (see `cuts_to_file_clips`)
+
   Example:
     >>> to_csv_clips([0, 5, 10, 15])
     start,end
@@ -13,7 +18,8 @@ def to_csv_clips(cuts: CutTimes) -> str:
     5,10
     10,15
   """
-  out = ['start,end']
-  for clip in cuts_to_file_clips(cuts):
-    out.append(f'{clean_decimals(clip.start)},{clean_decimals(clip.end)}')
-  return '\n'.join(out) + '\n'
+  with span('csv', cuts=len(cuts)):
+    out = ['start,end']
+    for clip in cuts_to_file_clips(cuts, v):
+      out.append(f'{clean_decimals(clip.start)},{clean_decimals(clip.end)}')
+    return '\n'.join(out) + '\n'
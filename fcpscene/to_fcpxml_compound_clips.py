@@ -1,5 +1,5 @@
 from .video_attr import VideoAttr
-from .cuts_to_clips import cuts_to_fcp_clips
+from .fcpxml_writer import iter_fcpxml
 from .detect_scene_changes import CutTimes
 
 
@@ -16,48 +16,4 @@ def to_fcpxml_compound_clips(cuts: CutTimes, v: VideoAttr) -> str:
     Browser Viewer. So for that we embed an Event called "fcpscene", which must
     exist in the FCP Library before importing the FCPXML.
   """
-
-  clips = cuts_to_fcp_clips(cuts, v)
-
-  xml = f'''<?xml version="1.0" encoding="UTF-8"?>
-<!DOCTYPE fcpxml>
-<fcpxml version="1.13">
-  <resources>
-    <format id="r1"
-      width="{v.width}"
-      height="{v.height}"
-      colorSpace="{v.fcp_color_space}"
-      frameDuration="{v.fps_denominator}/{v.fps_numerator}s"/>
-    <asset id="r2" start="0s" format="r1">
-      <media-rep kind="original-media" src="{v.file_uri}"/>
-    </asset>'''
-
-  for c in clips: xml += f'''
-    <media id="{c.ref_id}" name="{v.name}_{c.seq}">
-      <sequence format="r1" tcStart="0s">
-        <spine>
-          <asset-clip ref="r2" offset="0s" start="{c.offset}" duration="{c.duration}"/>
-        </spine>
-      </sequence>
-    </media>'''
-
-  xml += f'''
-  </resources>
-  <library>
-    <event name="fcpscene">
-      <project name="{v.name}">
-        <sequence format="r1" tcStart="0s">
-          <spine>'''
-
-  for c in clips: xml += f'''
-            <ref-clip ref="{c.ref_id}" offset="{c.offset}" duration="{c.duration}"/>'''
-
-  xml += f'''
-          </spine>
-        </sequence>
-      </project>
-    </event>
-  </library>
-</fcpxml>
-'''
-  return xml
+  return ''.join(iter_fcpxml(cuts, v, 'compound-clips'))
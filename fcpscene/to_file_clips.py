@@ -1,60 +1,262 @@
+import os
+import tempfile
 import subprocess
+from time import monotonic
 from pathlib import Path
+from threading import RLock
+from concurrent.futures import ThreadPoolExecutor
 
-from .ffmpeg import ffmpeg
+from fcpscene import EXPORT_STRATEGIES
+from .ffmpeg import ffmpeg_path
+from .profiler import span
+from .ffmpeg_output import ProgressPipe, ProgressStats, StderrTail
 from .video_attr import VideoAttr
 from .event_bus import EventBus
-from .cuts_to_clips import cuts_to_file_clips
+from .process_stats import ProcessMonitor
+from .cuts_to_clips import FileClip, cuts_to_file_clips
+from .chunk_planner import keyframe_index
+from .to_file_clips_smart import can_smart_render, smart_render_steps
+from .to_file_clips_multi import prefers_multi_output, batch_size, plan_batches, multi_output_cmd
+from .export_manifest import ExportManifest, source_settings
+from .to_file_clips_segment import to_file_clips_segment
 from .detect_scene_changes import CutTimes
 
 
-def to_file_clips(cuts: CutTimes, v: VideoAttr, bus: EventBus) -> Path:
-  """Splits the original video into multiple files based on detected scenes"""
+def to_file_clips(cuts: CutTimes, v: VideoAttr, bus: EventBus, jobs: int = 1, threads: int | None = None,
+                  strategy: str = 'auto') -> Path:
+  """Splits the original video into multiple files based on detected scenes
+
+  Besides `emit_export_progress(current, total)` per clip, it emits
+  `emit_export_stats(ProgressStats)` periodically for the whole export, and
+  the resource usage of its FFmpegs (`ProcessSample` and `ProcessStats`).
+  The progress events are emitted in order, like in a sequential export, i.e.,
+  `current` is the first clip that hasn’t finished.
+
+  Intraframe-coded videos are stream-copied in a single pass instead
+  (see `to_file_clips_segment`), so `jobs` and `strategy` don’t apply to them.
+
+  Args:
+      jobs: Number of FFmpeg processes exporting clips (or batches) concurrently.
+        Short clips benefit the most, since each process spends time starting and seeking.
+      threads: Budget shared among the `jobs` processes. Defaults to the CPU count.
+      strategy:
+        - `reencode`: One FFmpeg per clip, which re-encodes it
+        - `multi-output`: One FFmpeg per batch of consecutive clips, which decodes
+          their time range once and encodes each clip (see `multi_output_cmd`)
+        - `smart`: Re-encodes only the partial GOPs at the clip edges (see
+          `smart_render_steps`). Videos that the encoder can’t match (see
+          `can_smart_render`) are re-encoded.
+        - `auto`: `multi-output` for many short clips, `reencode` otherwise
+
+  Raises:
+      RuntimeError: If a clip fails, after the other ones finish. The failed
+        ones aren’t recorded in the manifest, so exporting again retries them.
+  """
   output_dir = v.path.parent / v.path.stem
   output_dir.mkdir(parents=True, exist_ok=True)
 
+  clips = cuts_to_file_clips(cuts, v)
+  names = [f'{v.path.stem}_{clip.seq}{v.path.suffix}' for clip in clips]
+  manifest = ExportManifest.load(output_dir)
+
+  if v.intraframe_coded:
+    settings = source_settings(v.path, ['-c:v', 'copy'])
+    if manifest.reuse(clips, names, settings):  # splits all of them, since it’s a single pass anyway
+      with ProcessMonitor(bus, 'export') as monitor:
+        completed = to_file_clips_segment([clips[0].start] + [c.end for c in clips], v, bus, monitor)
+      if completed:
+        for clip, name in zip(clips, names):
+          manifest.record(clip, name, settings)
+        manifest.save()
+    else:
+      for i in range(len(clips)):
+        bus.emit_export_progress(i + 1, len(clips))
+      manifest.save()
+    return output_dir
+
+  lock = RLock()
   is_stopped = False
-  process = None
+  processes = set()
+  monitor = ProcessMonitor(bus, 'export')
 
   def on_stop():
     nonlocal is_stopped
-    is_stopped = True
-    if process:
-      process.terminate()
+    with lock:
+      is_stopped = True
+      for process in processes:
+        process.terminate()
 
   bus.subscribe_export_stop(on_stop)
 
-  clips = cuts_to_file_clips(cuts)
   n_clips = len(clips)
+  finished = [False] * n_clips
+  reported = 0
+  errors = []
+
+  total_secs = sum(clip.end - clip.start for clip in clips)
+  exported_secs = 0
+  skipped_secs = 0  # of the clips that were up to date
+  exporting_secs = {}  # of each clip, or batch, in progress
+  started_at = monotonic()
+
+  def report_in_order():
+    nonlocal reported
+    while reported < n_clips and (reported == 0 or finished[reported - 1]):
+      reported += 1
+      bus.emit_export_progress(reported, n_clips)
+
+  def on_stats(key, stats, exporting):
+    with lock:
+      exporting_secs[key] = exporting
+      done_secs = exported_secs + sum(exporting_secs.values())
+      speed = (done_secs - skipped_secs) / (monotonic() - started_at)
+      bus.emit_export_stats(ProgressStats(
+        progress=done_secs / total_secs if total_secs else 1,
+        out_time=done_secs,
+        fps=stats.fps,
+        speed=speed,
+        eta=(total_secs - done_secs) / speed if speed else None,
+      ))
 
   vcodec = vcodec_for(v)
+  if jobs > 1:
+    vcodec += ['-threads', str(max(1, (threads or os.cpu_count() or 1) // jobs))]
+
+  if strategy == 'auto':
+    strategy = 'multi-output' if prefers_multi_output(clips) else 'reencode'
+  smart = strategy == 'smart' and can_smart_render(v)
+  keyframes = keyframe_index(v) if smart else None
+
+  settings = source_settings(v.path, vcodec_for(v) + (['smart'] if smart else []))
+  pending = manifest.reuse(clips, names, settings)
+  manifest.save()
+  for i in set(range(n_clips)) - set(pending):
+    finished[i] = True
+    skipped_secs += clips[i].end - clips[i].start
+  exported_secs = skipped_secs
+
+  if strategy == 'multi-output':
+    batches = [batch
+               for run in contiguous_runs(pending)
+               for batch in plan_batches([(i, clips[i]) for i in run], batch_size(v), jobs)]
+  else:
+    batches = [[(i, clips[i])] for i in pending]
+
+  def export(batch):
+    nonlocal exported_secs
+    key = batch[0][1].seq
+    batch_clips = [clip for _, clip in batch]
+    batch_secs = sum(clip.end - clip.start for clip in batch_clips)
+    out_files = [output_dir / names[i] for i, _ in batch]
+    try:
+      if len(batch) > 1:
+        ok = run_steps(key, [(multi_output_cmd(batch_clips, v, vcodec, out_files), batch_secs)])
+      elif smart:
+        with tempfile.TemporaryDirectory(dir=output_dir, prefix='.') as tmp_dir:
+          ok = run_steps(key, smart_render_steps(batch_clips[0], v, keyframes, vcodec, out_files[0], Path(tmp_dir)))
+      else:
+        ok = run_steps(key, [(clip_cmd(batch_clips[0], v, vcodec, out_files[0]), batch_secs)])
+    except RuntimeError as e:
+      with lock:
+        exporting_secs.pop(key, None)
+        errors.append(f'{", ".join(f.name for f in out_files)}: {e}')
+      return
+
+    with lock:
+      if not ok or is_stopped:
+        return
+      exporting_secs.pop(key, None)
+      exported_secs += batch_secs
+      for i, clip in batch:
+        finished[i] = True
+        manifest.record(clip, names[i], settings)
+      manifest.save()
+      report_in_order()
+
+  def run_steps(key, steps) -> bool:
+    """Runs the commands of a clip, or batch of clips, in order, each processing `secs` of it
+
+    Returns:
+        Whether all of them ran, i.e., it wasn’t stopped
+
+    Raises:
+        RuntimeError: With the end of the FFmpeg output, if a command fails
+    """
+    done_secs = 0
+    for cmd, secs in steps:
+      with lock:
+        if is_stopped:
+          return False
+        progress = ProgressPipe(secs, lambda stats, done_secs=done_secs, secs=secs:
+                                on_stats(key, stats, done_secs + min(stats.out_time, secs)))
+        with progress:
+          process = subprocess.Popen(progress.wrap(cmd), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, pass_fds=progress.pass_fds)
+          progress.start()
+        processes.add(process)
+        monitor.add(process)
+      with process:
+        stderr_tail = StderrTail(process.stderr)
+        with span('export clip', clip=key, secs=round(secs, 3)):
+          monitor.last_sample(process)
+          process.wait()
+          stderr_tail.join()
+          progress.join()
+      with lock:
+        processes.discard(process)
+        if is_stopped:
+          return False
+      if process.returncode != 0:
+        raise RuntimeError(f'{stderr_tail}FFmpeg exited with code {process.returncode}')  # e.g., crashed without output
+      done_secs += secs
+    return True
+
+  pool = ThreadPoolExecutor(max_workers=max(1, jobs))
+  monitor.start()
   try:
-    for clip in clips:
-      if is_stopped:
-        break
-      bus.emit_export_progress(int(clip.seq), n_clips)
-      cmd = [
-        ffmpeg,
-        '-y',
-        '-hide_banner',
-        '-ss', str(clip.start),
-        '-to', str(clip.end),
-        '-i', v.path,
-        *vcodec,
-        '-avoid_negative_ts', 'make_non_negative',
-        output_dir / f'{v.path.stem}_{clip.seq}{v.path.suffix}'
-      ]
-      process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-      process.communicate()
-      process = None
+    report_in_order()
+    for future in [pool.submit(export, batch) for batch in batches]:
+      future.result()
+    if errors:
+      raise RuntimeError('\n'.join(errors))
 
   except KeyboardInterrupt:
-    if process:
-      process.terminate()
+    on_stop()
 
   finally:
+    pool.shutdown(cancel_futures=True)
     bus.unsubscribe_export_stop()
-    return output_dir
+    monitor.stop()
+  return output_dir
+
+
+def contiguous_runs(indices: list[int]) -> list[list[int]]:
+  """
+  Example:
+    >>> contiguous_runs([0, 1, 2, 5, 6, 9])
+    [[0, 1, 2], [5, 6], [9]]
+  """
+  runs = []
+  for i in indices:
+    if runs and runs[-1][-1] == i - 1:
+      runs[-1].append(i)
+    else:
+      runs.append([i])
+  return runs
+
+
+def clip_cmd(clip: FileClip, v: VideoAttr, vcodec: list[str], out_file: Path) -> list:
+  """FFmpeg command that exports a clip, with the `reencode` strategy"""
+  return [
+    ffmpeg_path(),
+    '-y',
+    '-hide_banner',
+    '-ss', str(clip.start),
+    '-to', str(clip.end),
+    '-i', v.path,
+    *vcodec,
+    '-avoid_negative_ts', 'make_non_negative',
+    out_file
+  ]
 
 
 def vcodec_for(v: VideoAttr) -> list[str]:
@@ -0,0 +1,113 @@
+import os
+import asyncio
+from time import monotonic
+from pathlib import Path
+
+from .video_attr import VideoAttr
+from .event_bus import EventBus
+from .ffmpeg_output import ProgressStats
+from .ffmpeg_output_async import AsyncProgressPipe, AsyncStderrTail, stop_process
+from .cuts_to_clips import cuts_to_file_clips
+from .export_manifest import ExportManifest, source_settings
+from .to_file_clips import clip_cmd, vcodec_for
+from .detect_scene_changes import CutTimes
+
+
+async def to_file_clips_async(cuts: CutTimes, v: VideoAttr, bus: EventBus, jobs: int = 1,
+                              limit: asyncio.Semaphore | None = None) -> Path:
+  """Like `to_file_clips` with the `reencode` strategy, but as a coroutine
+
+  Each clip is exported with its own FFmpeg (stream-copied for intraframe-coded
+  videos), at most `jobs` at a time. The file names, progress events, and
+  manifest are the ones of `to_file_clips`, so both skip the clips the other
+  exported. Cancelling the task stops the running FFmpegs (see `stop_process`).
+
+  Args:
+      jobs: Number of clips exported concurrently
+      limit: Optional. Shared among exports (or detections) instead of `jobs`,
+        for capping the FFmpegs of the whole event loop
+
+  Raises:
+      RuntimeError: If a clip fails, after the other ones finish
+  """
+  output_dir = v.path.parent / v.path.stem
+  output_dir.mkdir(parents=True, exist_ok=True)
+
+  clips = cuts_to_file_clips(cuts, v)
+  names = [f'{v.path.stem}_{clip.seq}{v.path.suffix}' for clip in clips]
+  manifest = ExportManifest.load(output_dir)
+
+  settings = source_settings(v.path, vcodec_for(v))
+  vcodec = vcodec_for(v)
+  if jobs > 1 and not limit:
+    vcodec += ['-threads', str(max(1, (os.cpu_count() or 1) // jobs))]
+  limit = limit or asyncio.Semaphore(max(1, jobs))
+
+  pending = manifest.reuse(clips, names, settings)
+  manifest.save()
+
+  n_clips = len(clips)
+  finished = [True] * n_clips
+  for i in pending:
+    finished[i] = False
+  reported = 0
+  errors = []
+
+  total_secs = sum(clip.end - clip.start for clip in clips)
+  skipped_secs = sum(clip.end - clip.start for clip, done in zip(clips, finished) if done)
+  exported_secs = skipped_secs
+  exporting_secs = {}  # of each clip in progress
+  started_at = monotonic()
+
+  def report_in_order():
+    nonlocal reported
+    while reported < n_clips and (reported == 0 or finished[reported - 1]):
+      reported += 1
+      bus.emit_export_progress(reported, n_clips)
+
+  def on_stats(i, stats):
+    exporting_secs[i] = min(stats.out_time, clips[i].end - clips[i].start)
+    done_secs = exported_secs + sum(exporting_secs.values())
+    speed = (done_secs - skipped_secs) / (monotonic() - started_at)
+    bus.emit_export_stats(ProgressStats(
+      progress=done_secs / total_secs if total_secs else 1,
+      out_time=done_secs,
+      fps=stats.fps,
+      speed=speed,
+      eta=(total_secs - done_secs) / speed if speed else None,
+    ))
+
+  async def export(i):
+    nonlocal exported_secs
+    clip = clips[i]
+    async with limit:
+      progress = AsyncProgressPipe(clip.end - clip.start, lambda stats: on_stats(i, stats))
+      with progress:
+        process = await asyncio.create_subprocess_exec(*map(str, progress.wrap(clip_cmd(clip, v, vcodec, output_dir / names[i]))),
+                                                       stdout=asyncio.subprocess.DEVNULL,
+                                                       stderr=asyncio.subprocess.PIPE,
+                                                       pass_fds=progress.pass_fds)
+        progress.start()
+      stderr_tail = AsyncStderrTail(process.stderr)
+      try:
+        await process.wait()
+      finally:
+        await stop_process(process)
+        await stderr_tail.wait()
+        await progress.wait()
+
+    exporting_secs.pop(i, None)
+    if process.returncode != 0:
+      errors.append(f'{names[i]}: {stderr_tail}')
+      return
+    exported_secs += clip.end - clip.start
+    finished[i] = True
+    manifest.record(clip, names[i], settings)
+    manifest.save()
+    report_in_order()
+
+  report_in_order()
+  await asyncio.gather(*(export(i) for i in pending))
+  if errors:
+    raise RuntimeError('\n'.join(errors))
+  return output_dir
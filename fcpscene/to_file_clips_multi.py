@@ -0,0 +1,78 @@
+from pathlib import Path
+
+from .ffmpeg import ffmpeg_path
+from .video_attr import VideoAttr
+from .cuts_to_clips import FileClip
+
+
+MULTI_OUTPUT_MIN_CLIPS = 4
+MULTI_OUTPUT_MAX_AVG_CLIP_SECS = 30
+"""Longer clips amortize the startup and seek of a process per clip"""
+
+MAX_BATCH_CLIPS = 32
+"""FFmpeg opens every output of a batch upfront"""
+BATCH_MEMORY_MB = 2048
+ENCODER_BUFFERED_FRAMES = 60
+"""Approximate frames an encoder holds, e.g., x264’s lookahead and frame threads"""
+
+
+def prefers_multi_output(clips: list[FileClip]) -> bool:
+  """Many short clips, where per-clip process startup and seeking dominate"""
+  if len(clips) < MULTI_OUTPUT_MIN_CLIPS:
+    return False
+  return sum(c.end - c.start for c in clips) / len(clips) <= MULTI_OUTPUT_MAX_AVG_CLIP_SECS
+
+
+def batch_size(v: VideoAttr, memory_mb: float = BATCH_MEMORY_MB) -> int:
+  """Clips per FFmpeg process, so their encoders fit in `memory_mb`
+
+  Example:
+    >>> from types import SimpleNamespace
+    >>> batch_size(SimpleNamespace(width=3840, height=2160))
+    2
+  """
+  frame_bytes = v.width * v.height * 1.5  # yuv420p
+  return max(1, min(MAX_BATCH_CLIPS, int(memory_mb * 1e6 // (frame_bytes * ENCODER_BUFFERED_FRAMES))))
+
+
+def plan_batches(clips: list, max_size: int, jobs: int = 1) -> list[list]:
+  """Consecutive clips, in at least `jobs` batches when possible, so every job has work
+
+  Example:
+    >>> plan_batches(list(range(10)), max_size=4, jobs=3)
+    [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+    >>> plan_batches(list(range(10)), max_size=32, jobs=2)
+    [[0, 1, 2, 3, 4], [5, 6, 7, 8, 9]]
+  """
+  size = max(1, min(max_size, -(-len(clips) // max(1, jobs))))
+  return [clips[i:i + size] for i in range(0, len(clips), size)]
+
+
+def multi_output_cmd(clips: list[FileClip], v: VideoAttr, vcodec: list[str], out_files: list[Path]) -> list:
+  """One FFmpeg that decodes the time range of `clips` once and encodes each clip to its file
+
+  Every output maps the same decoded streams, and its own `-ss`/`-t` keeps
+  only the frames of its clip, which is the split and trim without a filter
+  graph, and it also applies to the audio (if any).
+  """
+  start = clips[0].start
+  half_frame = 0.5 / v.fps  # frames at exactly the cut time belong to the clip starting there
+  cmd = [
+    ffmpeg_path(),
+    '-y',
+    '-hide_banner',
+    '-ss', str(start),
+    '-to', str(clips[-1].end),
+    '-i', v.path,
+  ]
+  for clip, out_file in zip(clips, out_files):
+    cmd += [
+      '-map', '0:v:0',
+      '-map', '0:a:0?',
+      '-ss', str(round(max(0, clip.start - start - half_frame), 6)),
+      '-t', str(round(clip.end - clip.start, 6)),
+      *vcodec,
+      '-avoid_negative_ts', 'make_non_negative',
+      out_file
+    ]
+  return cmd
@@ -0,0 +1,101 @@
+import subprocess
+from bisect import bisect_right
+
+from .ffmpeg import ffmpeg_path
+from .profiler import span
+from .ffmpeg_output import ProgressPipe, StderrTail
+from .video_attr import VideoAttr
+from .event_bus import EventBus
+from .detect_scene_changes import CutTimes, count_scenes
+
+
+def to_file_clips_segment(cuts: CutTimes, v: VideoAttr, bus: EventBus, monitor=None) -> bool:
+  """Like `to_file_clips`, but stream-copies every clip with one FFmpeg
+
+  The segment muxer splits the output at the cut times, so the source is read
+  once, sequentially, instead of being opened and seeked once per clip. The
+  splits are frame accurate only when every frame is a keyframe, so it’s
+  meant for intraframe-coded videos (see `VideoAttr.intraframe_coded`).
+
+  Args:
+      monitor (ProcessMonitor): Optional. Samples the FFmpeg process
+
+  Returns:
+      Whether every clip was exported, i.e., it wasn’t stopped
+  """
+  output_dir = v.path.parent / v.path.stem
+  output_dir.mkdir(parents=True, exist_ok=True)
+
+  n_clips = count_scenes(cuts)
+  seq_digits = len(str(n_clips))
+  start, end = cuts[0], cuts[-1]
+  split_times = [round(t - start, 6) for t in cuts[1:-1]]
+
+  is_stopped = False
+  completed = False
+  process = None
+  reported = 0
+
+  def on_stop():
+    nonlocal is_stopped
+    is_stopped = True
+    if process:
+      process.terminate()
+
+  def report_until(current):
+    nonlocal reported
+    while reported < min(current, n_clips):
+      reported += 1
+      bus.emit_export_progress(reported, n_clips)
+
+  def on_stats(stats):
+    bus.emit_export_stats(stats)
+    report_until(bisect_right(split_times, stats.out_time) + 1)
+
+  cmd = [
+    ffmpeg_path(),
+    '-y',
+    '-hide_banner',
+    '-ss', str(start),
+    '-to', str(end),
+    '-i', v.path,
+    '-c:v', 'copy',
+    '-f', 'segment',
+    '-segment_times', ','.join(map(str, split_times)) or str(end - start + 1),  # a single clip has no splits
+    '-segment_time_delta', str(round(0.5 / v.fps, 6)),  # splits on the keyframe nearest to each cut
+    '-segment_start_number', '1',
+    '-reset_timestamps', '1',
+    '-avoid_negative_ts', 'make_non_negative',
+    output_dir / f'{v.path.stem.replace("%", "%%")}_%0{seq_digits}d{v.path.suffix}'
+  ]
+
+  bus.subscribe_export_stop(on_stop)
+  progress = ProgressPipe(end - start, on_stats)
+  try:
+    report_until(1)
+    with progress, subprocess.Popen(progress.wrap(cmd), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                    pass_fds=progress.pass_fds) as process:
+      progress.start()
+      if monitor:
+        monitor.add(process)
+      stderr_tail = StderrTail(process.stderr)
+      with span('export segment', clips=n_clips):
+        if monitor:
+          monitor.last_sample(process)
+        process.wait()
+        stderr_tail.join()
+        progress.join()
+    if not is_stopped:
+      if process.returncode != 0:
+        raise RuntimeError(str(stderr_tail))
+      report_until(n_clips)
+      completed = True
+
+  except KeyboardInterrupt:
+    if process:
+      process.terminate()
+
+  finally:
+    bus.unsubscribe_export_stop()
+
+  return completed
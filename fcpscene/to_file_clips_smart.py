@@ -0,0 +1,141 @@
+from pathlib import Path
+from dataclasses import dataclass
+
+from .ffmpeg import ffmpeg_path
+from .video_attr import VideoAttr
+from .chunk_planner import KeyframeIndex
+from .cuts_to_clips import FileClip
+
+
+SMART_RENDER_CODECS = {
+  'h264': ('yuv420p', 'High'),
+  'hevc': ('yuv420p', 'Main'),
+}
+"""Their Annex B bitstreams can be joined losslessly with the concat demuxer, as long as
+the re-encoded parts match the copied ones. These are the pixel format and profile that
+the encoders of `vcodec_for` output."""
+
+IN_BAND_TAGS = {
+  'h264': 'avc3',
+  'hevc': 'hev1',
+}
+"""MP4 and MOV store a single set of SPS and PPS (and VPS) as the `avc1`/`hvc1` extradata,
+but the re-encoded parts have their own. These tags keep them in-band, before each keyframe."""
+
+
+@dataclass
+class SmartRenderPlan:
+  """Time ranges of a clip, so only the partial GOPs at its edges are re-encoded
+
+  Attributes:
+      head: Re-encoded, from the cut to the first keyframe
+      body: Stream-copied, whole GOPs
+      tail: Re-encoded, from the last keyframe to the end of the clip
+  """
+  head: tuple[float, float] | None
+  body: tuple[float, float] | None
+  tail: tuple[float, float] | None
+
+
+def can_smart_render(v: VideoAttr) -> bool:
+  """Whether the re-encoded edges would have the same pixel format and profile as the source
+
+  Example:
+    >>> from types import SimpleNamespace
+    >>> can_smart_render(SimpleNamespace(codec_name='h264', pix_fmt='yuv420p', profile='High'))
+    True
+    >>> can_smart_render(SimpleNamespace(codec_name='h264', pix_fmt='yuv422p10le', profile='High 4:2:2'))
+    False
+  """
+  return SMART_RENDER_CODECS.get(v.codec_name) == (v.pix_fmt, v.profile)
+
+
+def plan_smart_render(start: float, end: float, keyframes: KeyframeIndex, fps: float) -> SmartRenderPlan:
+  """
+  Times within half a frame of a keyframe are considered on it.
+
+  Example:
+    >>> kf = KeyframeIndex(times=[0, 2, 4, 6])
+    >>> plan_smart_render(1.5, 5.25, kf, 60)
+    SmartRenderPlan(head=(1.5, 2), body=(2, 4), tail=(4, 5.25))
+    >>> plan_smart_render(2, 6, kf, 60)
+    SmartRenderPlan(head=None, body=(2, 6), tail=None)
+    >>> plan_smart_render(2.5, 3.5, kf, 60)
+    SmartRenderPlan(head=(2.5, 3.5), body=None, tail=None)
+  """
+  half_frame = 0.5 / fps
+  first = keyframes.at_or_before(start + half_frame)
+  if first < start - half_frame:
+    first = keyframes.after(start)
+  last = keyframes.at_or_before(end + half_frame)
+
+  if first is None or first >= last - half_frame:  # no whole GOP in the clip
+    return SmartRenderPlan(head=(start, end), body=None, tail=None)
+
+  return SmartRenderPlan(
+    head=(start, first) if first - start > half_frame else None,
+    body=(first, last),
+    tail=(last, end) if end - last > half_frame else None)
+
+
+def smart_render_steps(clip: FileClip, v: VideoAttr, keyframes: KeyframeIndex, vcodec: list[str],
+                       out_file: Path, tmp_dir: Path) -> list[tuple[list, float]]:
+  """FFmpeg commands that export a clip re-encoding only the partial GOPs at its edges
+
+  The parts are video-only MPEG-TS files, which the concat demuxer joins
+  without re-encoding. The audio is taken from the source in that last step, which
+  tags the video with `IN_BAND_TAGS`, so every part keeps its parameter sets.
+
+  Returns:
+      (command, media seconds it processes) pairs, to be run in order
+  """
+  plan = plan_smart_render(clip.start, clip.end, keyframes, v.fps)
+  steps = []
+  parts = []
+  for name, time_range, codec in [
+    ('head', plan.head, vcodec),
+    ('body', plan.body, ['-c:v', 'copy']),
+    ('tail', plan.tail, vcodec)
+  ]:
+    if not time_range:
+      continue
+    start, end = time_range
+    part = tmp_dir / f'{name}.ts'
+    parts.append(part)
+    steps.append(([
+      ffmpeg_path(),
+      '-y',
+      '-hide_banner',
+      '-ss', str(start),
+      '-i', v.path,
+      '-an',
+      '-frames:v', str(round((end - start) * v.fps)),  # exact frame count, instead of a `-to` time
+      *codec,
+      part
+    ], end - start))
+
+  concat_list = tmp_dir / 'parts.txt'
+  concat_list.write_text(''.join(f"file '{escape_concat_path(p)}'\n" for p in parts), encoding='utf-8')
+  steps.append(([
+    ffmpeg_path(),
+    '-y',
+    '-hide_banner',
+    '-f', 'concat',
+    '-safe', '0',
+    '-i', concat_list,
+    '-ss', str(clip.start),
+    '-to', str(clip.end),
+    '-i', v.path,
+    '-map', '0:v',
+    '-map', '1:a?',
+    '-c:v', 'copy',
+    '-tag:v', IN_BAND_TAGS[v.codec_name],
+    '-avoid_negative_ts', 'make_non_negative',
+    out_file
+  ], 0))
+  return steps
+
+
+def escape_concat_path(path: Path) -> str:
+  """Quoted paths in concat lists escape single quotes as '\\''"""
+  return str(path).replace("'", "'\\''")
@@ -1,6 +1,11 @@
+import hashlib
+from pathlib import Path
 from threading import Timer
 
 
+CACHE_DIR = Path.home() / '.cache' / 'fcpscene'
+
+
 def format_seconds(seconds: float, max_decimals: int = 2) -> str:
   """Seconds to string 9h9m9s
 
@@ -36,6 +41,16 @@ def clean_decimals(number) -> str:
   return str(number).rstrip('0').rstrip('.') or '0'
 
 
+def escape_xml(text: str) -> str:
+  """Escapes &, <, and > — like `xml.sax.saxutils.escape`, without importing `urllib.request`
+
+  Example:
+      >>> escape_xml('Tom & Jerry <1>')
+      'Tom &amp; Jerry &lt;1&gt;'
+  """
+  return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
 def debounce(seconds: float):
   """Delays execution until after a specified period has passed since the last call"""
 
@@ -52,3 +67,15 @@ def debounce(seconds: float):
     return debounced_func
 
   return decorator
+
+
+def file_identity(path) -> tuple[str, int, int]:
+  """(Absolute path, size, mtime) — so edited or replaced files don’t hit stale caches"""
+  path = Path(path).resolve()
+  stat = path.stat()
+  return str(path), stat.st_size, stat.st_mtime_ns
+
+
+def file_cache_key(path, *params) -> str:
+  """Hash of the file identity and `params`, usable as a cache filename"""
+  return hashlib.sha1(repr((file_identity(path), params)).encode('utf-8')).hexdigest()
@@ -4,10 +4,10 @@ from pathlib import Path
 from dataclasses import dataclass, fields, Field
 from urllib.parse import quote
 from collections.abc import Sequence
-from xml.sax.saxutils import escape
 
-from .utils import format_seconds, clean_decimals
-from .ffmpeg import ffprobe
+from .utils import CACHE_DIR, format_seconds, clean_decimals, file_cache_key, escape_xml
+from .ffmpeg import ffprobe_path
+from .profiler import span
 
 
 # TODO FCP actually uses frameDuration="100/6000s", we 1/60, think about this
@@ -23,20 +23,28 @@ class FFProbe:
   codec_name: str = ''
   codec_type: str = ''
   has_b_frames: bool = False
+  pix_fmt: str = ''
+  profile: str = ''
 
   color_trc: str = ''
   colorspace: str = ''
   color_primaries: str = ''
 
 
+PROBE_DIR = CACHE_DIR / 'probe'
+INTRA_SAMPLE_PACKETS = 120
+"""Packets at the start of the file that must all be keyframes for considering it intraframe-coded"""
+
+
 class VideoAttr(FFProbe):
   def __init__(self, video):
     self._runtime_error = None
 
     self.path = Path(video)
-    self.name = escape(self.path.stem)
+    self.name = escape_xml(self.path.stem)
 
-    self.parse(fields(FFProbe))
+    with span('probe', video=self.path.name):
+      self.parse(fields(FFProbe))
     if not self.error:
       self.duration = float(self.duration)
       self.has_b_frames = self.has_b_frames > 0
@@ -100,58 +108,76 @@ class VideoAttr(FFProbe):
     intra_only_codecs = {
       'prores', 'dnxhd', 'dnxhr', 'mjpeg', 'png', 'dvvideo', 'qtrle', 'rawvideo', 'v210'
     }
-    if self.codec_name in intra_only_codecs:
-      return True
-    if self.has_b_frames:
-      return False
-    return self._has_interframe_packets()
-
-  def _has_interframe_packets(self, sample_frames: int = 120) -> bool:
-    """
-    Scans the start of the file for P or B frames.
-    This is for H264/HEVC/VP9 that might be all-intraframe.
-    """
-    cmd = [
-      ffprobe,
-      '-v', 'error',
-      '-select_streams', 'v:0',
-      '-read_intervals', f'%+#{sample_frames}',
-      '-show_entries', 'frame=pict_type',
-      '-of', 'csv=p=0',
-      str(self.path)
-    ]
-    try:
-      out = subprocess.check_output(cmd, stderr=subprocess.DEVNULL).decode('utf-8', 'ignore')
-      if not out.strip():
+    with span('intra-check', codec=self.codec_name):
+      if self.codec_name in intra_only_codecs:
+        return True
+      if self.has_b_frames:
         return False
-      return not any(f in out for f in ('P', 'B'))
-    except (subprocess.CalledProcessError, FileNotFoundError):
-      self._runtime_error = "ffprobe failed to sample frames"
-      return False
-    except Exception as e:
-      self._runtime_error = f"Unexpected error during intra-check: {e}"
-      return False
+      return self._sampled_keyframes_only
 
 
   def parse(self, attrs: Sequence[Field]):
     attr_names = [f.name for f in attrs]
-    json_out = self.ffprobe(*attr_names)
+    probe = self.probe(*attr_names)
+    stream = probe.get('stream', {})
     for attr in attr_names:
-      setattr(self, attr, json_out.get(attr, ''))
+      setattr(self, attr, stream.get(attr, ''))
+    if self.duration in ('', 'N/A'):  # e.g., Matroska only has the container duration
+      self.duration = probe.get('format_duration', '') or 0
+    self._sampled_keyframes_only = probe.get('keyframes_only', False)
+
+  def probe(self, *attrs) -> dict:
+    """Stream fields, format duration, and keyframe sampling, in one cached FFprobe
 
-  def ffprobe(self, *attrs) -> dict[str, str]:
+    The cache is keyed by the path, size, and mtime of the file, so repeated
+    runs (e.g., batches over network mounts) don’t spawn any process.
+    """
+    with span('probe cache'):
+      try:
+        cache_file = PROBE_DIR / f'{file_cache_key(self.path, attrs)}.json'
+      except OSError:  # FFprobe reports it
+        cache_file = None
+      try:
+        if cache_file:
+          return json.loads(cache_file.read_text(encoding='utf-8'))
+      except (OSError, ValueError):
+        pass
+
+    with span('ffprobe'):
+      probe = self.ffprobe(*attrs)
+    if probe and cache_file:
+      try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache_file.with_suffix('.tmp')
+        tmp.write_text(json.dumps(probe), encoding='utf-8')
+        tmp.replace(cache_file)
+      except OSError:
+        pass  # The cache is an optimization
+    return probe
+
+  def ffprobe(self, *attrs) -> dict:
+    """
+    The flags of the first `INTRA_SAMPLE_PACKETS` packets tell if it’s
+    all-intraframe (e.g., H.264 encoded with `-g 1`), without decoding them.
+    """
     cmd = [
-      ffprobe,
+      ffprobe_path(),
       '-hide_banner',
       '-select_streams', 'v:0',
-      '-show_entries', f'stream={",".join(attrs)}',
+      '-read_intervals', f'%+#{INTRA_SAMPLE_PACKETS}',
+      '-show_entries', f'stream={",".join(attrs)}:format=duration:packet=flags',
       '-of', 'json',
       self.path
     ]
     try:
-      out = subprocess.check_output(cmd, stderr=subprocess.PIPE).decode('utf-8')
-      stream = json.loads(out).get('streams', [{}])[0]
-      return {attr: stream.get(attr, '') for attr in attrs}
+      out = json.loads(subprocess.check_output(cmd, stderr=subprocess.PIPE).decode('utf-8'))
+      stream = out.get('streams', [{}])[0]
+      packets = out.get('packets', [])
+      return {
+        'stream': {attr: stream.get(attr, '') for attr in attrs},
+        'format_duration': out.get('format', {}).get('duration', ''),
+        'keyframes_only': bool(packets) and all('K' in p.get('flags', '') for p in packets),
+      }
     except Exception as e:
       self._runtime_error = f'{e}'
     return {}
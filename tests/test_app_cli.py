@@ -0,0 +1,113 @@
+import sys
+import argparse
+import json
+import unittest
+import tempfile
+import subprocess
+from pathlib import Path
+
+from fcpscene import PROXY_WIDTH, MIN_SCENE_SECS, DEFAULT_SENSITIVITY
+from fcpscene.app_cli import expand_videos, check_detection_options
+from fcpscene.event_bus import EventBus
+from fcpscene.video_attr import VideoAttr
+from fcpscene.detect_scene_changes import detect_scene_changes
+
+
+class ExpandVideos(unittest.TestCase):
+  def setUp(self):
+    self.tmp = tempfile.TemporaryDirectory()
+    self.dir = Path(self.tmp.name)
+    for name in ['b.mov', 'a.mp4', 'notes.txt', 'c.MOV']:
+      (self.dir / name).touch()
+    (self.dir / 'sub').mkdir()
+    (self.dir / 'sub' / 'd.mp4').touch()
+
+  def tearDown(self):
+    self.tmp.cleanup()
+
+  def test_directory_videos_not_recursive(self):
+    self.assertEqual(expand_videos([str(self.dir)]),
+                     [self.dir / 'a.mp4', self.dir / 'b.mov', self.dir / 'c.MOV'])
+
+  def test_glob(self):
+    self.assertEqual(expand_videos([str(self.dir / '*.mov')]), [self.dir / 'b.mov'])
+
+  def test_literal_paths_are_kept_even_if_missing(self):
+    self.assertEqual(expand_videos(['missing.mp4']), [Path('missing.mp4')])
+
+  def test_no_matches_is_an_error(self):
+    (self.dir / 'empty').mkdir()
+    for pattern in [self.dir / '*.mkv', self.dir / 'empty']:
+      with self.subTest(pattern=pattern.name):
+        result = subprocess.run([sys.executable, '-m', 'fcpscene.app_cli', pattern], capture_output=True, text=True)
+        self.assertEqual(result.returncode, 1)
+        self.assertIn(f'No videos match {pattern}', result.stderr)
+
+  def test_duplicates_are_removed(self):
+    a = str(self.dir / 'a.mp4')
+    self.assertEqual(expand_videos([a, str(self.dir / '*.mp4'), a]), [Path(a)])
+
+
+class DetectionOptions(unittest.TestCase):
+  def cli(self, *args) -> subprocess.CompletedProcess:
+    video = Path(__file__).resolve().parent / 'fixtures' / '60fps.mp4'
+    return subprocess.run([sys.executable, '-m', 'fcpscene.app_cli', '-q', '-m', 'count', *args, video],
+                          capture_output=True, text=True)
+
+  def test_ignored_options_are_rejected(self):
+    for args, error in [
+      (['--strategy', 'two-pass', '--jobs', '2'], '--strategy two-pass can\'t be combined with --jobs'),
+      (['--strategy', 'two-pass', '--resume', '--score-cache'], '--strategy two-pass can\'t be combined with --resume, --score-cache'),
+      (['--engine', 'numpy', '--strategy', 'two-pass'], '--engine numpy can\'t be combined with --strategy'),
+      (['--engine', 'numpy', '--jobs', '2', '--resume'], '--engine numpy can\'t be combined with --jobs, --resume'),
+      (['--score-cache', '--resume'], '--score-cache can\'t be combined with --resume'),
+      (['--resume', '--jobs', '2'], '--resume can\'t be combined with --jobs'),
+    ]:
+      with self.subTest(args=args):
+        result = self.cli(*args)
+        self.assertEqual(result.returncode, 2)
+        self.assertIn(error, result.stderr)
+
+  def test_jobs_export_in_parallel_in_files_mode(self):
+    args = argparse.Namespace(jobs=2, mode='files', engine='numpy', strategy='one-pass', resume=False, score_cache=False)
+    check_detection_options(argparse.ArgumentParser(), args, streaming=False)  # doesn’t exit
+
+
+class LazyImports(unittest.TestCase):
+  def test_cli_does_not_import_what_only_some_modes_use(self):
+    out = subprocess.check_output([sys.executable, '-c',
+                                   'import sys, fcpscene.app_cli; print(*sys.modules)'], text=True)
+    imported = set(out.split())
+    for module in [
+      'fcpscene.to_file_clips',
+      'fcpscene.fcpxml_writer',
+      'fcpscene.detect_scene_changes_parallel',
+      'concurrent.futures',
+      'urllib.request',
+      'typing',
+    ]:
+      self.assertNotIn(module, imported)
+
+  def test_ffmpeg_is_looked_up_on_first_use(self):
+    out = subprocess.check_output([sys.executable, '-c',
+                                   'import fcpscene.app_cli, fcpscene.video_attr, fcpscene.detect_scene_changes;'
+                                   'from fcpscene import ffmpeg; print(len(ffmpeg._paths))'], text=True)
+    self.assertEqual(out.strip(), '0')
+
+
+class Streaming(unittest.TestCase):
+  def test_stdin_prints_the_cuts_as_ndjson(self):
+    fixtures = Path(__file__).resolve().parent / 'fixtures'
+    for name in ['60fps.mp4', '2997 fps.mp4']:
+      with self.subTest(name=name):
+        with open(fixtures / name, 'rb') as f:
+          out = subprocess.check_output([sys.executable, '-m', 'fcpscene.app_cli', '-'], stdin=f, text=True)
+        times = [json.loads(line)['time'] for line in out.splitlines()]
+
+        v = VideoAttr(fixtures / name)
+        cuts = detect_scene_changes(v, EventBus(), DEFAULT_SENSITIVITY, PROXY_WIDTH, MIN_SCENE_SECS)
+        self.assertEqual(times, cuts[1:-1])
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,153 @@
+import json
+import time
+import tempfile
+import unittest
+import threading
+from pathlib import Path
+from unittest import mock
+from types import SimpleNamespace
+from urllib.request import Request, urlopen
+from urllib.error import HTTPError
+
+from fcpscene import app_server
+from fcpscene.ffmpeg_output import ProgressStats
+
+
+def fake_video(path):
+  return SimpleNamespace(
+    error='',
+    name='video',
+    width=1920,
+    height=1080,
+    fps=30,
+    fps_numerator=30,
+    fps_denominator=1,
+    fcp_color_space='1-1-1',
+    file_uri='file:///tmp/video.mp4',
+    duration=10.0)
+
+
+class JobServer(unittest.TestCase):
+  def setUp(self):
+    tmp = tempfile.TemporaryDirectory()
+    self.addCleanup(tmp.cleanup)
+    self.video = Path(tmp.name) / 'video.mp4'
+    self.video.write_bytes(b'fake')
+
+    self.detect = mock.Mock(return_value=[0, 2.5, 5, 10.0])
+    for patcher in [
+      mock.patch.object(app_server, 'VideoAttr', side_effect=fake_video),
+      mock.patch.object(app_server, 'detect', self.detect),
+    ]:
+      patcher.start()
+      self.addCleanup(patcher.stop)
+
+    self.server = app_server.make_server('127.0.0.1', 0, workers=1)
+    threading.Thread(target=self.server.serve_forever, daemon=True).start()
+    self.addCleanup(self.server.server_close)
+    self.addCleanup(self.server.shutdown)
+    self.url = f'http://127.0.0.1:{self.server.server_port}'
+
+  def request(self, method, path, body=None) -> tuple[int, str]:
+    data = json.dumps(body).encode() if body is not None else None
+    try:
+      with urlopen(Request(self.url + path, data=data, method=method), timeout=5) as res:
+        return res.status, res.read().decode()
+    except HTTPError as e:
+      return e.code, e.read().decode()
+
+  def submit(self, **options) -> tuple[int, dict]:
+    status, body = self.request('POST', '/jobs', {'video': str(self.video), **options})
+    return status, json.loads(body)
+
+  def wait_done(self, job_id) -> dict:
+    for _ in range(100):
+      job = json.loads(self.request('GET', f'/jobs/{job_id}')[1])
+      if job['status'] not in ('queued', 'running'):
+        return job
+      time.sleep(0.02)
+    self.fail('The job did not finish')
+
+  def test_results(self):
+    status, job = self.submit(mode='list')
+    self.assertEqual(status, 202)
+    self.assertEqual(self.wait_done(job['id'])['status'], 'done')
+    self.assertEqual(self.request('GET', f'/jobs/{job["id"]}/result'), (200, '2.5 5\n'))
+    self.assertEqual(self.request('GET', f'/jobs/{job["id"]}/result?mode=count'), (200, '2\n'))
+    self.assertEqual(self.request('GET', f'/jobs/{job["id"]}/result?mode=clips&format=csv'),
+                     (200, 'start,end\n0,2.5\n2.5,5\n5,10\n'))
+    status, fcpxml = self.request('GET', f'/jobs/{job["id"]}/result?mode=markers')
+    self.assertEqual(status, 200)
+    self.assertIn('<marker start="75/30s"', fcpxml)
+
+  def test_identical_requests_are_cached(self):
+    _, job = self.submit(sensitivity=80)
+    self.wait_done(job['id'])
+    status, again = self.submit(sensitivity=80)
+    self.assertEqual((status, again['id'], again['status']), (200, job['id'], 'done'))
+    self.assertEqual(self.detect.call_count, 1)
+
+    _, other = self.submit(sensitivity=70)
+    self.assertNotEqual(other['id'], job['id'])
+
+  def test_modified_video_is_not_cached(self):
+    _, job = self.submit()
+    self.wait_done(job['id'])
+    self.video.write_bytes(b'modified')
+    _, again = self.submit()
+    self.assertNotEqual(again['id'], job['id'])
+
+  def test_files_mode_reports_the_export(self):
+    during_export = []
+
+    def process_cuts(cuts, v, mode, out_file, quiet, bus):
+      bus.emit_export_progress(1, 4)
+      bus.emit_export_stats(ProgressStats(progress=0.6, out_time=6, fps=300, speed=10, eta=0.44))
+      during_export.extend(json.loads(self.request('GET', '/jobs')[1])['jobs'])
+      return '/videos/video'
+
+    with mock.patch.object(app_server, 'process_cuts', process_cuts):
+      _, job = self.submit(mode='files')
+      done = self.wait_done(job['id'])
+    self.assertEqual([(j['stage'], j['progress'], j['eta']) for j in during_export], [('export', 0.6, 0.4)])
+    self.assertEqual((done['status'], done['progress'], done['output']), ('done', 1, '/videos/video'))
+    self.assertEqual(self.request('GET', f'/jobs/{job["id"]}/result'), (200, '{"output": "/videos/video"}'))
+
+  def test_cancel_running_job(self):
+    started = threading.Event()
+
+    def detect(v, bus, args):
+      stopped = threading.Event()
+      bus.subscribe_stop(stopped.set)
+      started.set()
+      stopped.wait(5)
+      return [0, 10.0]
+
+    self.detect.side_effect = detect
+    _, job = self.submit()
+    self.assertTrue(started.wait(5))
+    status, cancelled = self.request('DELETE', f'/jobs/{job["id"]}')
+    self.assertEqual((status, json.loads(cancelled)['status']), (200, 'cancelled'))
+    self.assertEqual(self.wait_done(job['id'])['status'], 'cancelled')
+    self.assertEqual(self.request('GET', f'/jobs/{job["id"]}/result')[0], 409)
+
+  def test_cancel_queued_job(self):
+    release = threading.Event()
+    self.detect.side_effect = lambda v, bus, args: release.wait(5) and [0, 10.0]
+    _, running = self.submit(sensitivity=80)
+    _, queued = self.submit(sensitivity=70)  # one worker
+    self.assertEqual(self.request('DELETE', f'/jobs/{queued["id"]}')[0], 200)
+    release.set()
+    self.assertEqual(self.wait_done(running['id'])['status'], 'done')
+    self.assertEqual(self.wait_done(queued['id'])['status'], 'cancelled')
+    self.assertEqual(self.detect.call_count, 1)
+
+  def test_errors(self):
+    self.assertEqual(self.submit(mode='unknown')[0], 400)
+    self.assertEqual(self.submit(sensitivity=101)[0], 400)
+    self.assertEqual(self.request('POST', '/jobs', {'video': '/missing.mp4'})[0], 400)
+    self.assertEqual(self.request('GET', '/jobs/999')[0], 404)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,123 @@
+import unittest
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+from types import SimpleNamespace
+
+from fcpscene import PROXY_WIDTH, MIN_SCENE_SECS, DEFAULT_SENSITIVITY
+from fcpscene.app_cli import detect
+from fcpscene.event_bus import EventBus
+from fcpscene.detect_engines import DEFAULT_ENGINE
+from fcpscene.video_attr import VideoAttr
+from fcpscene.detect_scene_changes import detect_scene_changes, filter_min_scene
+from fcpscene.checkpoint import (
+  Checkpoint, Checkpointer, save_checkpoint, load_checkpoint, checkpoint_path,
+  detect_scene_changes_resumable, CHECKPOINT_LAG_SECS)
+
+
+class CheckpointMerge(unittest.TestCase):
+  candidates = [1, 1.3, 1.5, 2, 2.4, 3.1, 3.2, 5, 5.5, 8]
+  duration = 10
+  min_scene_secs = 0.6
+
+  def resumed(self, pts):
+    """Cuts of a run interrupted at `pts` and resumed from its checkpoint"""
+    uninterrupted = filter_min_scene(self.candidates, self.min_scene_secs)
+    prior = Checkpoint(pts, [c for c in uninterrupted if c <= pts])
+    checkpointer = Checkpointer(Path('unused'), prior, self.duration, self.min_scene_secs)
+    return checkpointer.merge([c for c in self.candidates if c > pts])
+
+  def test_same_as_uninterrupted(self):
+    expected = filter_min_scene(self.candidates, self.min_scene_secs)
+    for pts in [0, 1, 1.4, 2.1, 3.15, 4, 9]:
+      with self.subTest(pts=pts):
+        self.assertEqual(self.resumed(pts), expected)
+
+  def test_checkpoint_lags_progress(self):
+    checkpointer = Checkpointer(Path('unused'), Checkpoint(), self.duration, 0, period=float('inf'))
+    checkpointer.update(0.5, [0, 1, 3.5, 4.5])
+    self.assertEqual(checkpointer.latest, Checkpoint(5 - CHECKPOINT_LAG_SECS, [0, 1, 3.5]))
+
+  def test_checkpoint_is_frame_aligned(self):
+    checkpointer = Checkpointer(Path('unused'), Checkpoint(), 30, 0, period=float('inf'), fps=60)
+    checkpointer.update(0.7007, [0, 5, 10, 15, 20])
+    self.assertEqual(checkpointer.latest.pts, 20.016667)  # 20.021 rounded down to a frame
+
+  def test_final_checkpoint_uses_the_final_cuts(self):
+    checkpointer = Checkpointer(Path('unused'), Checkpoint(), self.duration, 0, period=float('inf'))
+    checkpointer.update(0.5, [0, 1])  # 3.5 and 4.5 aren’t parsed yet
+    with patch('fcpscene.checkpoint.save_checkpoint') as save:
+      checkpointer.save_final([0, 1, 3.5, 4.5], drained=True)
+    save.assert_called_once_with(Path('unused'), Checkpoint(5, [0, 1, 3.5, 4.5]))
+
+  def test_final_checkpoint_lags_if_not_drained(self):
+    checkpointer = Checkpointer(Path('unused'), Checkpoint(), self.duration, 0, period=float('inf'))
+    checkpointer.update(0.5, [0, 1])
+    with patch('fcpscene.checkpoint.save_checkpoint') as save:
+      checkpointer.save_final([0, 1, 3.5, 4.5], drained=False)
+    save.assert_called_once_with(Path('unused'), Checkpoint(5 - CHECKPOINT_LAG_SECS, [0, 1, 3.5]))
+
+
+class ResumeDetection(unittest.TestCase):
+  def setUp(self):
+    self.v = VideoAttr(Path(__file__).resolve().parent / 'fixtures' / '60fps.mp4')
+    self.args = (DEFAULT_SENSITIVITY, PROXY_WIDTH, MIN_SCENE_SECS)
+    tmp = tempfile.TemporaryDirectory()
+    self.addCleanup(tmp.cleanup)
+    checkpoints_dir = patch('fcpscene.checkpoint.CHECKPOINTS_DIR', Path(tmp.name))
+    checkpoints_dir.start()
+    self.addCleanup(checkpoints_dir.stop)
+    self.uninterrupted = detect_scene_changes(self.v, EventBus(), *self.args)
+
+  def resume(self):
+    return detect_scene_changes_resumable(self.v, EventBus(), *self.args, resume=True)
+
+  def test_resume_from_unaligned_checkpoint(self):
+    pts = 20.02
+    path = checkpoint_path(self.v, *self.args)
+    save_checkpoint(path, Checkpoint(pts, [c for c in self.uninterrupted if c <= pts]))
+    self.assertEqual(self.resume(), self.uninterrupted)
+    self.assertFalse(path.exists())
+
+  def test_interrupt_and_resume(self):
+    bus = EventBus()
+
+    def on_progress(progress, _cuts):
+      if progress > 0.5:
+        bus.emit_stop()
+
+    bus.subscribe_progress(on_progress)
+    detect_scene_changes_resumable(self.v, bus, *self.args)
+    checkpoint = load_checkpoint(checkpoint_path(self.v, *self.args))
+    self.assertGreater(checkpoint.pts, 0.5 * self.v.duration)  # not lagged, since the UI stop drains FFmpeg
+    self.assertEqual(checkpoint.pts, round(round(checkpoint.pts * self.v.fps) / self.v.fps, 6))
+    self.assertEqual(checkpoint.cuts, [c for c in self.uninterrupted if c <= checkpoint.pts])
+    self.assertEqual(self.resume(), self.uninterrupted)
+
+  def test_cli_checkpoints_by_default(self):
+    args = SimpleNamespace(engine=DEFAULT_ENGINE, strategy='one-pass', score_cache=False, jobs=1, resume=False,
+                           sensitivity=DEFAULT_SENSITIVITY, proxy_width=PROXY_WIDTH, min_scene_seconds=MIN_SCENE_SECS)
+    for checkpoints in [True, False]:
+      with self.subTest(checkpoints=checkpoints), \
+           patch('fcpscene.scene_scores.load_scene_scores', return_value=None), \
+           patch('fcpscene.checkpoint.save_checkpoint') as save:
+        bus = EventBus()
+        bus.subscribe_progress(lambda progress, _cuts: progress > 0.5 and bus.emit_stop())
+        args.checkpoints = checkpoints
+        detect(self.v, bus, args)
+        self.assertEqual(save.called, checkpoints)
+
+
+class CheckpointFile(unittest.TestCase):
+  def test_round_trip(self):
+    with tempfile.TemporaryDirectory() as tmp:
+      path = Path(tmp) / 'a' / 'checkpoint.json'
+      save_checkpoint(path, Checkpoint(12.5, [0, 3.2, 7.016667]))
+      self.assertEqual(load_checkpoint(path), Checkpoint(12.5, [0, 3.2, 7.016667]))
+
+  def test_missing(self):
+    self.assertIsNone(load_checkpoint(Path('/nonexistent/checkpoint.json')))
+
+
+if __name__ == '__main__':
+  unittest.main()
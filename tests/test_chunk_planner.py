@@ -0,0 +1,36 @@
+import unittest
+from pathlib import Path
+
+from fcpscene.video_attr import VideoAttr
+from fcpscene.chunk_planner import KeyframeIndex, keyframe_index, plan_chunks
+
+
+class KeyframeLookup(unittest.TestCase):
+  def setUp(self):
+    self.index = KeyframeIndex(times=[0, 2, 4, 6])
+
+  def test_at_or_before(self): self.assertEqual(self.index.at_or_before(3.5), 2)
+
+  def test_at_or_before_on_keyframe(self): self.assertEqual(self.index.at_or_before(4), 4)
+
+  def test_after(self): self.assertEqual(self.index.after(2), 4)
+
+  def test_after_last(self): self.assertIsNone(self.index.after(6))
+
+
+class ChunkPlanner(unittest.TestCase):
+  def setUp(self):
+    self.fixtures = Path(__file__).resolve().parent / 'fixtures'
+
+  def test_chunks_start_on_keyframes(self):
+    v = VideoAttr(self.fixtures / '60fps.mp4')
+    keyframes = keyframe_index(v).times
+    chunks = plan_chunks(v, 10)
+    self.assertEqual(chunks[0][0], 0)
+    self.assertEqual(chunks[-1][1], v.duration)
+    for start, _ in chunks:
+      self.assertIn(start, keyframes)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+from types import SimpleNamespace
+
+from fcpscene.cuts_to_clips import ClipTable, FcpClip, FileClip, cut_frames, cuts_to_file_clips
+
+
+class CutFrames(unittest.TestCase):
+  def test_frame_times_round_down(self):
+    for num, den in [(60, 1), (30000, 1001), (24000, 1001), (25, 1)]:
+      with self.subTest(fps=f'{num}/{den}'):
+        times = [round(i * den / num, 6) for i in range(10_000)]
+        self.assertEqual(cut_frames(times, num, den), list(range(10_000)))
+
+  def test_between_frames_round_up(self):
+    self.assertEqual(cut_frames([0.01, 0.5001], 60, 1), [1, 31])
+
+
+class ClipTableClips(unittest.TestCase):
+  def test_clips(self):
+    v = SimpleNamespace(fps_numerator=30000, fps_denominator=1001)
+    table = ClipTable([0, 1.001, 2.5], v)
+    self.assertEqual(len(table), 2)
+    self.assertEqual(list(table), [
+      FcpClip(seq='1', ref_id='r3', offset='0s', duration='30030/30000s'),
+      FcpClip(seq='2', ref_id='r4', offset='30030/30000s', duration='45045/30000s'),
+    ])
+
+
+class FileClips(unittest.TestCase):
+  def test_without_video_keeps_the_times(self):
+    self.assertEqual(cuts_to_file_clips([0, 1.0005, 2.5]), [
+      FileClip(seq='1', start=0, end=1.0005),
+      FileClip(seq='2', start=1.0005, end=2.5),
+    ])
+
+  def test_same_frames_as_fcp_clips(self):
+    v = SimpleNamespace(fps_numerator=30000, fps_denominator=1001)
+    cuts = [0, 1.0005, 1.017684, 2.5, 3.0031]
+    table = ClipTable(cuts, v)
+    for i, clip in enumerate(cuts_to_file_clips(cuts, v)):
+      with self.subTest(clip=clip.seq):
+        self.assertEqual(round(clip.start * 30000), table.offsets[i])
+        self.assertEqual(round((clip.end - clip.start) * 30000), table.durations[i])
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+from pathlib import Path
+from unittest import mock
+from importlib.util import find_spec
+
+from fcpscene import PROXY_WIDTH, MIN_SCENE_SECS, DEFAULT_SENSITIVITY
+from fcpscene.event_bus import EventBus
+from fcpscene.video_attr import VideoAttr
+from fcpscene.detect_engines import get_engine
+
+
+class DetectEngines(unittest.TestCase):
+  def setUp(self):
+    self.fixtures = Path(__file__).resolve().parent / 'fixtures'
+
+  def test_unknown_engine(self):
+    with self.assertRaises(ValueError):
+      get_engine('opencv')
+
+  def test_missing_optional_dependency(self):
+    with mock.patch('importlib.util.find_spec', return_value=None):
+      with self.assertRaisesRegex(RuntimeError, r'pip install "fcpscene\[numpy\]"'):
+        get_engine('numpy')
+
+  @unittest.skipUnless(find_spec('numpy'), 'Needs numpy')
+  def test_numpy_matches_ffmpeg_60fps(self):
+    v = VideoAttr(self.fixtures / '60fps.mp4')
+    expected = self._detect('ffmpeg', v)
+    self.assertEqual(self._detect('numpy', v), expected)
+    self.assertEqual(self._detect('numpy', v, metric='hist'), expected)
+
+  def _detect(self, engine, v, **kwargs):
+    return get_engine(engine)(v, EventBus(), DEFAULT_SENSITIVITY, PROXY_WIDTH, MIN_SCENE_SECS, **kwargs)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+import tempfile
+from pathlib import Path
+
+from fcpscene.cuts_to_clips import cuts_to_file_clips
+from fcpscene.export_manifest import ExportManifest
+
+SETTINGS = ['-c:v', 'libx264']
+
+
+class ExportManifestReuse(unittest.TestCase):
+  def setUp(self):
+    self.tmp = tempfile.TemporaryDirectory()
+    self.dir = Path(self.tmp.name)
+    self.export([0, 5, 10, 15])
+
+  def tearDown(self):
+    self.tmp.cleanup()
+
+  def export(self, cuts):
+    """Simulates an export, where each file holds its time range"""
+    manifest = ExportManifest.load(self.dir)
+    clips = cuts_to_file_clips(cuts)
+    names = self.names(clips)
+    pending = manifest.reuse(clips, names, SETTINGS)
+    for i in pending:
+      (self.dir / names[i]).write_text(f'{clips[i].start}-{clips[i].end}')
+      manifest.record(clips[i], names[i], SETTINGS)
+    manifest.save()
+    return pending
+
+  def names(self, clips):
+    return [f'vid_{c.seq}.mp4' for c in clips]
+
+  def test_unchanged(self):
+    self.assertEqual(self.export([0, 5, 10, 15]), [])
+
+  def test_changed_cut(self):
+    self.assertEqual(self.export([0, 5, 12, 15]), [1, 2])
+
+  def test_missing_file(self):
+    (self.dir / 'vid_2.mp4').unlink()
+    self.assertEqual(self.export([0, 5, 10, 15]), [1])
+
+  def test_modified_file(self):
+    (self.dir / 'vid_3.mp4').write_text('other')
+    self.assertEqual(self.export([0, 5, 10, 15]), [2])
+
+  def test_other_settings(self):
+    clips = cuts_to_file_clips([0, 5, 10, 15])
+    self.assertEqual(ExportManifest.load(self.dir).reuse(clips, self.names(clips), ['-c:v', 'copy']), [0, 1, 2])
+
+  def test_shifted_sequence_numbers_are_renamed(self):
+    self.assertEqual(self.export([0, 2, 5, 10, 15]), [0, 1])
+    self.assertEqual((self.dir / 'vid_3.mp4').read_text(), '5-10')
+    self.assertEqual((self.dir / 'vid_4.mp4').read_text(), '10-15')
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,198 @@
+import re
+import asyncio
+import unittest
+import tempfile
+import subprocess
+from shutil import rmtree
+from pathlib import Path
+from functools import cache
+from unittest import mock
+
+from fcpscene import PROXY_WIDTH, MIN_SCENE_SECS
+from fcpscene.ffmpeg import ffmpeg, ffprobe
+from fcpscene.event_bus import EventBus
+from fcpscene.video_attr import VideoAttr
+from fcpscene.chunk_planner import KeyframeIndex
+from fcpscene import to_file_clips as to_file_clips_module
+from fcpscene.to_file_clips import to_file_clips, vcodec_for
+from fcpscene.cuts_to_clips import cuts_to_file_clips
+from fcpscene.export_manifest import ExportManifest, source_settings
+from fcpscene.to_file_clips_async import to_file_clips_async
+from fcpscene.to_file_clips_smart import can_smart_render, plan_smart_render, smart_render_steps
+from fcpscene.detect_scene_changes import detect_scene_changes
+
+
+class ReExport(unittest.TestCase):
+  def setUp(self):
+    tmp = tempfile.TemporaryDirectory()
+    self.addCleanup(tmp.cleanup)
+    self.source = Path(tmp.name) / 'vid.mp4'
+    self.source.write_bytes((Path(__file__).resolve().parent / 'fixtures' / '60fps.mp4').read_bytes())
+    self.output_dir = Path(tmp.name) / 'vid'
+
+  def export(self) -> dict[str, int]:
+    """mtime of each clip file"""
+    to_file_clips([0, 1, 2], VideoAttr(self.source), EventBus(), strategy='reencode')
+    return {f.name: f.stat().st_mtime_ns for f in self.output_dir.glob('*.mp4')}
+
+  def test_unchanged_source_reuses_the_clips(self):
+    first = self.export()
+    self.assertEqual(self.export(), first)
+
+  def test_replaced_source_exports_again(self):
+    first = self.export()
+    self.source.write_bytes(self.source.read_bytes())  # same content and path, new mtime
+    second = self.export()
+    self.assertEqual(second.keys(), first.keys())
+    for name in first:
+      self.assertNotEqual(second[name], first[name], name)
+
+
+@cache
+def demuxes_mpegts() -> bool:
+  """Some static FFmpeg builds crash reading MPEG-TS"""
+  with tempfile.TemporaryDirectory() as tmp:
+    ts = Path(tmp) / 'a.ts'
+    subprocess.run([ffmpeg, '-v', 'error', '-f', 'lavfi', '-i', 'testsrc=d=0.1', ts], capture_output=True)
+    return subprocess.run([ffmpeg, '-v', 'error', '-i', ts, '-f', 'null', '-'], capture_output=True).returncode == 0
+
+
+class SmartRenderPlan(unittest.TestCase):
+  def setUp(self):
+    self.keyframes = KeyframeIndex(times=[0, 2, 4, 6])
+
+  def test_cut_on_keyframe_has_no_head(self):
+    self.assertIsNone(plan_smart_render(2 + 0.2 / 60, 5, self.keyframes, 60).head)
+
+  def test_end_on_keyframe_has_no_tail(self):
+    self.assertIsNone(plan_smart_render(1, 4, self.keyframes, 60).tail)
+
+  def test_spanning_gops(self):
+    plan = plan_smart_render(0.5, 7, self.keyframes, 60)
+    self.assertEqual((plan.head, plan.body, plan.tail), ((0.5, 2), (2, 6), (6, 7)))
+
+  def test_only_when_the_encoder_matches_the_source(self):
+    fixtures = Path(__file__).resolve().parent / 'fixtures'
+    self.assertTrue(can_smart_render(VideoAttr(fixtures / '60fps.mp4')))  # H.264 High, yuv420p
+    self.assertFalse(can_smart_render(VideoAttr(fixtures / '60fps_prores.mov')))
+
+  def test_joined_clip_keeps_the_parameter_sets_in_band(self):
+    v = VideoAttr(Path(__file__).resolve().parent / 'fixtures' / '60fps.mp4')
+    clip, = cuts_to_file_clips([0.5, 7], v)
+    with tempfile.TemporaryDirectory() as tmp:
+      steps = smart_render_steps(clip, v, self.keyframes, vcodec_for(v), Path(tmp) / 'out.mp4', Path(tmp))
+    join = steps[-1][0]
+    self.assertEqual(join[join.index('-tag:v') + 1], 'avc3')
+
+
+class ExportStrategies(unittest.TestCase):
+  """The clips must have the same frames as the ones of the re-encode strategy"""
+
+  @unittest.skipUnless(demuxes_mpegts(), 'This FFmpeg build can’t read MPEG-TS, which smart render joins')
+  def test_smart(self):
+    exported = self._compare(lambda cuts, v: to_file_clips(cuts, v, EventBus(), strategy='smart'))
+    self.assertEqual(set(exported.values()), {'avc3'})  # parameter sets in-band
+
+  def test_multi_output(self): self._compare(lambda cuts, v: to_file_clips(cuts, v, EventBus(), strategy='multi-output'))
+
+  def test_async(self): self._compare(lambda cuts, v: asyncio.run(to_file_clips_async(cuts, v, EventBus(), jobs=2)))
+
+  def _compare(self, export):
+    v = VideoAttr(Path(__file__).resolve().parent / 'fixtures' / '60fps.mp4')
+    cuts = detect_scene_changes(v, EventBus(), sensitivity=85, proxy_width=PROXY_WIDTH, min_scene_secs=MIN_SCENE_SECS)
+    output_dir = v.path.parent / v.path.stem
+    reencode_dir = v.path.parent / f'{v.path.stem}_reencode'
+    for d in [output_dir, reencode_dir]:
+      if d.exists():
+        rmtree(d)
+
+    to_file_clips(cuts, v, EventBus(), strategy='reencode')
+    output_dir.rename(reencode_dir)
+    export(cuts, v)
+    codec_tags = {}
+    try:
+      reencoded = sorted(reencode_dir.glob(f'*{v.path.suffix}'))
+      exported = sorted(output_dir.glob(f'*{v.path.suffix}'))
+      self.assertEqual([f.name for f in exported], [f.name for f in reencoded])
+      for a, b in zip(reencoded, exported):
+        with self.subTest(clip=a.name):
+          self.assertEqual(count_frames(b), count_frames(a))
+          self.assertGreater(first_frame_psnr(a, b), 30)
+          self.assertDecodes(b)
+          codec_tags[b.name] = codec_tag(b)
+    finally:
+      rmtree(output_dir)
+      rmtree(reencode_dir)
+    return codec_tags
+
+  def assertDecodes(self, path):
+    """Without decoding errors, and with increasing timestamps"""
+    pts = [int(p.split(b',')[0]) for p in subprocess.check_output([
+      ffprobe, '-v', 'error', '-select_streams', 'v:0',
+      '-show_entries', 'frame=pts', '-of', 'csv=p=0', path
+    ]).split()]
+    self.assertEqual(pts, sorted(set(pts)))
+    decode = subprocess.run([ffmpeg, '-v', 'error', '-xerror', '-i', path, '-f', 'null', '-'], capture_output=True)
+    self.assertEqual(decode.returncode, 0, decode.stderr.decode())
+
+
+class ExportErrors(unittest.TestCase):
+  def setUp(self):
+    self.v = VideoAttr(Path(__file__).resolve().parent / 'fixtures' / '60fps.mp4')
+    self.output_dir = self.v.path.parent / self.v.path.stem
+    if self.output_dir.exists():
+      rmtree(self.output_dir)
+    self.addCleanup(rmtree, self.output_dir, ignore_errors=True)
+
+  def test_failing_clip_raises_with_the_ffmpeg_output(self):
+    with mock.patch('fcpscene.to_file_clips.vcodec_for', return_value=['-c:v', 'no_such_encoder']):
+      with self.assertRaisesRegex(RuntimeError, 'no_such_encoder'):
+        to_file_clips([0, 1, 2], self.v, EventBus(), strategy='reencode')
+
+  def test_other_clips_finish_and_failed_ones_are_not_reported(self):
+    def clip_cmd(clip, v, vcodec, out_file):
+      cmd = real_clip_cmd(clip, v, vcodec, out_file)
+      return cmd[:-1] + ['-c:v', 'no_such_encoder', out_file] if clip.seq == '2' else cmd
+
+    real_clip_cmd = to_file_clips_module.clip_cmd
+    bus = EventBus()
+    progress = []
+    bus.subscribe_export_progress(lambda current, total: progress.append(current))
+    with mock.patch.object(to_file_clips_module, 'clip_cmd', clip_cmd):
+      with self.assertRaisesRegex(RuntimeError, '60fps_2.mp4') as raised:
+        to_file_clips([0, 1, 2, 3], self.v, bus, jobs=2, strategy='reencode')
+
+    self.assertNotIn('60fps_1.mp4', str(raised.exception))
+    self.assertEqual(progress, [1, 2])  # the 2nd is the first unfinished, so the 3rd isn’t reported
+    self.assertTrue((self.output_dir / '60fps_3.mp4').exists())
+    manifest = ExportManifest.load(self.output_dir)
+    self.assertEqual(manifest.reuse(cuts_to_file_clips([0, 1, 2, 3], self.v), ['60fps_1.mp4', '60fps_2.mp4', '60fps_3.mp4'],
+                                    source_settings(self.v.path, vcodec_for(self.v))), [1])
+
+
+def count_frames(path) -> int:
+  return int(subprocess.check_output([
+    ffprobe, '-v', 'error', '-select_streams', 'v:0', '-count_frames',
+    '-show_entries', 'stream=nb_read_frames', '-of', 'csv=p=0', path
+  ]).strip())
+
+
+def codec_tag(path) -> str:
+  return subprocess.check_output([
+    ffprobe, '-v', 'error', '-select_streams', 'v:0',
+    '-show_entries', 'stream=codec_tag_string', '-of', 'csv=p=0', path
+  ]).decode().strip()
+
+
+def first_frame_psnr(a, b) -> float:
+  """A clip starting one frame off, at a scene change, has a very low PSNR"""
+  out = subprocess.run([
+    ffmpeg, '-hide_banner', '-i', a, '-i', b,
+    '-filter_complex', 'psnr', '-frames:v', '1', '-f', 'null', '-'
+  ], capture_output=True).stderr.decode()
+  value = re.search(r'average:(\S+)', out).group(1)
+  return float('inf') if value == 'inf' else float(value)
+
+
+if __name__ == '__main__':
+  unittest.main()
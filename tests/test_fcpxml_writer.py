@@ -0,0 +1,70 @@
+import io
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+from fcpscene.video_attr import VideoAttr
+from fcpscene.fcpxml_writer import FCPXML_MODES, iter_fcpxml, write_fcpxml
+from fcpscene.to_fcpxml_clips import to_fcpxml_clips
+
+VIDEO_DIR_PLACEHOLDER = '__VIDEO_DIR_PLACEHOLDER__'
+
+
+class FcpxmlWriter(unittest.TestCase):
+  def setUp(self):
+    self.v = SimpleNamespace(name='vid', width=1920, height=1080, fps=30, fps_numerator=30, fps_denominator=1,
+                             fcp_color_space='1-1-1 (Rec. 709)', file_uri='file:///tmp/vid.mov')
+    self.cuts = [0, *[i + 0.5 for i in range(2500)], 2501]
+
+  def test_streaming_equals_string(self):
+    for mode in FCPXML_MODES:
+      with self.subTest(mode=mode):
+        f = io.StringIO()
+        write_fcpxml(f, self.cuts, self.v, mode)
+        self.assertEqual(f.getvalue(), ''.join(iter_fcpxml(self.cuts, self.v, mode)))
+
+  def test_clips_are_batched(self):
+    chunks = list(iter_fcpxml(self.cuts, self.v, 'clips'))
+    self.assertEqual(len(chunks), 1 + 1 + 3 + 1)  # header, spine opening, 3 batches, footer
+    self.assertEqual(''.join(chunks), to_fcpxml_clips(self.cuts, self.v))
+
+  def test_markers_skip_the_first_clip(self):
+    xml = ''.join(iter_fcpxml([0, 1, 2, 3], self.v, 'markers'))
+    self.assertEqual(xml.count('<marker '), 2)
+    self.assertIn('value="Marker 2"', xml)
+
+  def test_unknown_mode(self):
+    with self.assertRaises(ValueError):
+      list(iter_fcpxml(self.cuts, self.v, 'files'))
+
+
+class GoldenFiles(unittest.TestCase):
+  """The cuts are the ones detected in the fixtures, so this doesn’t run FFmpeg detection"""
+
+  def setUp(self):
+    self.fixtures = Path(__file__).resolve().parent / 'fixtures'
+
+  def test_60fps(self):
+    cuts = [0, 5.0, 10.0, 15.0, 20.0, 25.0, 30.0]
+    for mode, expected in [
+      ('clips', '60fps-clips.fcpxml'),
+      ('compound-clips', '60fps-compound-clips.fcpxml'),
+      ('markers', '60fps-markers.fcpxml'),
+    ]:
+      with self.subTest(mode=mode):
+        self._assert('60fps.mp4', cuts, mode, expected)
+
+  def test_2997fps(self):
+    cuts = [0, 5.005, 10.01, 15.015, 20.02, 25.025, 30.03]
+    self._assert('2997 fps.mp4', cuts, 'clips', '2997 fps.fcpxml')
+
+  def _assert(self, video, cuts, mode, expected):
+    f = io.StringIO()
+    write_fcpxml(f, cuts, VideoAttr(self.fixtures / video), mode)
+    self.assertEqual(
+      f.getvalue().replace(str(self.fixtures), VIDEO_DIR_PLACEHOLDER),
+      (self.fixtures / expected).read_text(encoding='utf-8'))
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,65 @@
+import io
+import os
+import subprocess
+import unittest
+
+from fcpscene.ffmpeg_output import MetadataParser, ProgressPipe, read_scene_scores
+
+
+OUTPUT = b'''frame:0    pts:300     pts_time:5
+lavfi.scene_score=0.912000
+frame:1    pts:601     pts_time:10.0167
+lavfi.scene_score=0.600000
+'''
+
+
+class Metadata(unittest.TestCase):
+  def test_split_chunks(self):
+    parser = MetadataParser()
+    entries = parser.feed(OUTPUT[:50]) + parser.feed(OUTPUT[50:])
+    self.assertEqual(entries, [
+      (5, 'lavfi.scene_score', '0.912000'),
+      (10.0167, 'lavfi.scene_score', '0.600000'),
+    ])
+
+  def test_partial_line_is_kept(self):
+    parser = MetadataParser()
+    self.assertEqual(parser.feed(b'frame:0    pts:300     pts_time:5\nlavfi.scene_sc'), [])
+    self.assertEqual(parser.feed(b'ore=0.5\n'), [(5, 'lavfi.scene_score', '0.5')])
+
+  def test_scene_scores_with_seek(self):
+    self.assertEqual(list(read_scene_scores(io.BufferedReader(io.BytesIO(OUTPUT)), seek_time=20)), [
+      (25, 0.912),
+      (30.0167, 0.6),
+    ])
+
+
+class Progress(unittest.TestCase):
+  def test_blocks(self):
+    stats = []
+    progress = ProgressPipe(10, stats.append)
+    progress.wrap(['ffmpeg'])
+    os.write(progress.pass_fds[0], b'frame=120\nfps=240.5\nout_time_us=2000000\nspeed=4x\nprogress=continue\n'
+                                   b'frame=600\nfps=250\nout_time_us=10000000\nspeed=4.1x\nprogress=end\n')
+    progress.start()
+    progress.join()
+
+    self.assertEqual(len(stats), 2)
+    self.assertEqual(stats[0].progress, 0.2)
+    self.assertEqual(stats[0].out_time, 2)
+    self.assertEqual(stats[0].fps, 240.5)
+    self.assertGreater(stats[0].eta, 0)
+    self.assertEqual(stats[1].progress, 1)
+    self.assertEqual(stats[1].eta, 0)
+
+  def test_pipe_is_closed_when_spawning_fails(self):
+    open_fds = len(os.listdir('/dev/fd'))
+    progress = ProgressPipe(10, lambda stats: None)
+    with self.assertRaises(OSError):
+      with progress, subprocess.Popen(progress.wrap(['/missing/ffmpeg']), pass_fds=progress.pass_fds):
+        pass
+    self.assertEqual(len(os.listdir('/dev/fd')), open_fds)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,176 @@
+import sys
+import time
+import asyncio
+import unittest
+import tempfile
+import subprocess
+from pathlib import Path
+from unittest import mock
+from types import SimpleNamespace
+
+from fcpscene import detect_scene_changes as dsc
+from fcpscene import detect_scene_changes_parallel as dscp
+from fcpscene.event_bus import EventBus
+from fcpscene.detect_scene_changes import iter_scene_changes, detect_scene_changes
+from fcpscene.detect_scene_changes_async import detect_scene_changes_async, iter_scene_changes_async
+
+# Prints a scene score per second, like the `metadata=print` filter, and then hangs
+FAKE_FFMPEG = '''
+import sys, time
+for t in range(1, 6):
+  sys.stdout.write(f'frame:{t} pts:{t} pts_time:{t}.0\\nlavfi.scene_score=0.{t}\\n')
+  sys.stdout.flush()
+time.sleep(float(sys.argv[-1]) if sys.argv[-1] != '-' else 60)
+'''
+
+
+class IterSceneChanges(unittest.TestCase):
+  def setUp(self):
+    tmp = tempfile.TemporaryDirectory()
+    self.addCleanup(tmp.cleanup)
+    script = Path(tmp.name) / 'ffmpeg.py'
+    script.write_text(FAKE_FFMPEG, encoding='utf-8')
+    self.v = SimpleNamespace(path='video.mp4', fps=30, duration=10)
+    self.processes = []
+
+    def popen(cmd, **kwargs):
+      process = subprocess.Popen([sys.executable, script, *map(str, cmd[1:])], **kwargs)
+      self.processes.append(process)
+      return process
+
+    patcher = mock.patch.object(dsc, 'Popen', side_effect=popen)
+    patcher.start()
+    self.addCleanup(patcher.stop)
+
+  def test_yields_time_and_score(self):
+    scenes = iter_scene_changes(self.v, 88, 320, 1.5)
+    self.assertEqual(next(scenes), (2.0, 0.2))  # 1 is closer than 1.5s to the start
+    self.assertEqual(next(scenes), (4.0, 0.4))
+    scenes.close()
+
+  def test_closing_terminates_ffmpeg(self):
+    scenes = iter_scene_changes(self.v, 88, 320, 0)
+    for cut_time, _ in scenes:
+      if cut_time == 2:
+        break
+    scenes.close()
+    self.assertIsNotNone(self.processes[0].poll())
+
+  def test_stop_from_ui_ends_iteration(self):
+    bus = EventBus()
+    scenes = iter_scene_changes(self.v, 88, 320, 0, bus=bus)
+    self.assertEqual(next(scenes)[0], 1)
+    bus.emit_stop()
+    rest = [t for t, _ in scenes]  # the ones printed before the signal, without raising
+    self.assertEqual(rest, [2, 3, 4, 5][:len(rest)])
+    self.assertIsNotNone(self.processes[0].poll())
+
+  def test_detect_scene_changes_adds_start_and_end(self):
+    with mock.patch.object(dsc, 'scene_detect_cmd', return_value=(['ffmpeg', '0.1'], 0)):
+      self.assertEqual(detect_scene_changes(self.v, EventBus(), 88, 320, 0), [0, 1, 2, 3, 4, 5, 10])
+
+
+class ParallelCancellation(unittest.TestCase):
+  def setUp(self):
+    tmp = tempfile.TemporaryDirectory()
+    self.addCleanup(tmp.cleanup)
+    script = Path(tmp.name) / 'ffmpeg.py'
+    script.write_text(FAKE_FFMPEG, encoding='utf-8')
+    self.v = SimpleNamespace(path='video.mp4', fps=30, duration=10)
+    self.processes = []
+
+    def popen(cmd, **kwargs):  # the range starting at 0 fails, and the others hang
+      args = ['-c', 'import sys; sys.exit(1)'] if cmd[-1] == '0' else [script, '-']
+      process = subprocess.Popen([sys.executable, *args], **kwargs)
+      self.processes.append(process)
+      return process
+
+    for patcher in [
+      mock.patch.object(dscp, 'Popen', side_effect=popen),
+      mock.patch.object(dscp, 'plan_time_ranges', return_value=([(0, 4), (4, 7), (7, 10)], [0, 4, 7])),
+      mock.patch.object(dscp, 'scene_detect_cmd', side_effect=lambda v, s, pw, start, end, seek: (['ffmpeg', str(start)], seek)),
+    ]:
+      patcher.start()
+      self.addCleanup(patcher.stop)
+
+  def test_failure_stops_the_other_ranges(self):
+    started = time.monotonic()
+    with self.assertRaises(RuntimeError):
+      dscp.detect_scene_changes_parallel(self.v, EventBus(), 88, 320, 0, jobs=2)
+    self.assertLess(time.monotonic() - started, 10)  # instead of the 60s the others hang
+    self.assertTrue(all(p.poll() is not None for p in self.processes))
+
+
+class SceneChangesAsync(unittest.IsolatedAsyncioTestCase):
+  def setUp(self):
+    tmp = tempfile.TemporaryDirectory()
+    self.addCleanup(tmp.cleanup)
+    script = Path(tmp.name) / 'ffmpeg.py'
+    script.write_text(FAKE_FFMPEG, encoding='utf-8')
+    self.v = SimpleNamespace(path='video.mp4', fps=30, duration=10)
+    self.processes = []
+    self.running = 0
+    self.max_running = 0
+    create_subprocess_exec = asyncio.create_subprocess_exec
+
+    async def create_process(program, *args, **kwargs):
+      process = await create_subprocess_exec(sys.executable, str(script), *args, **kwargs)
+      self.processes.append(process)
+      self.running += 1
+      self.max_running = max(self.max_running, self.running)
+      wait = process.wait
+
+      async def wait_and_count():
+        returncode = await wait()
+        if process not in self.exited:
+          self.exited.add(process)
+          self.running -= 1
+        return returncode
+
+      process.wait = wait_and_count
+      return process
+
+    self.exited = set()
+    patcher = mock.patch('asyncio.create_subprocess_exec', side_effect=create_process)
+    patcher.start()
+    self.addCleanup(patcher.stop)
+
+    for target in ['fcpscene.detect_scene_changes.scene_detect_cmd', 'fcpscene.detect_scene_changes_async.scene_detect_cmd']:
+      cmd = mock.patch(target, return_value=(['ffmpeg', '0.1'], 0))  # exits after 0.1s
+      cmd.start()
+      self.addCleanup(cmd.stop)
+
+    sync_popen = mock.patch.object(dsc, 'Popen', side_effect=lambda cmd, **kwargs:
+                                   subprocess.Popen([sys.executable, script, *cmd[1:]], **kwargs))
+    sync_popen.start()
+    self.addCleanup(sync_popen.stop)
+
+  async def test_same_cuts_as_sync(self):
+    for mss in [0, 1.5, 6]:
+      sync_cuts = await asyncio.to_thread(detect_scene_changes, self.v, EventBus(), 88, 320, mss)
+      self.assertEqual(await detect_scene_changes_async(self.v, EventBus(), 88, 320, mss), sync_cuts)
+
+  async def test_cancelling_stops_ffmpeg(self):
+    with mock.patch('fcpscene.detect_scene_changes_async.scene_detect_cmd', return_value=(['ffmpeg', '-'], 0)):  # hangs
+      task = asyncio.create_task(detect_scene_changes_async(self.v, EventBus(), 88, 320, 0))
+      while not self.processes:
+        await asyncio.sleep(0.01)
+      await asyncio.sleep(0.2)
+      task.cancel()
+      with self.assertRaises(asyncio.CancelledError):
+        await task
+    self.assertIsNotNone(self.processes[0].returncode)
+
+  async def test_limit(self):
+    limit = asyncio.Semaphore(2)
+    await asyncio.gather(*(detect_scene_changes_async(self.v, EventBus(), 88, 320, 0, limit=limit) for _ in range(5)))
+    self.assertEqual(len(self.processes), 5)
+    self.assertLessEqual(self.max_running, 2)
+
+  async def test_iterator(self):
+    scenes = iter_scene_changes_async(self.v, 88, 320, 1.5)
+    self.assertEqual([cut async for cut in scenes], [(2.0, 0.2), (4.0, 0.4)])
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,120 @@
+import sys
+import unittest
+import tempfile
+import subprocess
+from pathlib import Path
+from unittest import mock
+from importlib.util import find_spec
+
+from fcpscene import PROXY_WIDTH, MIN_SCENE_SECS, scene_scores
+from fcpscene.event_bus import EventBus
+from fcpscene.video_attr import VideoAttr
+from fcpscene.detect_engines import get_engine
+from fcpscene.scene_scores import detect_scene_changes_cached
+from fcpscene.detect_scene_changes_two_pass import detect_scene_changes_two_pass
+from fcpscene.process_stats import PROC_SUPPORTED, ProcessMonitor, ProcessStats, parse_proc_io
+
+BUSY_CHILD = '''
+import time
+open("/dev/zero", "rb").read(2_000_000)
+end = time.process_time() + 0.3
+while time.process_time() < end:
+  pass
+'''
+
+
+@unittest.skipUnless(PROC_SUPPORTED, 'Needs /proc')
+class ProcessMonitorTest(unittest.TestCase):
+  def setUp(self):
+    self.bus = EventBus()
+    self.samples = []
+    self.stats = []
+    self.bus.subscribe_process_sample(self.samples.append)
+    self.bus.subscribe_process_stats(self.stats.append)
+
+  def run_child(self, monitor):
+    with subprocess.Popen([sys.executable, '-c', BUSY_CHILD]) as process:
+      monitor.add(process)
+      monitor.last_sample(process)
+      process.wait()
+
+  def test_samples_and_summary(self):
+    with ProcessMonitor(self.bus, 'detect', interval=0.05) as monitor:
+      self.run_child(monitor)
+
+    self.assertGreater(len(self.samples), 1)
+    self.assertTrue(all(s.stage == 'detect' for s in self.samples))
+    self.assertEqual(len(self.stats), 1)
+    stats = self.stats[0]
+    self.assertIs(stats, monitor.stats)
+    self.assertEqual(stats.n_processes, 1)
+    self.assertGreaterEqual(stats.cpu_secs, 0.25)  # includes the interval after the last periodic sample
+    self.assertGreater(stats.peak_rss_mb, 1)
+    self.assertGreater(stats.read_mb, 1)
+    self.assertLessEqual(stats.avg_cores, 1.2)
+
+  def test_short_process_is_counted(self):
+    with ProcessMonitor(self.bus, 'export', interval=60) as monitor:
+      self.run_child(monitor)
+    self.assertGreaterEqual(self.stats[0].cpu_secs, 0.25)
+
+  def test_reaped_process(self):
+    with ProcessMonitor(self.bus, 'export', interval=60) as monitor:
+      with subprocess.Popen([sys.executable, '-c', 'pass']) as process:
+        monitor.add(process)
+        process.wait()
+        monitor.last_sample(process)
+    self.assertEqual(self.stats[0].n_processes, 1)
+
+  def test_stop_is_idempotent(self):
+    monitor = ProcessMonitor(self.bus, 'detect')
+    monitor.start()
+    monitor.stop()
+    monitor.stop()
+    self.assertEqual(len(self.stats), 1)
+    self.assertEqual(self.stats[0].n_processes, 0)
+
+
+@unittest.skipUnless(PROC_SUPPORTED, 'Needs /proc')
+class DetectorStats(unittest.TestCase):
+  """Every detector reports the stats of its FFmpeg processes"""
+
+  def setUp(self):
+    self.v = VideoAttr(Path(__file__).resolve().parent / 'fixtures' / '60fps.mp4')
+
+  def stats(self, detect) -> ProcessStats:
+    bus = EventBus()
+    stats = []
+    bus.subscribe_process_stats(stats.append)
+    detect(self.v, bus, 85, PROXY_WIDTH, MIN_SCENE_SECS)
+    self.assertEqual(len(stats), 1)
+    self.assertEqual(stats[0].stage, 'detect')
+    self.assertGreater(stats[0].cpu_secs, 0)
+    return stats[0]
+
+  def test_two_pass(self):
+    self.assertGreater(self.stats(detect_scene_changes_two_pass).n_processes, 1)  # coarse pass and windows
+
+  @unittest.skipUnless(find_spec('numpy'), 'Needs numpy')
+  def test_numpy(self):
+    self.assertEqual(self.stats(get_engine('numpy')).n_processes, 1)
+
+  def test_recording_scores(self):
+    with tempfile.TemporaryDirectory() as tmp, mock.patch.object(scene_scores, 'SCORES_DIR', Path(tmp)):
+      self.assertEqual(self.stats(detect_scene_changes_cached).n_processes, 1)
+
+
+class Formatting(unittest.TestCase):
+  def test_summary(self):
+    stats = ProcessStats('export', 4, wall_secs=10, cpu_secs=31, peak_rss_mb=812.4, read_mb=452)
+    self.assertEqual(stats.summary, 'export: 3.1 cores avg, 812 MB peak RSS, 45.2 MB/s read (4 FFmpeg)')
+    self.assertEqual(stats.to_json()['avg_cores'], 3.1)
+    self.assertEqual(stats.to_json()['read_mb_per_sec'], 45.2)
+
+  def test_parse_proc_io(self):
+    self.assertEqual(parse_proc_io(b'rchar: 2048\nread_bytes: 0\n'), 2048)
+    self.assertEqual(parse_proc_io(b''), 0)
+
+
+if __name__ == '__main__':
+  unittest.main()
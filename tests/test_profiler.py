@@ -0,0 +1,76 @@
+import io
+import json
+import tempfile
+import unittest
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+from fcpscene.profiler import Profiler, span, profiling
+from fcpscene.fcpxml_writer import write_fcpxml, iter_fcpxml
+from fcpscene.to_csv_clips import to_csv_clips
+
+
+class Spans(unittest.TestCase):
+  def test_nothing_is_recorded_when_not_profiling(self):
+    with span('probe') as s:
+      self.assertIsNone(s)
+
+  def test_records_complete_events(self):
+    with Profiler() as profiler:
+      with span('detect', jobs=2) as s:
+        s.add('parse_ms', 1_500_000)
+        s.add('parse_ms', 500_000)
+      t = threading.Thread(target=lambda: span('csv').__enter__().__exit__(), name='worker')
+      t.start()
+      t.join()
+    with span('after'):
+      pass
+
+    events = [e for e in profiler.events if e['ph'] == 'X']
+    self.assertEqual([e['name'] for e in events], ['detect', 'csv'])
+    self.assertEqual(events[0]['args'], {'jobs': 2, 'parse_ms': 2.0})
+    self.assertGreaterEqual(events[0]['dur'], 0)
+    self.assertNotEqual(events[0]['tid'], events[1]['tid'])
+    thread_names = {e['args']['name'] for e in profiler.events if e['ph'] == 'M'}
+    self.assertIn('worker', thread_names)
+
+  def test_writers(self):
+    v = SimpleNamespace(name='vid', width=1920, height=1080, fps=30, fps_numerator=30, fps_denominator=1,
+                        fcp_color_space='1-1-1 (Rec. 709)', file_uri='file:///tmp/vid.mov')
+    cuts = [0, 2.5, 5, 10]
+    f = io.StringIO()
+    with Profiler() as profiler:
+      write_fcpxml(f, cuts, v, 'clips')
+      to_csv_clips(cuts)
+    self.assertEqual(f.getvalue(), ''.join(iter_fcpxml(cuts, v, 'clips')))
+
+    names = [e['name'] for e in profiler.events if e['ph'] == 'X']
+    self.assertIn('fcpxml', names)
+    self.assertIn('csv', names)
+    fcpxml = next(e for e in profiler.events if e['name'] == 'fcpxml')
+    self.assertIn('format_ms', fcpxml['args'])
+    self.assertIn('write_ms', fcpxml['args'])
+
+  def test_saves_chrome_trace(self):
+    with tempfile.TemporaryDirectory() as tmp:
+      path = Path(tmp) / 'trace.json'
+      with self.assertRaises(SystemExit):
+        with profiling(path):
+          with span('probe', video='a.mp4'):
+            pass
+          raise SystemExit(1)
+
+      trace = json.loads(path.read_text())
+      self.assertEqual(trace['displayTimeUnit'], 'ms')
+      self.assertEqual([e['name'] for e in trace['traceEvents'] if e['ph'] == 'X'], ['probe'])
+
+  def test_no_path(self):
+    with profiling(None) as profiler:
+      self.assertIsNone(profiler)
+      with span('probe') as s:
+        self.assertIsNone(s)
+
+
+if __name__ == '__main__':
+  unittest.main()
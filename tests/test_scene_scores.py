@@ -0,0 +1,74 @@
+import os
+import unittest
+import tempfile
+from array import array
+from pathlib import Path
+from unittest import mock
+from types import SimpleNamespace
+
+from fcpscene import scene_scores
+from fcpscene.app_cli import detect
+from fcpscene.event_bus import EventBus
+from fcpscene.detect_engines import DEFAULT_ENGINE
+from fcpscene.scene_scores import SceneScores, load_scene_scores, save_scene_scores, prune_scores_cache
+
+
+class SceneScoresToCuts(unittest.TestCase):
+  def setUp(self):
+    self.scene_scores = SceneScores(
+      pts=array('d', [0, 1, 2, 2.2, 3, 4]),
+      scores=array('d', [0, 0.05, 0.5, 0.3, 0.9, 0.01]))
+
+  def test_high_sensitivity(self):
+    self.assertEqual(self.scene_scores.to_cuts(5, 80, 0), [0, 2, 2.2, 3, 5])
+
+  def test_low_sensitivity(self):
+    self.assertEqual(self.scene_scores.to_cuts(5, 20, 0), [0, 3, 5])
+
+  def test_min_scene_secs(self):
+    self.assertEqual(self.scene_scores.to_cuts(5, 80, 0.5), [0, 2, 3, 5])
+
+  def test_min_scene_secs_at_end(self):
+    self.assertEqual(self.scene_scores.to_cuts(3.2, 20, 0.5), [0, 3])
+
+
+class CachedDetection(unittest.TestCase):
+  def test_the_cache_is_read_once(self):
+    cached = SceneScores(pts=array('d', [1, 2]), scores=array('d', [0.5, 0.05]))
+    args = SimpleNamespace(engine=DEFAULT_ENGINE, strategy='one-pass', score_cache=False, resume=False, checkpoints=True, jobs=1,
+                           sensitivity=80, proxy_width=320, min_scene_seconds=0)
+    with mock.patch.object(scene_scores, 'load_scene_scores', return_value=cached) as load:
+      self.assertEqual(detect(SimpleNamespace(duration=3), EventBus(), args), [0, 1, 3])
+    load.assert_called_once()
+
+
+class ScoresCache(unittest.TestCase):
+  def setUp(self):
+    tmp = tempfile.TemporaryDirectory()
+    self.addCleanup(tmp.cleanup)
+    self.dir = Path(tmp.name)
+    patcher = mock.patch.object(scene_scores, 'SCORES_DIR', self.dir)
+    patcher.start()
+    self.addCleanup(patcher.stop)
+
+  def test_cached_scores_find_the_same_cuts(self):
+    video = self.dir / 'video.mp4'
+    video.touch()
+    v = SimpleNamespace(path=video, duration=3)
+    threshold = 1 - 88 / 100
+    recorded = SceneScores(pts=array('d', [1, 2]), scores=array('d', [threshold + 1e-9, 0.05]))  # float32 rounds it down
+    save_scene_scores(v, 320, recorded)
+    self.assertEqual(load_scene_scores(v, 320).to_cuts(3, 88, 0), recorded.to_cuts(3, 88, 0))
+    self.assertEqual(recorded.to_cuts(3, 88, 0), [0, 1, 3])
+
+  def test_least_recently_used_are_pruned(self):
+    for i, name in enumerate(['old', 'mid', 'new']):
+      path = self.dir / f'{name}.bin'
+      path.write_bytes(b'0' * 100)
+      os.utime(path, ns=(i * 10**9, i * 10**9))
+    prune_scores_cache(max_bytes=250)
+    self.assertEqual(sorted(p.stem for p in self.dir.glob('*.bin')), ['mid', 'new'])
+
+
+if __name__ == '__main__':
+  unittest.main()
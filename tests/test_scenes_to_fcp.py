@@ -1,4 +1,5 @@
 import unittest
+from unittest import mock
 from shutil import rmtree
 from pathlib import Path
 from typing import Tuple
@@ -11,6 +12,8 @@ from fcpscene.to_fcpxml_clips import to_fcpxml_clips
 from fcpscene.to_fcpxml_markers import to_fcpxml_markers
 from fcpscene.to_fcpxml_compound_clips import to_fcpxml_compound_clips
 from fcpscene.detect_scene_changes import detect_scene_changes, CutTimes
+from fcpscene.detect_scene_changes_parallel import detect_scene_changes_parallel
+from fcpscene import detect_scene_changes_two_pass as two_pass
 from fcpscene.to_file_clips import to_file_clips
 from fcpscene.cuts_to_clips import cuts_to_file_clips
 
@@ -31,15 +34,47 @@ class FCPScene(unittest.TestCase):
 
   def test_60fps_csv(self): self._csv('60fps.mp4', '60fps.csv')
 
-  def test_to_file_clips(self):
+  def test_parallel_matches_serial_60fps(self): self._parallel('60fps.mp4', '60fps-clips.fcpxml')
+
+  def test_parallel_matches_serial_2997fps(self): self._parallel('2997 fps.mp4', '2997 fps.fcpxml')
+
+  def test_two_pass_matches_one_pass_60fps(self): self._two_pass('60fps.mp4')
+
+  def test_two_pass_matches_one_pass_2997fps(self): self._two_pass('2997 fps.mp4')
+
+  def test_two_pass_stopped_keeps_the_coarse_candidates(self):
+    cuts, v = self._detect('60fps.mp4')
+    bus = EventBus()
+    real_candidate_windows = two_pass.candidate_windows
+
+    def candidate_windows(*args):
+      bus.emit_stop()  # after the coarse pass
+      return real_candidate_windows(*args)
+
+    with mock.patch.object(two_pass, 'candidate_windows', candidate_windows):
+      stopped_cuts = detect_scene_changes(v, bus, sensitivity=85, proxy_width=PROXY_WIDTH,
+                                          min_scene_secs=MIN_SCENE_SECS, strategy='two-pass')
+    self.assertGreater(len(stopped_cuts), 2)
+    for cut in cuts[1:-1]:
+      self.assertTrue(any(abs(t - cut) <= 1 / two_pass.COARSE_FPS for t in stopped_cuts), cut)
+
+  def test_to_file_clips(self): self._file_clips(jobs=1)
+
+  def test_to_file_clips_parallel(self): self._file_clips(jobs=3)
+
+  def _file_clips(self, jobs):
     cuts, v = self._detect('60fps_prores.mov')
-    file_clips = cuts_to_file_clips(cuts)
+    file_clips = cuts_to_file_clips(cuts, v)
 
     output_dir = v.path.parent / v.path.stem
     if output_dir.exists():
       rmtree(output_dir)
 
-    to_file_clips(cuts, v, EventBus())
+    bus = EventBus()
+    progress = []
+    bus.subscribe_export_progress(lambda current, total: progress.append(current))
+    to_file_clips(cuts, v, bus, jobs=jobs)
+    self.assertEqual(progress, list(range(1, len(file_clips) + 1)))
     exported = sorted(output_dir.glob(f'*{v.path.suffix}'))
     self.assertEqual(len(exported), len(file_clips), f'Expected {len(file_clips)} clips')
 
@@ -64,7 +99,23 @@ class FCPScene(unittest.TestCase):
 
   def _csv(self, video, expected):
     cuts, v = self._detect(video)
-    self._assert(to_csv_clips(cuts), expected)
+    self._assert(to_csv_clips(cuts, v), expected)
+
+
+  def _parallel(self, video, expected):
+    cuts, v = self._detect(video)
+    parallel_cuts = detect_scene_changes_parallel(v, EventBus(), sensitivity=85, proxy_width=PROXY_WIDTH,
+                                                  min_scene_secs=MIN_SCENE_SECS, jobs=3)
+    self.assertEqual(len(parallel_cuts), len(cuts))
+    for actual, serial in zip(parallel_cuts, cuts):
+      self.assertAlmostEqual(actual, serial, delta=0.5 / v.fps)
+    self._assert(to_fcpxml_clips(parallel_cuts, v), expected)
+
+  def _two_pass(self, video):
+    cuts, v = self._detect(video)
+    two_pass_cuts = detect_scene_changes(v, EventBus(), sensitivity=85, proxy_width=PROXY_WIDTH,
+                                         min_scene_secs=MIN_SCENE_SECS, strategy='two-pass')
+    self.assertEqual(two_pass_cuts, cuts)
 
 
   def _assert(self, actual, expected):
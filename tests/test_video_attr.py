@@ -1,5 +1,9 @@
 import unittest
+import tempfile
 from pathlib import Path
+from unittest import mock
+
+from fcpscene import video_attr
 from fcpscene.video_attr import VideoAttr
 
 
@@ -24,5 +28,48 @@ class VideoAttributes(unittest.TestCase):
     v = VideoAttr(self.fixtures / '60fps_prores.mov')
     self.assertTrue(v.intraframe_coded)
 
+
+class ProbeCache(unittest.TestCase):
+  def setUp(self):
+    tmp = tempfile.TemporaryDirectory()
+    self.addCleanup(tmp.cleanup)
+    self.video = Path(tmp.name) / 'video.mp4'
+    self.video.write_bytes(b'fake')
+    probe_dir = mock.patch.object(video_attr, 'PROBE_DIR', Path(tmp.name) / 'probe')
+    probe_dir.start()
+    self.addCleanup(probe_dir.stop)
+
+  def probe_result(self, *attrs):
+    stream = {a: '' for a in attrs} | {
+      'width': 1920, 'height': 1080, 'r_frame_rate': '30/1', 'duration': '',
+      'codec_name': 'h264', 'codec_type': 'video', 'has_b_frames': 0,
+    }
+    return {'stream': stream, 'format_duration': '12.5', 'keyframes_only': True}
+
+  def test_probes_once(self):
+    with mock.patch.object(VideoAttr, 'ffprobe', autospec=True,
+                           side_effect=lambda _, *attrs: self.probe_result(*attrs)) as ffprobe:
+      v1 = VideoAttr(self.video)
+      v2 = VideoAttr(self.video)
+    self.assertEqual(ffprobe.call_count, 1)
+    self.assertEqual(v2.duration, 12.5)  # from the format
+    self.assertTrue(v1.intraframe_coded)
+    self.assertTrue(v2.intraframe_coded)
+
+  def test_reprobes_modified_file(self):
+    with mock.patch.object(VideoAttr, 'ffprobe', autospec=True,
+                           side_effect=lambda _, *attrs: self.probe_result(*attrs)) as ffprobe:
+      VideoAttr(self.video)
+      self.video.write_bytes(b'modified')
+      VideoAttr(self.video)
+    self.assertEqual(ffprobe.call_count, 2)
+
+  def test_does_not_cache_failures(self):
+    with mock.patch.object(VideoAttr, 'ffprobe', autospec=True, return_value={}) as ffprobe:
+      self.assertTrue(VideoAttr(self.video).error)
+      VideoAttr(self.video)
+    self.assertEqual(ffprobe.call_count, 2)
+
+
 if __name__ == '__main__':
   unittest.main()